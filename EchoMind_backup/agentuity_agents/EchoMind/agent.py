@@ -1,7 +1,10 @@
 from agentuity import AgentRequest, AgentResponse, AgentContext
 from openai import AsyncOpenAI
 
-client = AsyncOpenAI()
+from agentuity_agents.EchoMind.transport import create_http_client
+
+# Retries happen in the pooled transport (jittered backoff + circuit breaker), not in the SDK
+client = AsyncOpenAI(http_client=create_http_client(), max_retries=0)
 
 short_term_memory = []
 
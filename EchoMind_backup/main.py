@@ -1,7 +1,14 @@
 from agentuity import Agent, event
-import requests, os
+import os
+
+from agentuity_agents.EchoMind.transport import create_http_client
 
 OPENROUTER_KEY = os.getenv("OPENROUTER_API_KEY")
+OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
+HEDGE_AFTER = float(os.getenv("ECHOMIND_HEDGE_AFTER", "0"))  # seconds; 0 disables hedged requests (idempotent ones only)
+
+# 共享的长连接客户端：连接池、并发上限、抖动重试、熔断
+http_client = create_http_client(timeout=20.0, hedge_after=HEDGE_AFTER or None)
 
 class EchoMind(Agent):
     def __init__(self):
@@ -9,16 +16,16 @@ class EchoMind(Agent):
         self.memory = []
 
     @event("message")
-    def on_message(self, message):
+    async def on_message(self, message):
         """当有新消息进来时触发"""
-        summary = self.summarize_message(message)
+        summary = await self.summarize_message(message)
         if summary:
             self.memory.append(summary)
             if len(self.memory) > 10:  # 保持短期记忆长度
                 self.memory.pop(0)
             print(f"[EchoMind] Updated memory: {self.memory}")
 
-    def summarize_message(self, text):
+    async def summarize_message(self, text):
         """调用 OpenRouter LLM 总结重点"""
         headers = {
             "Authorization": f"Bearer {OPENROUTER_KEY}",
@@ -32,11 +39,10 @@ class EchoMind(Agent):
             ]
         }
         try:
-            res = requests.post(
-                "https://openrouter.ai/api/v1/chat/completions",
+            res = await http_client.post(
+                OPENROUTER_URL,
                 headers=headers,
-                json=body,
-                timeout=20
+                json=body
             )
             res.raise_for_status()
             data = res.json()
@@ -0,0 +1,83 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+# =========================
+# 📦 Cross-Request Summary Micro-Batching
+# =========================
+# Summarizes a batch of (role, text) items; None marks an item the batch failed to return
+BatchSummarizer = Callable[[List[Tuple[str, str]]], Awaitable[List[Optional[str]]]]
+
+
+class BatchItemError(Exception):
+    """The batched response did not contain a usable summary for this item"""
+
+
+class SummaryBatcher:
+    """
+    Collects summarization requests from concurrent callers for up to
+    `max_delay` seconds (or until `max_batch` are pending) and sends them
+    upstream as one call. Each caller awaits only its own result; a failed
+    or unparseable item raises for that caller alone, so it can fall back.
+    """
+
+    def __init__(self, summarize_batch: BatchSummarizer, max_batch: int = 8, max_delay: float = 0.005):
+        self._summarize_batch = summarize_batch
+        self.max_batch = max(1, max_batch)
+        self.max_delay = max_delay
+        self._pending: List[Tuple[str, str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._inflight: Set[asyncio.Task] = set()
+        self.batches = 0
+        self.items = 0
+        self.item_failures = 0
+
+    async def submit(self, role: str, text: str) -> str:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((role, text, future))
+        if len(self._pending) >= self.max_batch:
+            self._dispatch()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._dispatch)
+        return await future
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        batch = [item for item in batch if not item[2].done()]  # drop cancelled callers
+        if not batch:
+            return
+        task = asyncio.get_running_loop().create_task(self._run(batch))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _run(self, batch: List[Tuple[str, str, asyncio.Future]]) -> None:
+        self.batches += 1
+        self.items += len(batch)
+        try:
+            results = await self._summarize_batch([(role, text) for role, text, _ in batch])
+        except Exception as e:
+            self.item_failures += len(batch)
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        results = list(results) + [None] * (len(batch) - len(results))
+        for (_, _, future), summary in zip(batch, results):
+            if future.done():
+                continue
+            if summary:
+                future.set_result(summary)
+            else:
+                self.item_failures += 1
+                future.set_exception(BatchItemError("missing from batched summary response"))
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+            "item_failures": self.item_failures,
+        }
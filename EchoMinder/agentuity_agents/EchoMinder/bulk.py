@@ -0,0 +1,185 @@
+import asyncio
+import json
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+# =========================
+# 📦 Bulk Ingestion (conversation history import)
+# =========================
+Summarize = Callable[[str, bool], Awaitable[str]]   # (text, is_user_message) -> summary
+Merge = Callable[[List[str]], Awaitable[str]]       # mid-term batch -> long-term memory
+Progress = Callable[[Dict[str, float]], None]
+
+READ_CHUNK = 64 * 1024
+
+
+def iter_json_records(stream: TextIO) -> Iterator[Any]:
+    """
+    Yield the records of a JSON array or of JSON Lines, reading `stream`
+    incrementally so the whole input is never held in memory.
+    """
+    decoder = json.JSONDecoder()
+    buffer = stream.read(READ_CHUNK)
+    start = len(buffer) - len(buffer.lstrip())
+    if not buffer[start:start + 1] == "[":
+        # JSON Lines: one record per non-empty line
+        pending = buffer
+        while True:
+            *lines, pending = pending.split("\n")
+            for line in lines:
+                if line.strip():
+                    yield json.loads(line)
+            chunk = stream.read(READ_CHUNK)
+            if not chunk:
+                break
+            pending += chunk
+        if pending.strip():
+            yield json.loads(pending)
+        return
+
+    buffer, eof = buffer[start + 1:], False
+    while True:
+        buffer = buffer.lstrip(" \t\r\n,")
+        if buffer.startswith("]"):
+            return
+        try:
+            record, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            chunk = stream.read(READ_CHUNK)
+            eof = not chunk
+            buffer += chunk
+            continue
+        yield record
+        buffer = buffer[end:]
+
+
+def iter_turns(records: Iterable[Any]) -> Iterator[Tuple[str, str]]:
+    """(user_message, chatbot_reply) pairs from turn records; empty turns are skipped"""
+    for record in records:
+        if isinstance(record, str):
+            user_message, chatbot_reply = record, ""
+        elif isinstance(record, dict):
+            user_message = record.get("user_message") or record.get("user") or ""
+            chatbot_reply = record.get("chatbot_reply") or record.get("assistant") or ""
+        else:
+            continue
+        if user_message or chatbot_reply:
+            yield str(user_message), str(chatbot_reply)
+
+
+class BulkResult:
+    """What a bulk import adds to each memory layer, plus its counters"""
+
+    def __init__(self):
+        self.long_term: List[str] = []
+        self.mid_term: List[str] = []
+        self.short_term: List[str] = []
+        self.turns = 0
+        self.summaries = 0
+        self.merges = 0
+        self.started = time.perf_counter()
+
+    def stats(self) -> Dict[str, float]:
+        elapsed = time.perf_counter() - self.started
+        return {
+            "turns": self.turns,
+            "summaries": self.summaries,
+            "merges": self.merges,
+            "elapsed_s": round(elapsed, 3),
+            "turns_per_s": round(self.turns / elapsed, 2) if elapsed else 0.0,
+        }
+
+
+async def run_bulk_ingest(
+    turns: Iterable[Tuple[str, str]],
+    summarize: Summarize,
+    merge: Merge,
+    batch_size: int,
+    short_limit: int,
+    concurrency: int = 8,
+    progress: Optional[Progress] = None,
+    progress_interval: float = 1.0,
+    pending: Iterable[str] = (),
+) -> BulkResult:
+    """
+    Summarize turns with at most `concurrency` LLM calls in flight, keeping
+    input order. User summaries are appended to the `pending` mid-term batch
+    and every `batch_size` of them are merged once into one long-term memory;
+    the remainder becomes the new mid-term memory. Chatbot replies only feed
+    short-term memory, so only the last `short_limit` entries are ever
+    summarized. Buffers are bounded by `concurrency`, not by input size.
+    """
+    result = BulkResult()
+    slots = asyncio.Semaphore(max(1, concurrency))
+    window = max(1, concurrency) * 4
+
+    async def limited(call: Awaitable[str]) -> str:
+        async with slots:
+            return await call
+
+    summaries: Deque[Tuple[asyncio.Task, str]] = deque()   # in-flight user summaries + reply
+    merges: Deque[asyncio.Task] = deque()
+    recent: Deque[Tuple[bool, str]] = deque(maxlen=short_limit)  # (is summary, text)
+    batch: List[str] = list(pending)
+    last_report = time.perf_counter()
+
+    async def collect_merges(keep: int) -> None:
+        while len(merges) > keep:
+            result.long_term.append(await merges.popleft())
+            result.merges += 1
+
+    async def consume() -> None:
+        nonlocal batch, last_report
+        task, chatbot_reply = summaries.popleft()
+        if task is not None:
+            summary = await task
+            result.summaries += 1
+            recent.append((True, summary))
+            batch.append(summary)
+            if len(batch) >= batch_size:
+                merges.append(asyncio.ensure_future(limited(merge(batch))))
+                batch = []
+                await collect_merges(concurrency)
+        if chatbot_reply:
+            recent.append((False, chatbot_reply))
+        result.turns += 1
+        if progress is not None and time.perf_counter() - last_report >= progress_interval:
+            last_report = time.perf_counter()
+            progress(result.stats())
+
+    try:
+        for user_message, chatbot_reply in turns:
+            task = asyncio.ensure_future(limited(summarize(user_message, True))) if user_message else None
+            summaries.append((task, chatbot_reply))
+            if len(summaries) >= window:
+                await consume()
+        while summaries:
+            await consume()
+        await collect_merges(0)
+    except BaseException:
+        for task, _ in summaries:
+            if task is not None:
+                task.cancel()
+        for task in merges:
+            task.cancel()
+        raise
+
+    result.mid_term = batch
+    short_term = await asyncio.gather(*[
+        asyncio.ensure_future(limited(summarize(text, False))) if not is_summary else _ready(text)
+        for is_summary, text in recent
+    ])
+    result.short_term = [
+        text if is_summary else f"Chatbot: {text}"
+        for (is_summary, _), text in zip(recent, short_term)
+    ]
+    if progress is not None:
+        progress(result.stats())
+    return result
+
+
+async def _ready(value: str) -> str:
+    return value
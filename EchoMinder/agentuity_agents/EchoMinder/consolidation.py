@@ -0,0 +1,97 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from agentuity_agents.EchoMinder.namespaces import MemoryNamespace
+from agentuity_agents.EchoMinder.ranking import MemoryRanker
+
+# =========================
+# 🗜️ Background Consolidation (mid-term merges + tiered long-term compaction)
+# =========================
+
+
+def plan_compaction(
+    namespace: MemoryNamespace, fanout: int, level_capacity: int, ranker: Optional[MemoryRanker] = None
+) -> Optional[Tuple[int, List[int]]]:
+    """
+    Pick the next long-term batch to compact, LSM style: when a level holds
+    more than `level_capacity` memories, its `fanout` oldest (with a `ranker`:
+    least recently and least often recalled) are merged into one memory of the
+    next level. Returns (level, doc ids) or None when every level is within
+    capacity, so the retrievable set stays O(capacity × levels). Memories
+    claimed by a compaction in flight are left out.
+    """
+    by_level: Dict[int, List[int]] = {}
+    claimed = namespace.claimed["long"]
+    for doc_id, _ in namespace.long_term.items():
+        if doc_id in claimed:
+            continue
+        by_level.setdefault(namespace.long_term.level(doc_id), []).append(doc_id)
+    for level in sorted(by_level):
+        doc_ids = by_level[level]
+        if len(doc_ids) > level_capacity:
+            if ranker is not None:
+                return level, ranker.coldest(namespace.long_term, doc_ids, fanout)
+            return level, doc_ids[:fanout]
+    return None
+
+
+class ConsolidationWorker:
+    """
+    Runs consolidation passes on a background task instead of inside requests.
+
+    A pass runs every `interval` seconds, or sooner when `notify()` is called
+    (e.g. a request pushed mid-term over its size threshold). Passes never
+    overlap, and a failing pass is logged and retried on the next tick.
+    """
+
+    def __init__(self, consolidate: Callable[[], Awaitable[None]], interval: float = 30.0, name: str = "Consolidation"):
+        self._consolidate = consolidate
+        self.interval = interval
+        self.name = name
+        self._wakeup: Optional[asyncio.Event] = None
+        self._running: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+        self.passes = 0
+        self.failures = 0
+
+    def _primitives(self) -> None:
+        # Created lazily so they bind to the running event loop
+        if self._running is None:
+            self._wakeup = asyncio.Event()
+            self._running = asyncio.Lock()
+
+    def start(self) -> None:
+        """Start the worker on the running event loop (no-op if already running)"""
+        self._primitives()
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    def notify(self) -> None:
+        self.start()
+        self._wakeup.set()
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.run_now()
+
+    async def run_now(self) -> None:
+        """Run one pass right away, after any pass already in progress"""
+        self._primitives()
+        async with self._running:
+            try:
+                await self._consolidate()
+                self.passes += 1
+            except Exception as e:
+                self.failures += 1
+                print(f"[EchoMinderNew] {self.name} pass failed: {e}")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
@@ -0,0 +1,266 @@
+import hashlib
+from array import array
+from collections import Counter
+from functools import lru_cache
+from itertools import islice
+from typing import Dict, FrozenSet, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from agentuity_agents.EchoMinder.memory_index import tokenize
+
+# =========================
+# 🧬 Near-Duplicate Detection (MinHash + LSH)
+# =========================
+HASH_SCHEME = "shake128-u32"  # token hash values: consecutive uint32s of a seeded SHAKE-128 digest
+TOKEN_CACHE_SIZE = 1 << 16  # memoized per-token hash vectors (vocabularies repeat a lot)
+BUCKET_SCAN_LIMIT = 64      # newest members read per shared bucket
+VERIFY_LIMIT = 8            # candidates compared exactly per lookup
+FALSE_NEGATIVE_WEIGHT = 0.8  # band choice: a missed duplicate costs more than a wasted comparison
+CATCH_UP_BATCH = 64         # queued memories indexed per catch_up step (~20 ms of MinHash work)
+
+
+def token_set(text: str) -> FrozenSet[str]:
+    return frozenset(tokenize(text))
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def collision_probability(similarity: float, bands: int, rows: int) -> float:
+    """Chance that two memories at `similarity` share at least one LSH bucket"""
+    return 1 - (1 - similarity ** rows) ** bands
+
+
+@lru_cache(maxsize=None)
+def lsh_params(threshold: float, num_perm: int, steps: int = 100) -> Tuple[int, int]:
+    """
+    (bands, rows) with bands * rows <= num_perm that minimize the weighted
+    area of false candidates below `threshold` and missed pairs above it
+    """
+    def area(bands: int, rows: int, low: float, high: float, missed: bool) -> float:
+        width = (high - low) / steps
+        total = 0.0
+        for i in range(steps):
+            p = collision_probability(low + (i + 0.5) * width, bands, rows)
+            total += (1 - p) if missed else p
+        return total * width
+
+    best, best_cost = (1, num_perm), float("inf")
+    for bands in range(1, num_perm + 1):
+        for rows in range(1, num_perm // bands + 1):
+            cost = (
+                (1 - FALSE_NEGATIVE_WEIGHT) * area(bands, rows, 0.0, threshold, missed=False)
+                + FALSE_NEGATIVE_WEIGHT * area(bands, rows, threshold, 1.0, missed=True)
+            )
+            if cost < best_cost:
+                best, best_cost = (bands, rows), cost
+    return best
+
+
+class NearDuplicateIndex:
+    """
+    Finds stored memories whose word sets have a Jaccard similarity of at
+    least `threshold` with a new memory, without scanning the layer.
+
+    Each memory gets a `num_perm`-value MinHash signature, split into bands
+    that are hashed into buckets (locality-sensitive hashing): similar
+    memories share a bucket with high probability. Bands and rows are derived
+    from the threshold (8 bands of 8 rows at 0.8: ~77% of pairs at 0.8 and
+    99% at 0.9 collide, 13% at 0.6). A lookup reads at most
+    BUCKET_SCAN_LIMIT of the newest members of each shared bucket and
+    compares only the VERIFY_LIMIT candidates sharing the most bands, so its
+    cost does not grow with the layer even when templated memories crowd a
+    bucket. Kept in sync by MemoryLayer, like semantic.VectorStore.
+
+    Memories handed over in bulk by `sync` (a layer being loaded) are only
+    queued: `catch_up` indexes them in small steps later, so loading a
+    layer does no MinHash work. Until the queue is drained, a near-duplicate
+    of a queued memory can still be stored once.
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 64, bands: Optional[int] = None, seed: int = 1):
+        if bands is None:
+            bands, rows = lsh_params(threshold, num_perm)
+        elif num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        else:
+            rows = num_perm // bands
+        self.threshold = threshold
+        self.seed = seed
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = rows
+        self._seed_bytes = seed.to_bytes(8, "little", signed=True)
+        self._digest_size = 4 * bands * rows
+        # Buckets are insertion-ordered dicts used as sets, so the newest members come first reversed
+        self._buckets: List[Dict[int, Dict[int, None]]] = [{} for _ in range(bands)]
+        self._keys: Dict[int, Tuple[int, ...]] = {}  # doc id -> its band keys
+        self._docs: Mapping[int, str] = {}  # the layer's own id -> memory map
+        self._pending_ids: List[int] = []  # doc ids queued by `sync`, indexed from `_cursor` on
+        self._pending_keys: Optional[Sequence[Sequence[int]]] = None  # their band keys, if precomputed
+        self._cursor = 0
+        self._token_hashes: Dict[str, Tuple[int, ...]] = {}
+        self._last_keys: Tuple[str, Tuple[int, ...]] = ("", ())  # find() then add() of the same text
+        self.lookups = 0
+        self.candidates = 0
+        self.compared = 0
+        self.duplicates = 0
+
+    def _hashes(self, token: str) -> Tuple[int, ...]:
+        """The token's value under every hash function (one digest instead of one hash each)"""
+        hashes = self._token_hashes.get(token)
+        if hashes is None:
+            if len(self._token_hashes) >= TOKEN_CACHE_SIZE:
+                self._token_hashes.clear()
+            digest = hashlib.shake_128(self._seed_bytes + token.encode("utf-8")).digest(self._digest_size)
+            hashes = tuple(array("I", digest))
+            self._token_hashes[token] = hashes
+        return hashes
+
+    def _text_keys(self, text: str, tokens: FrozenSet[str]) -> Tuple[int, ...]:
+        if self._last_keys[0] != text:
+            self._last_keys = (text, self._band_keys(tokens))
+        return self._last_keys[1]
+
+    def _band_keys(self, tokens: FrozenSet[str]) -> Tuple[int, ...]:
+        hashes = [self._hashes(token) for token in tokens]
+        signature = list(map(min, *hashes)) if len(hashes) > 1 else list(hashes[0])
+        return tuple(
+            hash(tuple(signature[band * self.rows:(band + 1) * self.rows]))
+            for band in range(self.bands)
+        )
+
+    # -------------------------
+    # Mutations (driven by MemoryLayer)
+    # -------------------------
+    def sync(self, docs: Mapping[int, str], keys: Optional[Sequence[Sequence[int]]] = None) -> None:
+        """
+        Queue every memory of `docs` for `catch_up`; precomputed band `keys`
+        (from export_keys, same order) skip the MinHash work
+        """
+        self.clear()
+        self._docs = docs
+        self._pending_ids = list(docs)
+        if keys is not None and len(keys) == len(self._pending_ids):
+            self._pending_keys = keys
+
+    @property
+    def pending(self) -> int:
+        """Memories queued by `sync` and not indexed yet"""
+        return len(self._pending_ids) - self._cursor
+
+    def catch_up(self, limit: int = CATCH_UP_BATCH) -> int:
+        """Index up to `limit` queued memories; returns how many are still queued"""
+        ids, queued_keys = self._pending_ids, self._pending_keys
+        end = min(self._cursor + limit, len(ids))
+        for i in range(self._cursor, end):
+            doc_id = ids[i]
+            memory = self._docs.get(doc_id)
+            if memory is None or doc_id in self._keys:
+                continue  # removed meanwhile
+            if queued_keys is None:
+                tokens = token_set(memory)
+                if tokens:
+                    self._insert(doc_id, self._band_keys(tokens))
+            else:
+                keys = tuple(queued_keys[i])
+                if any(keys):
+                    self._insert(doc_id, keys)
+        self._cursor = end
+        if end == len(ids):
+            self._pending_ids, self._pending_keys, self._cursor = [], None, 0
+        return self.pending
+
+    def export_keys(
+        self, doc_ids: Iterable[int], table: Optional[Mapping[int, Tuple[int, ...]]] = None
+    ) -> List[Tuple[int, ...]]:
+        """
+        Band keys of `doc_ids` in order (all zeros for memories without
+        words), read from `table` (a `key_table` copy) if given
+        """
+        empty = (0,) * self.bands
+        keys = self._keys if table is None else table
+        return [keys.get(doc_id, empty) for doc_id in doc_ids]
+
+    def key_table(self) -> Optional[Dict[int, Tuple[int, ...]]]:
+        """
+        A copy of the doc id → band keys map (queued keys included), for
+        `export_keys` on another thread; None while queued memories still
+        need their MinHash work
+        """
+        if self.pending and self._pending_keys is None:
+            return None
+        table = dict(self._keys)
+        ids, queued_keys = self._pending_ids, self._pending_keys
+        table.update((ids[i], tuple(queued_keys[i])) for i in range(self._cursor, len(ids)))
+        return table
+
+    def add(self, doc_id: int, text: str) -> None:
+        tokens = token_set(text)
+        if not tokens:
+            return
+        self._insert(doc_id, self._text_keys(text, tokens))
+
+    def _insert(self, doc_id: int, keys: Tuple[int, ...]) -> None:
+        self._keys[doc_id] = keys
+        for buckets, key in zip(self._buckets, keys):
+            buckets.setdefault(key, {})[doc_id] = None
+
+    def discard(self, doc_id: int) -> None:
+        keys = self._keys.pop(doc_id, None)
+        if keys is None:
+            return
+        for buckets, key in zip(self._buckets, keys):
+            bucket = buckets.get(key)
+            if bucket is not None:
+                bucket.pop(doc_id, None)
+                if not bucket:
+                    del buckets[key]
+
+    def clear(self) -> None:
+        for buckets in self._buckets:
+            buckets.clear()
+        self._keys.clear()
+        self._pending_ids, self._pending_keys, self._cursor = [], None, 0
+
+    # -------------------------
+    # Query
+    # -------------------------
+    def find(self, text: str) -> Optional[int]:
+        """Doc id of the most similar stored memory at or above the threshold, if any"""
+        self.lookups += 1
+        tokens = token_set(text)
+        if not tokens:
+            return None
+        shared: Counter = Counter()
+        for buckets, key in zip(self._buckets, self._text_keys(text, tokens)):
+            bucket = buckets.get(key)
+            if bucket:
+                shared.update(islice(reversed(bucket), BUCKET_SCAN_LIMIT))
+        self.candidates += len(shared)
+        # Most shared bands first (the likeliest near-duplicates); ties keep the
+        # counting order, which reads each bucket newest first
+        best_id, best_score = None, self.threshold
+        for doc_id, _ in shared.most_common(VERIFY_LIMIT):
+            memory = self._docs.get(doc_id)
+            if memory is None:
+                continue
+            self.compared += 1
+            score = jaccard(tokens, token_set(memory))
+            if score >= best_score and (best_id is None or score > best_score):
+                best_id, best_score = doc_id, score
+        if best_id is not None:
+            self.duplicates += 1
+        return best_id
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "lookups": self.lookups,
+            "candidates": self.candidates,
+            "compared": self.compared,
+            "duplicates": self.duplicates,
+            "indexed": len(self._keys),
+            "pending": self.pending,
+        }
@@ -0,0 +1,88 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Optional
+
+# =========================
+# 📥 Background Ingest Queue (write-behind)
+# =========================
+IngestJob = Callable[[], Awaitable[None]]
+
+
+class IngestQueue:
+    """
+    Bounded queue of memory-ingest jobs (summaries, merges) run by a small pool
+    of background workers, so requests can respond before summarization ends.
+
+    `submit` waits while the queue is full, which pushes back on callers when
+    the upstream LLM cannot keep up. Jobs sharing a key (a namespace) run one at
+    a time in submission order; jobs for different keys run concurrently.
+    """
+
+    def __init__(self, maxsize: int = 256, workers: int = 4):
+        self.maxsize = maxsize
+        self.workers = workers
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._lock_users: Dict[str, int] = {}
+        self.submitted = 0
+        self.processed = 0
+        self.failed = 0
+
+    def _ensure_started(self) -> asyncio.Queue:
+        # Created lazily so the queue binds to the running event loop
+        if self._queue is None:
+            self._queue = asyncio.Queue(self.maxsize)
+        self._tasks = [task for task in self._tasks if not task.done()]
+        while len(self._tasks) < self.workers:
+            self._tasks.append(asyncio.get_running_loop().create_task(self._worker()))
+        return self._queue
+
+    async def submit(self, key: str, job: IngestJob) -> None:
+        """Queue a job; waits (backpressure) while the queue is full"""
+        queue = self._ensure_started()
+        self._lock_users[key] = self._lock_users.get(key, 0) + 1
+        self.submitted += 1
+        await queue.put((key, job))
+
+    async def _worker(self) -> None:
+        while True:
+            key, job = await self._queue.get()
+            lock = self._locks.setdefault(key, asyncio.Lock())
+            try:
+                async with lock:
+                    await job()
+                self.processed += 1
+            except Exception as e:
+                self.failed += 1
+                print(f"[EchoMinderNew] Background ingest failed for {key!r}: {e}")
+            finally:
+                users = self._lock_users.get(key, 1) - 1
+                if users > 0:
+                    self._lock_users[key] = users
+                else:
+                    self._lock_users.pop(key, None)
+                    self._locks.pop(key, None)
+                self._queue.task_done()
+
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def drain(self) -> None:
+        """Wait until every queued job has finished (tests, shutdown)"""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def close(self) -> None:
+        await self.drain()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending": self.pending(),
+            "submitted": self.submitted,
+            "processed": self.processed,
+            "failed": self.failed,
+        }
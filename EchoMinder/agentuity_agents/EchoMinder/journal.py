@@ -0,0 +1,330 @@
+import atexit
+import json
+import os
+import threading
+import time
+import weakref
+from typing import Callable, List, Optional, Tuple, TypeVar
+
+# =========================
+# 📓 Append-Only Long-Term Journal
+# =========================
+# Returns (memories, levels) of the full long-term store
+SnapshotSource = Callable[[], Tuple[List[str], List[int]]]
+T = TypeVar("T")
+
+# Journals with an open file; fsynced by the shared flusher thread and closed (flushed +
+# fsynced) at interpreter exit
+_open_journals: "weakref.WeakSet[LongTermJournal]" = weakref.WeakSet()
+_journals_lock = threading.Lock()
+_flusher: Optional[threading.Thread] = None
+FLUSHER_IDLE_INTERVAL = 1.0  # flusher wake-up period while no open journal has an fsync interval
+
+
+def _register(journal: "LongTermJournal") -> None:
+    """Track an open journal and make sure the one flusher thread of the process runs"""
+    global _flusher
+    with _journals_lock:
+        _open_journals.add(journal)
+        if journal.fsync_interval <= 0 or (_flusher is not None and _flusher.is_alive()):
+            return
+        flusher = threading.Thread(target=_flush_loop, name="journal-flusher", daemon=True)
+        try:
+            flusher.start()
+        except RuntimeError:
+            return  # interpreter exit: close() does the last fsync
+        _flusher = flusher
+
+
+def _unregister(journal: "LongTermJournal") -> None:
+    with _journals_lock:
+        _open_journals.discard(journal)
+
+
+def _flush_loop() -> None:
+    """fsync every open journal whose `fsync_interval` has passed since its last sync"""
+    while True:
+        with _journals_lock:
+            journals = [journal for journal in _open_journals if journal.fsync_interval > 0]
+        time.sleep(min((journal.fsync_interval for journal in journals), default=FLUSHER_IDLE_INTERVAL))
+        for journal in journals:
+            journal.flush_if_due()
+
+
+@atexit.register
+def _close_open_journals() -> None:
+    with _journals_lock:
+        journals = list(_open_journals)
+    for journal in journals:
+        try:
+            journal.close()
+        except Exception as e:
+            print(f"[EchoMinderNew] Failed to close journal {journal.journal_path}: {e}")
+
+
+class LongTermJournal:
+    """
+    Snapshot + append-only JSONL journal for long-term memory.
+
+    Every stored memory is one journal line tagged with a sequence number, so a
+    write costs O(1) instead of re-serializing the whole store. Every line is
+    flushed to the OS as it is written (a process exit loses nothing) and
+    fsynced in batches: at most `fsync_every` writes or `fsync_interval`
+    seconds can be lost on a power failure or kernel crash (interval fsyncs
+    come from one flusher thread shared by every journal of the process).
+    Once `compact_every` lines have accumulated the journal is rotated and a
+    background thread folds it into the snapshot.
+
+    Snapshot: {"seq": N, "memories": [...], "levels": [...]} (a plain JSON list
+    is also accepted). Journal ops are "add" and "compact" (atomically replace
+    a batch of memories by their higher-level summary).
+    Replay skips journal lines whose seq is already covered by the snapshot, so
+    a crash at any point of a compaction never loses or duplicates memories.
+    """
+
+    def __init__(
+        self,
+        snapshot_path: str,
+        fsync_every: int = 32,
+        fsync_interval: float = 1.0,
+        compact_every: int = 1000,
+    ):
+        self.snapshot_path = snapshot_path
+        base, _ = os.path.splitext(snapshot_path)
+        self.journal_path = f"{base}.journal.jsonl"
+        self.rotated_path = f"{base}.journal.1.jsonl"
+        self.fsync_every = max(1, fsync_every)
+        self.fsync_interval = fsync_interval
+        self.compact_every = compact_every
+
+        self._lock = threading.Lock()
+        self._file = None
+        self._seq = 0
+        self.levels: List[int] = []  # compaction level of each loaded memory
+        self._journal_lines = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._compaction: Optional[threading.Thread] = None
+
+    # -------------------------
+    # Load / replay
+    # -------------------------
+    def _read_snapshot(self):
+        if not os.path.exists(self.snapshot_path):
+            return 0, [], []
+        with open(self.snapshot_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, list):
+            return 0, data, [0] * len(data)
+        memories = data.get("memories", [])
+        levels = data.get("levels") or [0] * len(memories)
+        return data.get("seq", 0), memories, levels
+
+    def _replay(self, path: str, snapshot_seq: int, memories: List[str], levels: List[int]) -> int:
+        lines = 0
+        if not os.path.exists(path):
+            return lines
+        good_offset = 0
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("unterminated line")
+                    record = json.loads(line)
+                except ValueError:
+                    break  # torn tail from a crash mid-write
+                good_offset += len(line)
+                lines += 1
+                self._seq = max(self._seq, record["seq"])
+                if record["seq"] <= snapshot_seq:
+                    continue
+                if record["op"] == "add":
+                    memories.append(record["text"])
+                    levels.append(record.get("level", 0))
+                elif record["op"] == "compact":
+                    for old in record["remove"]:
+                        if old in memories:
+                            index = memories.index(old)
+                            del memories[index]
+                            del levels[index]
+                    memories.append(record["text"])
+                    levels.append(record["level"])
+        if good_offset < os.path.getsize(path):
+            # Drop the torn tail so later appends start on a clean line
+            with open(path, "r+b") as f:
+                f.truncate(good_offset)
+        return lines
+
+    def load(self) -> List[str]:
+        """Return snapshot memories plus every journaled write after it"""
+        with self._lock:
+            snapshot_seq, memories, levels = self._read_snapshot()
+            self._seq = snapshot_seq
+            self._journal_lines = self._replay(self.rotated_path, snapshot_seq, memories, levels)
+            self._journal_lines += self._replay(self.journal_path, snapshot_seq, memories, levels)
+            self._open_journal()
+        self.levels = levels
+        return memories
+
+    def warm_state(self) -> dict:
+        with self._lock:
+            return {"seq": self._seq, "journal_lines": self._journal_lines}
+
+    def restore_warm_state(self, state: dict, levels: List[int]) -> None:
+        """Resume from a warm-start snapshot taken with `warm_state` (instead of `load`)"""
+        with self._lock:
+            self._seq = state["seq"]
+            self._journal_lines = state.get("journal_lines", 0)
+        self.levels = levels
+
+    def _open_journal(self) -> None:
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.journal_path), exist_ok=True)
+            self._file = open(self.journal_path, "a", encoding="utf-8")
+            _register(self)
+
+    # -------------------------
+    # Writes
+    # -------------------------
+    def append(self, memory: str, snapshot_source: SnapshotSource, level: int = 0) -> None:
+        """Journal one memory; `snapshot_source` returns the full store for compaction"""
+        record = {"op": "add", "text": memory}
+        if level:
+            record["level"] = level
+        self._write(record, snapshot_source)
+
+    def append_compaction(
+        self, removed: List[str], summary: str, level: int, snapshot_source: SnapshotSource
+    ) -> None:
+        """Journal the replacement of `removed` by `summary` as one atomic record"""
+        self._write(
+            {"op": "compact", "remove": removed, "text": summary, "level": level},
+            snapshot_source,
+        )
+
+    def append_many(self, memories: List[str], snapshot_source: SnapshotSource) -> None:
+        """Journal a batch of memories (e.g. a bulk import) with a single flush"""
+        if memories:
+            self._write_records([{"op": "add", "text": memory} for memory in memories], snapshot_source)
+
+    def _write(self, record: dict, snapshot_source: SnapshotSource) -> None:
+        self._write_records([record], snapshot_source)
+
+    def _write_records(self, records: List[dict], snapshot_source: SnapshotSource) -> None:
+        with self._lock:
+            self._open_journal()
+            lines = []
+            for record in records:
+                self._seq += 1
+                record["seq"] = self._seq
+                lines.append(json.dumps(record, ensure_ascii=False) + "\n")
+            self._file.write("".join(lines))
+            self._file.flush()  # into the OS page cache; only the fsync is batched
+            self._journal_lines += len(records)
+            self._unsynced += len(records)
+            if self._unsynced >= self.fsync_every:
+                self._sync()
+            if self._journal_lines >= self.compact_every and self._compaction is None:
+                self._start_compaction(snapshot_source())
+
+    def _sync(self) -> None:
+        if self._file is not None and self._unsynced:
+            os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def flush_if_due(self) -> None:
+        """Called by the shared flusher thread: fsync once `fsync_interval` has passed"""
+        with self._lock:
+            if self._unsynced and time.monotonic() - self._last_sync >= self.fsync_interval:
+                self._sync()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._sync()
+
+    # -------------------------
+    # Compaction
+    # -------------------------
+    def _start_compaction(self, snapshot: Tuple[List[str], List[int]], background: bool = True) -> None:
+        """Rotate the journal and write the snapshot (off the caller's thread if `background`)"""
+        self._sync()
+        self._file.close()
+        self._file = None
+        if os.path.exists(self.rotated_path):
+            # A previous compaction died before finishing; keep its lines
+            with open(self.rotated_path, "a", encoding="utf-8") as dst, \
+                    open(self.journal_path, "r", encoding="utf-8") as src:
+                dst.write(src.read())
+            os.remove(self.journal_path)
+        else:
+            os.replace(self.journal_path, self.rotated_path)
+        self._open_journal()
+        self._journal_lines = 0
+        seq = self._seq
+        if not background:
+            self._write_snapshot(seq, list(snapshot[0]), list(snapshot[1]))
+            return
+        self._compaction = threading.Thread(
+            target=self._write_snapshot, args=(seq, list(snapshot[0]), list(snapshot[1])), daemon=True
+        )
+        self._compaction.start()
+
+    def _write_snapshot(self, seq: int, memories: List[str], levels: List[int]) -> None:
+        try:
+            tmp_path = f"{self.snapshot_path}.tmp"
+            snapshot = {"seq": seq, "memories": memories}
+            if any(levels):
+                snapshot["levels"] = levels
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+            if os.path.exists(self.rotated_path):
+                os.remove(self.rotated_path)
+        except Exception as e:
+            print(f"[EchoMinderNew] Long-term compaction failed: {e}")
+        finally:
+            self._compaction = None
+
+    def compact(self, snapshot: Tuple[List[str], List[int]]) -> None:
+        """Synchronously fold everything into the snapshot (e.g. at shutdown)"""
+        self.wait_for_compaction()
+        with self._lock:
+            self._open_journal()
+            self._start_compaction(snapshot, background=False)
+
+    def compact_later(self, snapshot: Tuple[List[str], List[int]]) -> Optional[int]:
+        """
+        Rotate the journal now and fold it into `snapshot` on a background
+        thread. Returns the seq the snapshot covers, or None (nothing done)
+        while an earlier compaction is still running
+        """
+        with self._lock:
+            if self._compaction is not None:
+                return None
+            self._open_journal()
+            self._start_compaction(snapshot)
+            return self._seq
+
+    def unchanged_since(self, seq: int, probe: Callable[[], T]) -> Optional[T]:
+        """`probe()` if nothing was journaled after `seq` (no write can interleave), else None"""
+        with self._lock:
+            if self._seq != seq or self._compaction is not None:
+                return None
+            return probe()
+
+    def wait_for_compaction(self) -> None:
+        thread = self._compaction
+        if thread is not None:
+            thread.join()
+
+    def close(self) -> None:
+        self.wait_for_compaction()
+        with self._lock:
+            self._sync()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        _unregister(self)
@@ -0,0 +1,726 @@
+import math
+import re
+import sys
+import time
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from heapq import merge
+from collections import Counter
+from collections.abc import Mapping
+from itertools import chain
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+# =========================
+# 🔎 Incremental Inverted Index
+# =========================
+TOKEN_PATTERN = re.compile(r"\w+")
+PREFIX_MATCH_WEIGHT = 0.5  # relevance of "python" for a memory that only says "pythonic"
+# Ranked relevance only expands keywords of at least MIN_PREFIX_LENGTH characters, to at most
+# MAX_PREFIX_EXPANSIONS longer words each (nearest in vocabulary order): "w1" would otherwise
+# pull in the posting lists of every "w1…" word of a large layer
+MIN_PREFIX_LENGTH = 3
+MAX_PREFIX_EXPANSIONS = 16
+MIN_IDF = 0.05  # keywords in (nearly) every memory of a layer don't affect its ranking
+PROBE_RATIO = 16  # intersect by bisecting a posting list this many times longer than the others
+ENTRY_OVERHEAD = 48  # per-memory arena columns (slot, id, level, created, hits, accessed) + postings entry
+
+# (matching doc ids: a set or an ascending posting list, exact-match posting list, prefix posting lists)
+SelectiveKeyword = Tuple[Iterable[int], "array[int]", List["array[int]"]]
+# (sorted vocabulary, end offset of each token's postings, concatenated postings as layer positions)
+PostingsImage = Tuple[List[str], "array[int]", "array[int]"]
+
+
+def estimate_bytes(memory: str) -> int:
+    """Rough resident size of one indexed memory (text + its share of the index)"""
+    return 2 * sys.getsizeof(memory) + ENTRY_OVERHEAD
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class LayerDocs(Mapping):
+    """Read-only doc id → memory view of a layer (what VectorStore / NearDuplicateIndex sync against)"""
+
+    __slots__ = ("_layer",)
+
+    def __init__(self, layer: "MemoryLayer"):
+        self._layer = layer
+
+    def __getitem__(self, doc_id: int) -> str:
+        slot = self._layer._slot(doc_id)
+        if slot < 0:
+            raise KeyError(doc_id)
+        return self._layer._texts[slot]
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._layer.doc_ids())
+
+    def __len__(self) -> int:
+        return len(self._layer)
+
+
+class MemoryLayer:
+    """
+    A list-like memory layer stored as a column arena, with a token →
+    posting-list index kept in sync with every append, pop and clear.
+
+    Each memory occupies one slot: its text in a plain list and its id,
+    compaction level, creation time, recall count and last recall time in
+    parallel typed arrays
+    (no per-memory objects besides the string). Ids increase monotonically, so
+    the id column stays sorted (id → slot is a bisect) and posting lists are
+    sorted by insertion order for free. Removing a memory only empties its
+    slot; pops from the front advance a head cursor, so the bounded short- and
+    mid-term layers behave as ring buffers. Slots are re-based in one pass
+    once empty ones outnumber live ones, and removed ids are skipped lazily in
+    the postings until those are rebuilt the same way.
+    """
+
+    COLUMNS = ("_ids", "_level_column", "_created", "_hits", "_accessed")
+
+    def __init__(self, items: Iterable[str] = ()):
+        self._texts: List[Optional[str]] = []  # None marks an emptied slot
+        self._ids = array("q")
+        self._level_column = array("H")  # compaction level
+        self._created = array("d")  # time.time() when appended (or loaded)
+        self._hits = array("I")  # times recalled into a prompt
+        self._accessed = array("d")  # time.time() of the last recall, 0 if never
+        self._head = 0  # first slot that may be live
+        self._live = 0
+        self._postings: Dict[str, "array[int]"] = {}  # token -> sorted doc ids (int64)
+        self._vocab: List[str] = []  # sorted, for prefix lookups
+        self._next_id = 0
+        self._dead = 0  # removed ids still referenced by the postings
+        self._indexed = True  # False after a restore() without postings: they are built on first search
+        self._docs = LayerDocs(self)
+        self.nbytes = 0  # estimated resident size, see estimate_bytes
+        self.version = 0  # bumped on every change, for caches derived from the layer
+        self.vectors = None  # optional semantic.VectorStore kept in sync
+        self.duplicates = None  # optional dedup.NearDuplicateIndex kept in sync
+        self.extend(items)
+
+    # -------------------------
+    # List-like interface
+    # -------------------------
+    def __len__(self) -> int:
+        return self._live
+
+    def __iter__(self) -> Iterator[str]:
+        texts = self._texts
+        return (texts[slot] for slot in range(self._head, len(texts)) if texts[slot] is not None)
+
+    def __contains__(self, memory: object) -> bool:
+        return memory is not None and memory in self._texts
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.start, index.stop, index.step
+            # Tail slices (memories[-n:]) are the hot path — walk back from the end
+            if start is not None and start < 0 and stop is None and step is None:
+                tail = []
+                texts = self._texts
+                for slot in range(len(texts) - 1, self._head - 1, -1):
+                    if len(tail) >= -start:
+                        break
+                    if texts[slot] is not None:
+                        tail.append(texts[slot])
+                tail.reverse()
+                return tail
+            return self.copy()[index]
+        return self.copy()[index]
+
+    def __repr__(self) -> str:
+        return f"MemoryLayer({self.copy()!r})"
+
+    def _push(self, memory: str, level: int, created: float) -> int:
+        doc_id = self._next_id
+        self._next_id += 1
+        self._texts.append(memory)
+        self._ids.append(doc_id)
+        self._level_column.append(level)
+        self._created.append(created)
+        self._hits.append(0)
+        self._accessed.append(0.0)
+        self._live += 1
+        self.nbytes += estimate_bytes(memory)
+        return doc_id
+
+    def append(self, memory: str, level: int = 0) -> int:
+        doc_id = self._push(memory, level, time.time())
+        self.version += 1
+        if self._indexed:
+            self._index(doc_id, memory)
+        if self.vectors is not None:
+            self.vectors.add(doc_id, memory)
+        if self.duplicates is not None:
+            self.duplicates.add(doc_id, memory)
+        return doc_id
+
+    def extend(self, memories: Iterable[str]) -> None:
+        for memory in memories:
+            self.append(memory)
+
+    def _dense(self) -> bool:
+        """No emptied slot after the head: columns can be sliced instead of walked slot by slot"""
+        return len(self._texts) - self._head == self._live
+
+    def _live_slots(self) -> Iterator[int]:
+        texts = self._texts
+        return (slot for slot in range(self._head, len(texts)) if texts[slot] is not None)
+
+    def pop(self, index: int = -1) -> str:
+        if not self._live:
+            raise IndexError("pop from empty MemoryLayer")
+        if index == 0:
+            slot = next(self._live_slots())
+        elif index == -1:
+            slot = next(s for s in range(len(self._texts) - 1, self._head - 1, -1) if self._texts[s] is not None)
+        else:
+            slot = list(self._live_slots())[index]
+        return self._remove_slot(slot)
+
+    def _slot(self, doc_id: int) -> int:
+        """Slot of a live doc id, or -1"""
+        slot = bisect_left(self._ids, doc_id, self._head)
+        if slot < len(self._ids) and self._ids[slot] == doc_id and self._texts[slot] is not None:
+            return slot
+        return -1
+
+    def _remove(self, doc_id: int) -> str:
+        slot = self._slot(doc_id)
+        if slot < 0:
+            raise KeyError(doc_id)
+        return self._remove_slot(slot)
+
+    def _remove_slot(self, slot: int) -> str:
+        memory, doc_id = self._texts[slot], self._ids[slot]
+        self._texts[slot] = None
+        self._live -= 1
+        if slot == self._head:
+            while self._head < len(self._texts) and self._texts[self._head] is None:
+                self._head += 1
+        self.nbytes -= estimate_bytes(memory)
+        self.version += 1
+        if self.vectors is not None:
+            self.vectors.discard(doc_id)
+        if self.duplicates is not None:
+            self.duplicates.discard(doc_id)
+        self._dead += 1
+        if self._indexed and self._dead > self._live:
+            self._rebuild()
+        if len(self._texts) > 2 * self._live + 16:
+            self._compact()
+        return memory
+
+    def _compact(self) -> None:
+        """Re-base the arena onto its live slots (ids and their order are kept)"""
+        keep = list(self._live_slots())
+        self._texts = [self._texts[slot] for slot in keep]
+        for name in self.COLUMNS:
+            column = getattr(self, name)
+            setattr(self, name, array(column.typecode, [column[slot] for slot in keep]))
+        self._head = 0
+
+    def remove_ids(self, doc_ids: Iterable[int]) -> None:
+        for doc_id in doc_ids:
+            slot = self._slot(doc_id)
+            if slot >= 0:
+                self._remove_slot(slot)
+
+    def clear(self) -> None:
+        self._texts = []
+        for name in self.COLUMNS:
+            setattr(self, name, array(getattr(self, name).typecode))
+        self._head = 0
+        self._live = 0
+        self._postings.clear()
+        self._vocab.clear()
+        self._dead = 0
+        self._indexed = True
+        self.nbytes = 0
+        self.version += 1
+        if self.vectors is not None:
+            self.vectors.clear()
+        if self.duplicates is not None:
+            self.duplicates.clear()
+
+    def replace(self, memories: Iterable[str], levels: Iterable[int] = (), created: Iterable[float] = ()) -> None:
+        """
+        Replace the whole layer (used when reloading from storage). An attached
+        near-duplicate index queues the memories instead of hashing each one
+        """
+        duplicates, self.duplicates = self.duplicates, None
+        try:
+            self.clear()
+            self.extend(memories)
+        finally:
+            self.duplicates = duplicates
+        for slot, level in zip(range(len(self._texts)), levels):
+            self._level_column[slot] = level
+        for slot, timestamp in zip(range(len(self._texts)), created):
+            self._created[slot] = timestamp
+        if duplicates is not None:
+            duplicates.sync(self._docs)
+
+    def restore(
+        self,
+        memories: Iterable[str],
+        levels: Iterable[int] = (),
+        duplicate_keys=None,
+        created: Iterable[float] = (),
+        hits: Iterable[int] = (),
+        accessed: Iterable[float] = (),
+        postings: Optional[PostingsImage] = None,
+        nbytes: Optional[int] = None,
+    ) -> None:
+        """
+        Replace the whole layer from a warm-start snapshot. Columns are filled
+        in bulk and `postings` (from export_postings) are adopted as the
+        inverted index; without them it is built on the first search.
+        `nbytes` is the size estimate saved with them (summed here if None). An
+        attached near-duplicate index queues the snapshot's band keys instead
+        of recomputing them.
+        """
+        self.clear()
+        texts = list(memories)
+        count = len(texts)
+        base = self._next_id
+        self._texts = texts
+        self._ids = array("q", range(base, base + count))
+        self._level_column = self._column("H", levels, count, 0)
+        self._created = self._column("d", created, count, time.time())
+        self._hits = self._column("I", hits, count, 0)
+        self._accessed = self._column("d", accessed, count, 0.0)
+        self._live = count
+        self._next_id = base + count
+        self.nbytes = sum(map(estimate_bytes, texts)) if nbytes is None else nbytes
+        if postings is not None and base == 0:
+            vocab, ends, positions = postings  # positions are slots, which equal doc ids from base 0
+            self._vocab = vocab
+            self._postings = {
+                token: positions[start:end] for token, start, end in zip(vocab, chain((0,), ends), ends)
+            }
+        else:
+            self._indexed = False
+        self.version += 1
+        if self.vectors is not None:
+            self.vectors.sync(self._docs)
+        if self.duplicates is not None:
+            self.duplicates.sync(self._docs, duplicate_keys)
+
+    @staticmethod
+    def _column(typecode: str, values: Iterable, count: int, default) -> "array":
+        """A `count`-long typed column from `values` (padded with `default`)"""
+        column = array(typecode, values)
+        if len(column) < count:
+            column.extend(array(typecode, [default]) * (count - len(column)))
+        del column[count:]
+        return column
+
+    def copy(self) -> List[str]:
+        return self._texts[self._head:] if self._dense() else list(self)
+
+    # -------------------------
+    # Index maintenance / lookup
+    # -------------------------
+    def items(self) -> Iterator[Tuple[int, str]]:
+        """Iterate (doc id, memory) pairs in insertion order"""
+        return ((self._ids[slot], self._texts[slot]) for slot in self._live_slots())
+
+    def doc_ids(self) -> List[int]:
+        """Doc id of every memory, in layer order"""
+        if self._dense():
+            return self._ids[self._head:].tolist()
+        return [self._ids[slot] for slot in self._live_slots()]
+
+    def get(self, doc_id: int) -> Optional[str]:
+        slot = self._slot(doc_id)
+        return self._texts[slot] if slot >= 0 else None
+
+    def level(self, doc_id: int) -> int:
+        slot = self._slot(doc_id)
+        return self._level_column[slot] if slot >= 0 else 0
+
+    def levels(self) -> List[int]:
+        """Compaction level of every memory, in layer order"""
+        if self._dense():
+            return self._level_column[self._head:].tolist()
+        return [self._level_column[slot] for slot in self._live_slots()]
+
+    def created(self) -> List[float]:
+        """Creation time of every memory, in layer order"""
+        if self._dense():
+            return self._created[self._head:].tolist()
+        return [self._created[slot] for slot in self._live_slots()]
+
+    def access_stats(self) -> Tuple[List[int], List[float]]:
+        """Recall counts and last recall times of every memory, in layer order"""
+        if self._dense():
+            return self._hits[self._head:].tolist(), self._accessed[self._head:].tolist()
+        slots = list(self._live_slots())
+        return [self._hits[slot] for slot in slots], [self._accessed[slot] for slot in slots]
+
+    def restore_access(self, hits: Iterable[int], accessed: Iterable[float]) -> None:
+        """Adopt recall stats saved by access_stats (e.g. from a warm-start snapshot)"""
+        slots = list(self._live_slots())
+        for slot, count in zip(slots, hits):
+            self._hits[slot] = count
+        for slot, timestamp in zip(slots, accessed):
+            self._accessed[slot] = timestamp
+
+    def touch(self, doc_ids: Iterable[int], now: Optional[float] = None) -> None:
+        """
+        Record that memories were recalled into a prompt. Not a content change,
+        so the version (and caches keyed on it) stays as is.
+        """
+        now = time.time() if now is None else now
+        for doc_id in doc_ids:
+            slot = self._slot(doc_id)
+            if slot >= 0:
+                self._hits[slot] += 1
+                self._accessed[slot] = now
+
+    def signals(self, doc_ids: Iterable[int]) -> List[Tuple[int, str, float, int, float]]:
+        """(doc id, memory, created, hits, last access) of the live `doc_ids`, for ranking"""
+        rows = []
+        for doc_id in doc_ids:
+            slot = self._slot(doc_id)
+            if slot >= 0:
+                rows.append((doc_id, self._texts[slot], self._created[slot], self._hits[slot], self._accessed[slot]))
+        return rows
+
+    def entries_at_level(self, level: int) -> List[Tuple[int, str]]:
+        """(doc id, memory) pairs of one compaction level, oldest first"""
+        return [
+            (self._ids[slot], self._texts[slot]) for slot in self._live_slots()
+            if self._level_column[slot] == level
+        ]
+
+    def footprint(self) -> Dict[str, int]:
+        """Measured resident bytes of the layer: texts, arena columns and inverted index"""
+        text_bytes = sum(sys.getsizeof(memory) for memory in self)
+        column_bytes = sys.getsizeof(self._texts) + sum(
+            column.buffer_info()[1] * column.itemsize
+            for column in (getattr(self, name) for name in self.COLUMNS)
+        )
+        index_bytes = sys.getsizeof(self._postings) + sys.getsizeof(self._vocab) + sum(
+            sys.getsizeof(token) + sys.getsizeof(postings) for token, postings in self._postings.items()
+        )
+        return {
+            "count": self._live,
+            "slots": len(self._texts),
+            "text_bytes": text_bytes,
+            "column_bytes": column_bytes,
+            "index_bytes": index_bytes,
+            "total_bytes": text_bytes + column_bytes + index_bytes,
+        }
+
+    def postings_table(self) -> Optional[Dict[str, "array[int]"]]:
+        """
+        A shallow copy of the token → posting list map, for `export_postings`
+        on another thread (None while the index is deferred). Posting lists
+        only ever get newer ids appended, so they can be cut back to a copy of
+        `doc_ids` taken at the same time
+        """
+        return dict(self._postings) if self._indexed else None
+
+    @staticmethod
+    def export_postings(table: Dict[str, "array[int]"], doc_ids: List[int]) -> PostingsImage:
+        """
+        `table` (from postings_table) as `restore` adopts it: sorted
+        vocabulary, end offset of each token's list and the concatenated
+        lists, with each doc id replaced by its position in `doc_ids` (ids
+        no longer in the layer are dropped)
+        """
+        vocab = sorted(table)
+        ends, positions = array("Q"), array("q")
+        contiguous = not doc_ids or doc_ids[-1] - doc_ids[0] + 1 == len(doc_ids)
+        slots = None if contiguous else {doc_id: slot for slot, doc_id in enumerate(doc_ids)}
+        first, last = (doc_ids[0], doc_ids[-1]) if doc_ids else (0, -1)
+        for token in vocab:
+            postings = table[token]
+            if slots is not None:
+                positions.extend(slots[doc_id] for doc_id in postings if doc_id in slots)
+            else:
+                live = postings[bisect_left(postings, first):bisect_right(postings, last)]
+                positions.extend(live if not first else (doc_id - first for doc_id in live))
+            ends.append(len(positions))
+        return vocab, ends, positions
+
+    def attach_vectors(self, vectors) -> None:
+        """Keep a vector store in sync with this layer, embedding what is missing"""
+        self.vectors = vectors
+        vectors.sync(self._docs)
+
+    def attach_duplicates(self, index, keys=None) -> None:
+        """Keep a near-duplicate index in sync with this layer (`keys`: precomputed band keys)"""
+        self.duplicates = index
+        index.sync(self._docs, keys)
+
+    def find_near_duplicate(self, memory: str) -> Optional[int]:
+        """Doc id of a stored near-duplicate of `memory` (None without a dedup index)"""
+        if self.duplicates is None:
+            return None
+        return self.duplicates.find(memory)
+
+    def _index(self, doc_id: int, memory: str) -> None:
+        for token in set(tokenize(memory)):
+            postings = self._postings.get(token)
+            if postings is None:
+                self._postings[token] = array("q", (doc_id,))
+                insort(self._vocab, token)
+            else:
+                postings.append(doc_id)
+
+    def _rebuild(self) -> None:
+        """Drop dead ids from the postings, keeping doc ids stable"""
+        self._postings.clear()
+        self._vocab.clear()
+        self._dead = 0
+        for doc_id, memory in self.items():
+            self._index(doc_id, memory)
+
+    def _matching_postings(self, keyword: str, max_expansions: Optional[int] = None) -> List["array[int]"]:
+        """
+        Posting lists of every indexed token that starts with the keyword
+        (the keyword itself and at most `max_expansions` longer tokens)
+        """
+        if not self._indexed:
+            self._rebuild()
+            self._indexed = True
+        lists = []
+        i = bisect_left(self._vocab, keyword)
+        end = len(self._vocab)
+        if max_expansions is not None:
+            end = min(end, i + max_expansions + (i < end and self._vocab[i] == keyword))
+        while i < end and self._vocab[i].startswith(keyword):
+            lists.append(self._postings[self._vocab[i]])
+            i += 1
+        return lists
+
+    def relevance(self, keywords: Iterable[str], max_df: float = 0.1, limit: Optional[int] = None) -> Dict[int, float]:
+        """
+        Candidate doc ids with a BM25-style idf-weighted match score: each
+        keyword adds log(1 + (N - df + 0.5) / (df + 0.5)) to the memories
+        containing it as a word, and PREFIX_MATCH_WEIGHT of that to the ones
+        only containing a longer word starting with it. Keywords shorter than
+        MIN_PREFIX_LENGTH only match whole words, longer ones match at most
+        MAX_PREFIX_EXPANSIONS longer words, so the work per keyword is bounded.
+
+        Keywords found in more than `max_df` of the layer (e.g. "user") add
+        little but would make every memory a candidate, so they only score
+        the candidates the selective keywords found (a bisect per posting
+        list), unless every keyword is that common. With `limit`, only the
+        `limit` best of those candidates (newest first among ties) are found
+        and scored further, so the cost barely grows with the matches.
+        """
+        total = self._live
+        if not total:
+            return {}
+        selective, common = [], []
+        for keyword in set(keywords):
+            if keyword:
+                keyword = keyword.lower()
+                expansions = MAX_PREFIX_EXPANSIONS if len(keyword) >= MIN_PREFIX_LENGTH else 0
+                lists = self._matching_postings(keyword, expansions)
+                if not lists:
+                    continue
+                exact = self._postings.get(keyword, ())
+                if max(map(len, lists)) > max_df * total:  # df is at least the longest list: skip the union
+                    common.append((lists, exact))
+                    continue
+                docs = set().union(*lists) if len(lists) > 1 else lists[0]
+                if len(docs) > max_df * total:
+                    common.append((lists, exact))
+                else:
+                    selective.append((docs, exact, lists))
+        if not selective:
+            selective = [(set().union(*lists) if len(lists) > 1 else lists[0], exact, lists) for lists, exact in common]
+            common = []
+        if not selective:
+            return {}
+
+        if limit is not None:
+            scores = self._best_matches(selective, total, limit)
+        else:
+            scores = self._all_matches(selective, total)
+        candidates = set(scores)
+        for lists, exact in common:
+            idf = self._idf(sum(map(len, lists)), total)  # df upper bound, so a lower-bound idf
+            if idf < MIN_IDF:
+                continue  # in (nearly) every memory
+            matched: Dict[int, float] = {}
+            for postings in lists:
+                weight = idf if postings is exact else idf * PREFIX_MATCH_WEIGHT
+                for doc_id in self._intersect(candidates, postings):
+                    if matched.get(doc_id, 0.0) < weight:
+                        matched[doc_id] = weight
+            for doc_id, weight in matched.items():
+                scores[doc_id] += weight
+        return scores
+
+    def _all_matches(self, selective: List[SelectiveKeyword], total: int) -> Dict[int, float]:
+        """Score of every memory matching a selective keyword"""
+        scores: Dict[int, float] = {}
+        get = scores.get
+        for docs, exact, _ in selective:
+            idf = self._idf(len(docs), total)
+            if len(exact) == len(docs):
+                for doc_id in docs:
+                    scores[doc_id] = get(doc_id, 0.0) + idf
+                continue
+            partial = idf * PREFIX_MATCH_WEIGHT
+            for doc_id in docs:
+                scores[doc_id] = get(doc_id, 0.0) + partial
+            for doc_id in exact:
+                scores[doc_id] += idf - partial
+        return scores
+
+    def _best_matches(self, selective: List[SelectiveKeyword], total: int, limit: int) -> Dict[int, float]:
+        """
+        The `limit` best scores of `_all_matches` (newest first among ties)
+        without scoring every match. A memory matching a single keyword ties
+        with every other one matching just that keyword, so only the newest
+        `limit` matches of each keyword can make it; memories matching several
+        keywords are found by intersecting the posting lists. Only those
+        candidates are scored.
+        """
+        terms = []  # (idf, doc ids: a set or an ascending array, exact-match ids or None if all are exact)
+        candidates: Set[int] = set()
+        for docs, exact, lists in selective:
+            terms.append((self._idf(len(docs), total), docs, None if len(exact) == len(docs) else exact))
+            if len(lists) == 1:
+                candidates.update(self._newest(lists[0], limit))
+            else:
+                newest = sorted({doc_id for postings in lists for doc_id in self._newest(postings, limit)})
+                candidates.update(newest[-limit:])
+            if len(exact) and len(exact) != len(docs):
+                candidates.update(self._newest(exact, limit))
+
+        terms_by_size = sorted(terms, key=lambda term: len(term[1]))
+        seen: Set[int] = set()
+        several: Set[int] = set()
+        for _, docs, _ in terms_by_size[:-1]:
+            several.update(seen.intersection(docs))
+            seen.update(docs)
+        several |= self._intersect(seen, terms_by_size[-1][1])
+        if self._dead:
+            several = {doc_id for doc_id in several if self._slot(doc_id) >= 0}
+        candidates |= several
+
+        scores = dict.fromkeys(candidates, 0.0)
+        for idf, docs, exact in terms:
+            matched = self._intersect(candidates, docs)
+            if exact is None:
+                for doc_id in matched:
+                    scores[doc_id] += idf
+                continue
+            exact_matched = self._intersect(matched, exact)
+            partial = idf * PREFIX_MATCH_WEIGHT
+            for doc_id in matched:
+                scores[doc_id] += idf if doc_id in exact_matched else partial
+        return self._best_candidates(scores, limit) if len(scores) > limit else scores
+
+    @staticmethod
+    def _intersect(doc_ids: Set[int], other) -> Set[int]:
+        """`doc_ids` also in `other` (a set or an ascending array, bisected when much longer)"""
+        if isinstance(other, set) or len(other) <= PROBE_RATIO * len(doc_ids):
+            return doc_ids.intersection(other)
+        found = set()
+        for doc_id in doc_ids:
+            i = bisect_left(other, doc_id)
+            if i < len(other) and other[i] == doc_id:
+                found.add(doc_id)
+        return found
+
+    def _newest(self, doc_ids: Sequence[int], count: int) -> Sequence[int]:
+        """The last `count` live ids of an ascending id sequence"""
+        if not self._dead:
+            return doc_ids[-count:]
+        newest = []
+        for i in range(len(doc_ids) - 1, -1, -1):
+            if self._slot(doc_ids[i]) >= 0:
+                newest.append(doc_ids[i])
+                if len(newest) == count:
+                    break
+        return newest
+
+    @staticmethod
+    def _best_candidates(scores: Dict[int, float], limit: int) -> Dict[int, float]:
+        """The `limit` best-scored doc ids, newest first among ties (scores take few distinct values)"""
+        counts = Counter(scores.values())
+        kept = 0
+        for cutoff in sorted(counts, reverse=True):
+            kept += counts[cutoff]
+            if kept >= limit:
+                break
+        best = {doc_id: score for doc_id, score in scores.items() if score > cutoff}
+        ties = sorted(doc_id for doc_id, score in scores.items() if score == cutoff)
+        for doc_id in ties[len(ties) - (limit - len(best)):]:
+            best[doc_id] = cutoff
+        return best
+
+    @staticmethod
+    def _idf(df: int, total: int) -> float:
+        df = min(df, total)
+        return math.log(1 + (total - df + 0.5) / (df + 0.5))
+
+    def scan(self, after: int = -1, keywords: Iterable[str] = ()) -> Iterator[Tuple[int, str, int, float, int, float]]:
+        """
+        (doc id, memory, level, created, hits, last recall) of the live
+        memories with an id above `after`, in id order; with `keywords`, only
+        memories containing a word that starts with one of them. Lazy, so a
+        page costs O(page) — but don't mutate the layer while iterating.
+        """
+        keywords = {keyword.lower() for keyword in keywords if keyword}
+        if keywords:
+            lists = [postings for keyword in keywords for postings in self._matching_postings(keyword)]
+            doc_ids = merge(*(
+                (postings[i] for i in range(bisect_right(postings, after), len(postings))) for postings in lists
+            ))
+            last_id = after
+            for doc_id in doc_ids:
+                if doc_id == last_id:
+                    continue
+                last_id = doc_id
+                slot = self._slot(doc_id)
+                if slot >= 0:
+                    yield self._row(slot)
+            return
+        texts = self._texts
+        for slot in range(bisect_right(self._ids, after, self._head), len(texts)):
+            if texts[slot] is not None:
+                yield self._row(slot)
+
+    def _row(self, slot: int) -> Tuple[int, str, int, float, int, float]:
+        return (
+            self._ids[slot], self._texts[slot], self._level_column[slot],
+            self._created[slot], self._hits[slot], self._accessed[slot],
+        )
+
+    def search(self, keywords: Iterable[str], limit: Optional[int] = None) -> List[str]:
+        """
+        Return memories containing a token that starts with any keyword (union of
+        the posting lists), oldest first, stopping after `limit` hits.
+        """
+        if limit is not None and limit <= 0:
+            return []
+        lists = []
+        for keyword in set(keywords):
+            if keyword:
+                lists.extend(self._matching_postings(keyword.lower()))
+        results: List[str] = []
+        last_id = -1
+        for doc_id in merge(*lists):
+            if doc_id == last_id:
+                continue
+            last_id = doc_id
+            memory = self.get(doc_id)
+            if memory is None:
+                continue
+            results.append(memory)
+            if limit is not None and len(results) >= limit:
+                break
+        return results
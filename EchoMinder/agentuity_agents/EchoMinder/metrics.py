@@ -0,0 +1,239 @@
+import bisect
+import re
+import time
+from contextvars import ContextVar, Token
+from typing import Callable, Dict, Optional, Sequence, Union
+
+# =========================
+# ⏱️ Stage Timing & Metrics
+# =========================
+# Latency buckets in seconds (upper bounds), from sub-millisecond index work to slow LLM calls
+DEFAULT_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+GaugeReader = Callable[[], Union[float, Dict[str, float]]]
+
+
+class RequestTimings:
+    """Stage breakdown of one request; tasks spawned during it inherit it until it ends"""
+
+    __slots__ = ("stages", "active")
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        self.active = True
+
+
+# Stage timings of the request running in the current task (None when not collected)
+_request_timings: ContextVar[Optional[RequestTimings]] = ContextVar("echominder_request_timings", default=None)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram (Prometheus style, O(log buckets) per sample)"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by interpolating inside its bucket"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= target:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (target - seen) / bucket_count
+            seen += bucket_count
+        return self.buckets[-1]
+
+    def snapshot(self) -> Dict[str, float]:
+        """Count plus mean and quantiles in milliseconds"""
+        return {
+            "count": self.count,
+            "mean_ms": round(1000 * self.sum / self.count, 3) if self.count else 0.0,
+            "p50_ms": round(1000 * self.quantile(0.50), 3),
+            "p95_ms": round(1000 * self.quantile(0.95), 3),
+            "p99_ms": round(1000 * self.quantile(0.99), 3),
+        }
+
+
+class _NullSpan:
+    """Shared no-op span returned while nothing is being measured"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        return None
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("_metrics", "_stage", "_started")
+
+    def __init__(self, metrics: "Metrics", stage: str):
+        self._metrics = metrics
+        self._stage = stage
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._metrics.record(self._stage, time.perf_counter() - self._started)
+
+
+class Metrics:
+    """
+    In-process pipeline metrics: a latency histogram per stage, counters (LLM
+    calls, tokens) and gauges read on demand from other components (caches,
+    queues). Spans also add their time to the current request's breakdown when
+    one is being collected.
+
+    While disabled and no request breakdown is active, `span()` returns a
+    shared no-op object, so instrumented code pays one context-var lookup.
+    """
+
+    def __init__(self, enabled: bool = False, prefix: str = "echominder"):
+        self.enabled = enabled
+        self.prefix = prefix
+        self.stages: Dict[str, Histogram] = {}
+        self.counters: Dict[str, float] = {}
+        self._gauges: Dict[str, GaugeReader] = {}
+
+    # -------------------------
+    # Recording
+    # -------------------------
+    def span(self, stage: str):
+        """Context manager timing one pipeline stage"""
+        if not self.enabled:
+            timings = _request_timings.get()
+            if timings is None or not timings.active:
+                return _NULL_SPAN
+        return _Span(self, stage)
+
+    def record(self, stage: str, seconds: float) -> None:
+        if self.enabled:
+            histogram = self.stages.get(stage)
+            if histogram is None:
+                histogram = self.stages[stage] = Histogram()
+            histogram.observe(seconds)
+        timings = _request_timings.get()
+        if timings is not None and timings.active:
+            timings.stages[stage] = timings.stages.get(stage, 0.0) + seconds
+
+    def inc(self, name: str, value: float = 1) -> None:
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def record_usage(self, usage) -> None:
+        """Count one LLM call and its token usage (an OpenAI `usage` object or None)"""
+        if not self.enabled:
+            return
+        self.inc("llm_calls")
+        if usage is not None:
+            self.inc("llm_prompt_tokens", getattr(usage, "prompt_tokens", 0) or 0)
+            self.inc("llm_completion_tokens", getattr(usage, "completion_tokens", 0) or 0)
+
+    def gauge(self, name: str, read: GaugeReader) -> None:
+        """Register a gauge; `read` returns a number or a dict of numbers"""
+        self._gauges[name] = read
+
+    # -------------------------
+    # Per-request breakdown
+    # -------------------------
+    def begin_request(self) -> Token:
+        """Start collecting stage timings for the current task's request"""
+        return _request_timings.set(RequestTimings())
+
+    def end_request(self, token: Token) -> None:
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.active = False  # background tasks that inherited it stop recording
+        _request_timings.reset(token)
+
+    def request_timings_ms(self) -> Dict[str, float]:
+        timings = _request_timings.get()
+        if timings is None:
+            return {}
+        return {stage: round(1000 * seconds, 3) for stage, seconds in timings.stages.items()}
+
+    # -------------------------
+    # Export
+    # -------------------------
+    def read_gauges(self) -> Dict[str, float]:
+        values: Dict[str, float] = {}
+        for name, read in self._gauges.items():
+            try:
+                value = read()
+            except Exception as e:
+                print(f"[EchoMinderNew] Failed to read gauge {name!r}: {e}")
+                continue
+            if isinstance(value, dict):
+                for key, item in value.items():
+                    if isinstance(item, (int, float)):
+                        values[f"{name}_{key}"] = item
+            elif isinstance(value, (int, float)):
+                values[name] = value
+        return values
+
+    def snapshot(self) -> Dict[str, object]:
+        return {
+            "enabled": self.enabled,
+            "stages": {stage: histogram.snapshot() for stage, histogram in sorted(self.stages.items())},
+            "counters": dict(sorted(self.counters.items())),
+            "gauges": self.read_gauges(),
+        }
+
+    def prometheus_text(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        name = f"{self.prefix}_stage_duration_seconds"
+        lines.append(f"# HELP {name} Time spent in each pipeline stage.")
+        lines.append(f"# TYPE {name} histogram")
+        for stage, histogram in sorted(self.stages.items()):
+            cumulative = 0
+            for bound, count in zip(_bucket_labels(histogram), histogram.counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {histogram.sum:.6f}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {histogram.count}')
+        for counter, value in sorted(self.counters.items()):
+            metric = f"{self.prefix}_{_metric_name(counter)}_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+        for gauge, value in sorted(self.read_gauges().items()):
+            metric = f"{self.prefix}_{_metric_name(gauge)}"
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        self.stages.clear()
+        self.counters.clear()
+
+
+def _bucket_labels(histogram: Histogram):
+    return [repr(float(bound)) for bound in histogram.buckets] + ["+Inf"]
+
+
+def _metric_name(name: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+# Process-wide registry; the agent enables it from ECHOMINDER_METRICS
+metrics = Metrics()
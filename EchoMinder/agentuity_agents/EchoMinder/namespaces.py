@@ -0,0 +1,466 @@
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from agentuity_agents.EchoMinder.dedup import NearDuplicateIndex
+from agentuity_agents.EchoMinder.memory_index import MemoryLayer
+from agentuity_agents.EchoMinder.metrics import metrics
+from agentuity_agents.EchoMinder.storage import MemoryStore
+from agentuity_agents.EchoMinder.warm_start import capture_layer, open_warm_snapshot, write_warm_snapshot
+
+# =========================
+# 👥 Per-User Memory Namespaces
+# =========================
+
+
+class MemoryNamespace:
+    """
+    The three memory layers of one user or session, plus the storage backend
+    they are persisted to. Every mutation is applied in-process first and then
+    mirrored to the store.
+
+    Concurrency: a namespace is only used from the event loop. Mutation methods
+    never await, so each one is applied whole before another request runs, and
+    reads (retrieval, recall pages) see a consistent state without locking or
+    waiting for writers. Work that reads memories, awaits the LLM and then
+    writes back (merges, compaction, bulk imports) claims its batch under
+    `write_lock`, awaits the LLM without holding it, then applies its result
+    under the lock and removes what it consumed by doc id, so writes made
+    meanwhile are kept and concurrent jobs never consume the same memory.
+    """
+
+    def __init__(self, name: str, short_limit: int):
+        self.name = name
+        self.short_limit = short_limit
+        self.short_term = MemoryLayer()     # Short-term memory (in-process)
+        self.mid_term = MemoryLayer()       # Mid-term merged summaries (cached)
+        self.long_term = MemoryLayer()      # Long-term memory (persisted)
+        self.layers: Dict[str, MemoryLayer] = {
+            "short": self.short_term,
+            "mid": self.mid_term,
+            "long": self.long_term,
+        }
+        self.store = MemoryStore()
+        self.warm_path: Optional[str] = None  # binary warm-start snapshot, written on save
+        self.warm_loaded = False  # whether the last load came from the warm snapshot
+        self.saved_version: Optional[Tuple[int, int, int]] = None
+        self.write_lock = asyncio.Lock()  # claim / apply steps of merges, compaction and bulk imports
+        self.claimed: Dict[str, Set[int]] = {name: set() for name in self.layers}  # doc ids being consumed
+
+    # -------------------------
+    # Load / save / refresh
+    # -------------------------
+    def load(self) -> None:
+        """Load the persisted memory layers from the warm snapshot if it is current, else the backend"""
+        self.warm_loaded = self._load_warm()
+        if self.warm_loaded:
+            self.saved_version = self.version()
+            return
+        for layer_name, layer in self.layers.items():
+            try:
+                memories = self.store.load(layer_name)
+                layer.replace(memories, self.store.load_levels(layer_name), self.store.load_created(layer_name))
+                self.store.bind(layer_name, [doc_id for doc_id, _ in layer.items()])
+            except Exception as e:
+                layer.clear()
+                print(f"[EchoMinderNew] Failed to load {layer_name}-term memory of {self.name!r}: {e}")
+        self.saved_version = self.version()
+
+    def _load_warm(self) -> bool:
+        if not self.warm_path:
+            return False
+        try:
+            snapshot = open_warm_snapshot(self.warm_path, self.store.fingerprint())
+        except Exception as e:
+            print(f"[EchoMinderNew] Failed to check warm snapshot of {self.name!r}: {e}")
+            return False
+        if snapshot is None:
+            return False
+        try:
+            images = {name: snapshot.layer(name, layer.duplicates) for name, layer in self.layers.items()}
+            if any(image is None for image in images.values()):
+                return False
+            for name, image in images.items():
+                self.layers[name].restore(**image)
+            self.store.restore_warm_state(snapshot.store_state, self.layers)
+            return True
+        except Exception as e:
+            print(f"[EchoMinderNew] Failed to read warm snapshot of {self.name!r}: {e}")
+            for layer in self.layers.values():
+                layer.clear()
+            return False
+        finally:
+            snapshot.close()
+
+    def save(self) -> None:
+        """
+        Flush and compact the storage backend (e.g. into a fresh snapshot file),
+        then write the warm-start snapshot matching the stored state
+        """
+        version = self.version()
+        try:
+            self.store.save()
+        except Exception as e:
+            print(f"[EchoMinderNew] Failed to save memory of {self.name!r}: {e}")
+            return
+        if self.warm_path:
+            try:
+                layers = {name: capture_layer(layer) for name, layer in self.layers.items()}
+                write_warm_snapshot(self.warm_path, self.store.fingerprint(), self.store.warm_state(), layers)
+            except Exception as e:
+                print(f"[EchoMinderNew] Failed to write warm snapshot of {self.name!r}: {e}")
+        self.saved_version = version
+
+    def save_later(self) -> Optional[Callable[[], None]]:
+        """
+        `save` split in two: copy the state now (on the event loop) and return
+        the function that serializes and writes it, to run on another thread
+        while the namespace keeps changing. None: the store can't snapshot
+        right now (e.g. a compaction is still running); the namespace stays dirty
+        """
+        version = self.version()
+        try:
+            write_store = self.store.save_later()
+        except Exception as e:
+            print(f"[EchoMinderNew] Failed to save memory of {self.name!r}: {e}")
+            return None
+        if write_store is None:
+            return None
+        store_state = self.store.warm_state()
+        layers = {name: capture_layer(layer) for name, layer in self.layers.items()} if self.warm_path else None
+
+        def write() -> None:
+            try:
+                fingerprint = write_store()
+            except Exception as e:
+                print(f"[EchoMinderNew] Failed to save memory of {self.name!r}: {e}")
+                return
+            if layers is not None and fingerprint is not None:
+                # Without a fingerprint the store changed meanwhile: the next save writes the warm snapshot
+                try:
+                    write_warm_snapshot(self.warm_path, fingerprint, store_state, layers)
+                except Exception as e:
+                    print(f"[EchoMinderNew] Failed to write warm snapshot of {self.name!r}: {e}")
+            self.saved_version = version
+
+        return write
+
+    def dirty(self) -> bool:
+        """Changed since the last save or load"""
+        return self.version() != self.saved_version
+
+    def refresh(self) -> None:
+        """Pick up memories written by other worker processes sharing the store"""
+        try:
+            self.store.sync(self.layers)
+        except Exception as e:
+            print(f"[EchoMinderNew] Failed to refresh memory of {self.name!r}: {e}")
+
+    def close(self) -> None:
+        """Write back and release the namespace's files / connections"""
+        self.save()
+        try:
+            self.store.close()
+        except Exception as e:
+            print(f"[EchoMinderNew] Failed to close storage of {self.name!r}: {e}")
+        for layer in self.layers.values():
+            if layer.vectors is not None:
+                layer.vectors.close()
+
+    def nbytes(self) -> int:
+        return sum(layer.nbytes for layer in self.layers.values())
+
+    def footprint(self) -> Dict[str, Dict[str, int]]:
+        """Measured per-layer memory footprint (see MemoryLayer.footprint)"""
+        return {name: layer.footprint() for name, layer in self.layers.items()}
+
+    def enable_dedup(self, threshold: float) -> None:
+        """Refresh near-duplicates (Jaccard >= threshold) instead of storing them again"""
+        for layer in self.layers.values():
+            layer.attach_duplicates(NearDuplicateIndex(threshold))
+
+    def dedup_stats(self) -> Dict[str, float]:
+        totals: Dict[str, float] = {}
+        for layer in self.layers.values():
+            if layer.duplicates is not None:
+                for key, value in layer.duplicates.stats().items():
+                    totals[key] = totals.get(key, 0) + value
+        return totals
+
+    def index_duplicates(self, limit: int) -> int:
+        """Index up to `limit` memories queued by the last load per layer; returns how many are left"""
+        left = 0
+        for layer in self.layers.values():
+            if layer.duplicates is not None and layer.duplicates.pending:
+                left += layer.duplicates.catch_up(limit)
+        return left
+
+    def version(self) -> Tuple[int, int, int]:
+        """Changes whenever any layer changes (keys caches derived from the memories)"""
+        return (self.short_term.version, self.mid_term.version, self.long_term.version)
+
+    # -------------------------
+    # Claims (memories an in-flight merge, compaction or bulk import will consume)
+    # -------------------------
+    def claim(self, layer_name: str, doc_ids: Optional[Iterable[int]] = None) -> List[Tuple[int, str]]:
+        """Claim `doc_ids` (default: every memory of the layer) unless already claimed; returns the claimed pairs"""
+        layer, claimed = self.layers[layer_name], self.claimed[layer_name]
+        if doc_ids is None:
+            batch = [(doc_id, memory) for doc_id, memory in layer.items() if doc_id not in claimed]
+        else:
+            batch = [(doc_id, layer.get(doc_id)) for doc_id in doc_ids if doc_id not in claimed]
+            batch = [(doc_id, memory) for doc_id, memory in batch if memory is not None]
+        claimed.update(doc_id for doc_id, _ in batch)
+        return batch
+
+    def unclaim(self, layer_name: str, doc_ids: Iterable[int]) -> None:
+        self.claimed[layer_name].difference_update(doc_ids)
+
+    def unclaimed_count(self, layer_name: str) -> int:
+        layer = self.layers[layer_name]
+        return len(layer) - sum(1 for doc_id in self.claimed[layer_name] if layer.get(doc_id) is not None)
+
+    # -------------------------
+    # Layer mutations
+    # -------------------------
+    def _persist(self, action, *args) -> None:
+        try:
+            with metrics.span("persist"):
+                action(*args)
+        except Exception as e:
+            print(f"[EchoMinderNew] Failed to persist memory change of {self.name!r}: {e}")
+
+    def _refresh_duplicate(self, layer_name: str, memory: str) -> bool:
+        """
+        If the layer holds a near-duplicate of `memory`, replace it by `memory`
+        at the newest position (one store write, no growth) and return True
+        """
+        layer = self.layers[layer_name]
+        doc_id = layer.find_near_duplicate(memory)
+        if doc_id is None:
+            return False
+        old, level = layer.get(doc_id), layer.level(doc_id)
+        layer.remove_ids([doc_id])
+        new_id = layer.append(memory, level)
+        self._persist(self.store.replace, layer_name, [doc_id], [old], memory, level, new_id)
+        metrics.inc("dedup_suppressed")
+        return True
+
+    def _append_novel(self, layer: MemoryLayer, memories: List[str]) -> List[Tuple[int, str]]:
+        """Append the memories that have no near-duplicate in the layer; returns them with their doc ids"""
+        novel = []
+        for memory in memories:
+            if layer.find_near_duplicate(memory) is None:
+                novel.append((layer.append(memory), memory))
+            else:
+                metrics.inc("dedup_suppressed")
+        return novel
+
+    @staticmethod
+    def _pop_oldest(layer: MemoryLayer, count: int) -> List[int]:
+        """Drop the `count` oldest memories of a layer; returns their doc ids"""
+        doc_ids = [doc_id for doc_id, _ in islice(layer.items(), max(0, count))]
+        layer.remove_ids(doc_ids)
+        return doc_ids
+
+    def add_short_term(self, memory: str) -> None:
+        """Append to short-term memory, dropping the oldest beyond the limit"""
+        if self._refresh_duplicate("short", memory):
+            return
+        doc_id = self.short_term.append(memory)
+        self._persist(self.store.append, "short", memory, 0, doc_id)
+        if len(self.short_term) > self.short_limit:
+            self._persist(self.store.remove, "short", self._pop_oldest(self.short_term, len(self.short_term) - self.short_limit))
+
+    def add_mid_term(self, memory: str) -> None:
+        if self._refresh_duplicate("mid", memory):
+            return
+        doc_id = self.mid_term.append(memory)
+        self._persist(self.store.append, "mid", memory, 0, doc_id)
+
+    def drop_mid_term(self, doc_ids: Iterable[int]) -> None:
+        """Drop the mid-term memories just merged (by doc id, so newer ones stay)"""
+        doc_ids = list(doc_ids)
+        self.mid_term.remove_ids(doc_ids)
+        self._persist(self.store.remove, "mid", doc_ids)
+
+    def add_long_term(self, memory: str, level: int = 0) -> None:
+        """Append one memory to long-term memory (O(1) per write on every backend)"""
+        if self._refresh_duplicate("long", memory):
+            return
+        doc_id = self.long_term.append(memory, level)
+        self._persist(self.store.append, "long", memory, level, doc_id)
+
+    def add_many(
+        self,
+        long_term: List[str],
+        mid_term: List[str],
+        short_term: List[str],
+        consumed_mid: Iterable[int] = (),
+    ) -> None:
+        """
+        Apply a bulk import as one store commit: append to long- and
+        short-term (keeping the newest `short_limit`), and replace the mid-term
+        memories the import started from (`consumed_mid` doc ids, already
+        folded into its merges) by its leftover batch. Mid-term memories added
+        while the import ran are kept. Near-duplicates of stored memories are
+        skipped.
+        """
+        long_term = self._append_novel(self.long_term, long_term)
+        consumed_mid = list(consumed_mid)
+        self.mid_term.remove_ids(consumed_mid)
+        mid_term = [(self.mid_term.append(memory), memory) for memory in mid_term]
+        short_term = short_term[-self.short_limit:] if self.short_limit > 0 else []
+        short_term = self._append_novel(self.short_term, short_term)
+        dropped_short = self._pop_oldest(self.short_term, len(self.short_term) - self.short_limit)
+        self._persist(
+            self.store.write_batch,
+            {"long": long_term, "mid": mid_term, "short": short_term},
+            {"mid": consumed_mid, "short": dropped_short},
+        )
+
+    def compact_long_term(self, doc_ids: List[int], summary: str, level: int) -> None:
+        """Replace a batch of long-term memories by their level-`level` summary"""
+        doc_ids = [doc_id for doc_id in doc_ids if self.long_term.get(doc_id) is not None]
+        removed = [self.long_term.get(doc_id) for doc_id in doc_ids]
+        self.long_term.remove_ids(doc_ids)
+        summary_id = self.long_term.append(summary, level)
+        self._persist(self.store.replace, "long", doc_ids, removed, summary, level, summary_id)
+
+
+class NamespaceCache:
+    """
+    LRU of resident namespaces bounded by an estimated byte budget and a
+    maximum count (small namespaces still hold files and threads).
+
+    Namespaces are opened lazily on first access, or ahead of it on the writer
+    thread by `preload` (the first access then only waits for what is left of
+    the load). When the resident total goes
+    over budget the least recently used ones are dropped and closed (written
+    back to their store) on a single writer thread, so the event loop never
+    serializes a whole namespace; reopening one waits for its write-back.
+    Pinned namespaces and ones in use by an in-flight request are never
+    evicted.
+    """
+
+    def __init__(
+        self,
+        opener: Callable[[str], MemoryNamespace],
+        budget_bytes: int,
+        pinned: Iterable[str] = (),
+        max_resident: int = 0,
+    ):
+        self._opener = opener
+        self.budget_bytes = budget_bytes
+        self.max_resident = max_resident  # 0 = no count limit
+        self.pinned = set(pinned)
+        self._resident: "OrderedDict[str, MemoryNamespace]" = OrderedDict()
+        self._active: Dict[str, int] = {}
+        self._closing: Dict[str, Future] = {}  # evicted, write-back still running
+        self._opening: Dict[str, Future] = {}  # preloading on the writer thread
+        self.writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="namespace-writer")
+        self.loads = 0
+        self.evictions = 0
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._resident
+
+    def get(self, name: str) -> MemoryNamespace:
+        namespace = self._resident.get(name)
+        if namespace is None:
+            namespace = self._preloaded(name)
+            if namespace is None:
+                closing = self._closing.pop(name, None)
+                if closing is not None:
+                    closing.result()  # evicted moments ago: its files must be complete before reloading
+                namespace = self._opener(name)
+            self._resident[name] = namespace
+            self.loads += 1
+        self._resident.move_to_end(name)
+        return namespace
+
+    def preload(self, name: str) -> None:
+        """Start opening a namespace on the writer thread (after any write-back of it still queued there)"""
+        if name in self._resident or name in self._opening:
+            return
+        try:
+            self._opening[name] = self.writer.submit(self._opener, name)
+        except RuntimeError:
+            pass  # interpreter exit: `get` opens it if it is still needed
+
+    def _preloaded(self, name: str) -> Optional[MemoryNamespace]:
+        opening = self._opening.pop(name, None)
+        if opening is None:
+            return None
+        try:
+            return opening.result()
+        except Exception as e:
+            print(f"[EchoMinderNew] Failed to preload namespace {name!r}: {e}")
+            return None
+
+    def acquire(self, name: str) -> MemoryNamespace:
+        """Get a namespace and protect it from eviction until `release`"""
+        namespace = self.get(name)
+        self._active[name] = self._active.get(name, 0) + 1
+        return namespace
+
+    def release(self, name: str) -> None:
+        count = self._active.get(name, 0) - 1
+        if count > 0:
+            self._active[name] = count
+        else:
+            self._active.pop(name, None)
+        self.enforce_budget()
+
+    @contextmanager
+    def use(self, name: str) -> Iterator[MemoryNamespace]:
+        namespace = self.acquire(name)
+        try:
+            yield namespace
+        finally:
+            self.release(name)
+
+    def resident(self) -> List[MemoryNamespace]:
+        return list(self._resident.values())
+
+    def nbytes(self) -> int:
+        return sum(namespace.nbytes() for namespace in self._resident.values())
+
+    def evict(self, name: str) -> None:
+        """Drop a namespace and close it on the writer thread (see `wait_closed`)"""
+        namespace = self._resident.pop(name, None)
+        if namespace is not None:
+            for done in [other for other, future in self._closing.items() if future.done()]:
+                del self._closing[done]
+            try:
+                self._closing[name] = self.writer.submit(namespace.close)
+            except RuntimeError:
+                namespace.close()  # interpreter exit: the executor no longer takes work
+            self.evictions += 1
+
+    def wait_closed(self) -> None:
+        """Block until every evicted namespace is written back and closed"""
+        wait(list(self._closing.values()))
+        self._closing.clear()
+
+    def enforce_budget(self) -> None:
+        total = self.nbytes()
+        count = len(self._resident)
+        for name in list(self._resident):
+            if total <= self.budget_bytes and not (self.max_resident and count > self.max_resident):
+                break
+            if name in self.pinned or name in self._active:
+                continue
+            total -= self._resident[name].nbytes()
+            count -= 1
+            self.evict(name)
+
+    def close_all(self) -> None:
+        for name in list(self._opening):
+            self.get(name)  # a preload still holds its files open
+        for name in list(self._resident):
+            self.evict(name)
+        self.wait_closed()
@@ -0,0 +1,107 @@
+import re
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional
+
+# =========================
+# 🧮 Token-Budgeted Prompt Assembly
+# =========================
+ESTIMATE_PATTERN = re.compile(r"\w+|[^\w\s]")
+TRUNCATION_MARK = "…"
+MIN_TRUNCATED_TOKENS = 16  # don't keep a truncated memory shorter than this
+MEMORY_LINE_TOKENS = 2     # "- " prefix and newline of each memory line
+
+
+def _word_tokens(word: str) -> int:
+    if word.isascii():
+        return 1 + (len(word) - 1) // 6
+    return len(word)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Fast local upper-bound estimate of BPE tokens: one per punctuation mark,
+    one per short ASCII word (plus one per extra 6 characters) and one per
+    character of non-ASCII words (CJK text is roughly a token per character).
+    """
+    return sum(_word_tokens(match.group()) for match in ESTIMATE_PATTERN.finditer(text))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut `text` after the last estimated token that fits in `max_tokens`"""
+    tokens = 0
+    end = 0
+    for match in ESTIMATE_PATTERN.finditer(text):
+        cost = _word_tokens(match.group())
+        if tokens + cost > max_tokens:
+            return text[:end].rstrip() + TRUNCATION_MARK
+        tokens += cost
+        end = match.end()
+    return text
+
+
+def pack_memories(memories: List[str], budget: Optional[int]) -> List[str]:
+    """
+    Greedily keep memories in rank order while they fit in `budget` tokens;
+    ones that don't fit are dropped. The leftover budget then goes to an
+    excerpt of the best-ranked dropped memory, if it leaves room for a useful
+    one. A budget of None keeps everything.
+    """
+    if budget is None:
+        return list(memories)
+    packed: List[str] = []
+    remaining = budget
+    excerpt_at, excerpt_of = -1, ""  # rank slot and text of the best-ranked memory that did not fit
+    for memory in memories:
+        cost = estimate_tokens(memory) + MEMORY_LINE_TOKENS
+        if cost <= remaining:
+            packed.append(memory)
+            remaining -= cost
+        elif excerpt_at < 0:
+            excerpt_at, excerpt_of = len(packed), memory
+    if excerpt_at >= 0 and remaining - MEMORY_LINE_TOKENS >= MIN_TRUNCATED_TOKENS:
+        packed.insert(excerpt_at, truncate_to_tokens(excerpt_of, remaining - MEMORY_LINE_TOKENS - 1))
+    return packed
+
+
+class PromptCache:
+    """
+    LRU of assembled memory contexts, keyed by what the packing depends on:
+    the retrieved memories and the token budget left for them. Unrelated
+    writes don't invalidate an entry, and a changed memory is a new key.
+    Entries are the packed context only; the question is filled in per request.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, str]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: Hashable, entry: str) -> None:
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+        }
@@ -0,0 +1,109 @@
+import heapq
+import math
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from agentuity_agents.EchoMinder.memory_index import MemoryLayer
+
+# =========================
+# 🏅 Ranked Retrieval (relevance × recency × importance)
+# =========================
+IMPORTANCE_SATURATION = 3  # recalls at which importance reaches 0.5
+CANDIDATES_PER_HIT = 4     # best keyword matches per layer fully scored for each requested hit
+
+# (score, layer name, doc id, memory) of one ranked hit
+RankedHit = Tuple[float, str, int, str]
+
+
+class MemoryRanker:
+    """
+    Scores keyword candidates from every layer as
+
+        relevance_weight  * idf-weighted match score (normalized to 0..1)
+      + recency_weight    * 0.5 ** (age / half_life)
+      + importance_weight * hits / (hits + IMPORTANCE_SATURATION)
+
+    and keeps the best `limit` in a bounded heap (one hit per distinct text),
+    so old long-term memories no longer crowd out newer or more often
+    recalled ones. The same signals (without relevance, and using the last
+    recall time) rate how cold a memory is for compaction/eviction.
+    """
+
+    def __init__(
+        self,
+        relevance_weight: float = 1.0,
+        recency_weight: float = 0.3,
+        importance_weight: float = 0.2,
+        half_life: float = 7 * 24 * 3600.0,
+    ):
+        self.relevance_weight = relevance_weight
+        self.recency_weight = recency_weight
+        self.importance_weight = importance_weight
+        self.half_life = half_life
+
+    def _recency(self, timestamps: Sequence[float], now: float) -> List[float]:
+        decay = math.log(2) / self.half_life if self.half_life > 0 else 0.0
+        return [math.exp(-decay * max(0.0, now - t)) for t in timestamps]
+
+    def rank(
+        self,
+        layers: Dict[str, MemoryLayer],
+        keywords: Iterable[str],
+        limit: int,
+        now: Optional[float] = None,
+    ) -> List[RankedHit]:
+        """Best `limit` keyword matches across `layers`, best first (ties: newest first)"""
+        if limit <= 0:
+            return []
+        now = time.time() if now is None else now
+        keywords = list(keywords)
+        candidates = []
+        for name, layer in layers.items():
+            scores = layer.relevance(keywords, limit=limit * CANDIDATES_PER_HIT)
+            if scores:
+                candidates.append((name, scores, layer.signals(scores)))
+        if not candidates:
+            return []
+        best = max(max(scores.values()) for _, scores, _ in candidates) or 1.0
+
+        def scored():
+            for name, scores, rows in candidates:
+                if not rows:
+                    continue
+                doc_ids, memories, created, hits, _ = zip(*rows)
+                recency = self._recency(created, now)
+                for doc_id, memory, born, fresh, count in zip(doc_ids, memories, created, recency, hits):
+                    score = (
+                        self.relevance_weight * scores[doc_id] / best
+                        + self.recency_weight * fresh
+                        + self.importance_weight * count / (count + IMPORTANCE_SATURATION)
+                    )
+                    yield score, born, name, doc_id, memory
+
+        # The same text can sit in several layers (e.g. a remembered fact): keep its best hit
+        best_hits: Dict[str, tuple] = {}
+        for hit in scored():
+            seen = best_hits.get(hit[4])
+            if seen is None or hit[:2] > seen[:2]:
+                best_hits[hit[4]] = hit
+        top = heapq.nlargest(limit, best_hits.values(), key=lambda hit: (hit[0], hit[1], hit[3]))
+        return [(score, name, doc_id, memory) for score, _, name, doc_id, memory in top]
+
+    def retention(self, created: float, hits: int, accessed: float, now: float) -> float:
+        """How much a memory is worth keeping verbatim (recency of use + recall frequency)"""
+        last_used = max(created, accessed)
+        return (
+            self.recency_weight * self._recency([last_used], now)[0]
+            + self.importance_weight * hits / (hits + IMPORTANCE_SATURATION)
+        )
+
+    def coldest(self, layer: MemoryLayer, doc_ids: Sequence[int], count: int, now: Optional[float] = None) -> List[int]:
+        """The `count` least worth keeping of `doc_ids`, in layer order"""
+        if count >= len(doc_ids):
+            return list(doc_ids)
+        now = time.time() if now is None else now
+        rows = layer.signals(doc_ids)
+        cold = heapq.nsmallest(
+            count, rows, key=lambda row: (self.retention(row[2], row[3], row[4], now), row[0])
+        )
+        return sorted(row[0] for row in cold)
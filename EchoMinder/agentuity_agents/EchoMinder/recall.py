@@ -0,0 +1,159 @@
+import asyncio
+import base64
+import binascii
+from datetime import datetime
+from itertools import islice
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from agentuity_agents.EchoMinder.memory_index import tokenize
+from agentuity_agents.EchoMinder.namespaces import MemoryNamespace
+
+# =========================
+# 📜 Paginated Recall / NDJSON Export
+# =========================
+LAYER_ORDER = ("long", "mid", "short")  # pages walk the layers in this order
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+EXPORT_BATCH_SIZE = 500  # entries between event-loop yields while exporting
+# Request fields that turn recall mode into a paginated listing
+RECALL_OPTIONS = ("cursor", "page_size", "layers", "since", "until", "keywords")
+
+
+def parse_time(value: Any) -> Optional[float]:
+    """Unix seconds from a number or an ISO 8601 string (None stays None)"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+
+
+def encode_cursor(layer: str, after: int) -> str:
+    return base64.urlsafe_b64encode(f"{layer}:{after}".encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """(layer, last doc id returned) of an opaque cursor from a previous page"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        layer, after = raw.split(":", 1)
+        if layer not in LAYER_ORDER:
+            raise ValueError(layer)
+        return layer, int(after)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError(f"Invalid recall cursor: {cursor!r}") from None
+
+
+class RecallFilter:
+    """
+    Which memories a recall page or export includes: a subset of layers, a
+    creation-time range [since, until) and keywords (a memory matches when it
+    has a word starting with any of them, via the layer's inverted index)
+    """
+
+    def __init__(
+        self,
+        layers: Optional[Iterable[str]] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        keywords: Iterable[str] = (),
+    ):
+        layers = set(layers) if layers else set(LAYER_ORDER)
+        unknown = layers - set(LAYER_ORDER)
+        if unknown:
+            raise ValueError(f"Unknown memory layers: {sorted(unknown)}")
+        self.layers = [name for name in LAYER_ORDER if name in layers]
+        self.since = since
+        self.until = until
+        self.keywords = list(keywords)
+
+    @classmethod
+    def from_request(cls, data: Dict[str, Any]) -> "RecallFilter":
+        layers = data.get("layers")
+        if isinstance(layers, str):
+            layers = [name.strip() for name in layers.split(",") if name.strip()]
+        keywords = data.get("keywords") or ()
+        if isinstance(keywords, str):
+            keywords = tokenize(keywords)
+        return cls(layers, parse_time(data.get("since")), parse_time(data.get("until")), keywords)
+
+    def entries(self, namespace: MemoryNamespace, layer_name: str, after: int = -1) -> Iterator[Dict[str, Any]]:
+        """Matching entries of one layer with an id above `after`, in id order"""
+        for doc_id, memory, level, created, hits, accessed in namespace.layers[layer_name].scan(after, self.keywords):
+            if self.since is not None and created < self.since:
+                continue
+            if self.until is not None and created >= self.until:
+                continue
+            yield {
+                "layer": layer_name,
+                "id": doc_id,
+                "text": memory,
+                "level": level,
+                "created": created,
+                "recalls": hits,
+                "last_recalled": accessed or None,
+            }
+
+
+def recall_page(
+    namespace: MemoryNamespace,
+    recall_filter: RecallFilter,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    One page of matching entries plus the cursor of the next page (None at
+    the end). Cursors hold a layer and a doc id, so pages stay consistent
+    while memories are added or removed, as long as the namespace stays
+    resident (doc ids are assigned when it is loaded).
+    """
+    page_size = max(1, min(int(page_size), MAX_PAGE_SIZE))
+    layer_index, after = 0, -1
+    if cursor:
+        layer_name, after = decode_cursor(cursor)
+        if layer_name not in recall_filter.layers:
+            raise ValueError(f"Recall cursor layer {layer_name!r} is not in the requested layers")
+        layer_index = recall_filter.layers.index(layer_name)
+
+    entries: List[Dict[str, Any]] = []
+    for layer_name in recall_filter.layers[layer_index:]:
+        # One extra entry tells whether this layer continues after the page
+        wanted = page_size - len(entries)
+        batch = list(islice(recall_filter.entries(namespace, layer_name, after), wanted + 1))
+        if len(batch) > wanted:
+            entries.extend(batch[:wanted])
+            return {"entries": entries, "next_cursor": encode_cursor(layer_name, entries[-1]["id"])}
+        entries.extend(batch)
+        after = -1
+        if len(entries) == page_size:
+            # Page is full at a layer boundary; the next page starts at the next layer
+            remaining = recall_filter.layers[recall_filter.layers.index(layer_name) + 1:]
+            if not remaining:
+                break
+            return {"entries": entries, "next_cursor": encode_cursor(remaining[0], -1)}
+    return {"entries": entries, "next_cursor": None}
+
+
+async def iter_export(
+    namespace: MemoryNamespace,
+    recall_filter: RecallFilter,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Every matching entry, one at a time. Entries are read `batch_size` at a
+    time by id cursor and the event loop gets control between batches, so
+    exports of any size run in constant memory next to live traffic.
+    """
+    for layer_name in recall_filter.layers:
+        after = -1
+        while True:
+            batch = list(islice(recall_filter.entries(namespace, layer_name, after), batch_size))
+            for entry in batch:
+                yield entry
+            if len(batch) < batch_size:
+                break
+            after = batch[-1]["id"]
+            await asyncio.sleep(0)
@@ -0,0 +1,229 @@
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+# =========================
+# 🚦 Priority-Aware Adaptive LLM Scheduler
+# =========================
+T = TypeVar("T")
+
+INTERACTIVE = 0  # summaries the current request is waiting for
+BACKGROUND = 1   # merges, compaction, write-behind and bulk work
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+_current_priority: ContextVar[int] = ContextVar("llm_priority", default=INTERACTIVE)
+
+
+class DeadlineExceeded(Exception):
+    """Queued LLM work that could not start before its deadline"""
+
+
+def is_rate_limited(error: BaseException) -> bool:
+    """HTTP 429 from the OpenAI SDK (status_code) or httpx (response.status_code)"""
+    if getattr(error, "status_code", None) == 429:
+        return True
+    return getattr(getattr(error, "response", None), "status_code", None) == 429
+
+
+class TokenBucket:
+    """`rate` starts per second with bursts of up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """Take a token and return 0, or return the seconds until one is available"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class LLMScheduler:
+    """
+    Admission control between the agent and the LLM client.
+
+    - Priority classes: queued interactive work always starts before queued
+      background work (strict priority, FIFO within a class).
+    - AIMD concurrency: the in-flight limit grows by ~1 per `limit` calls that
+      finish within `latency_target`, and is multiplied by `decrease_factor`
+      (at most once per `cooldown` seconds) on a 429 or a slower call.
+    - Optional token-bucket rate limit (`rate` calls/s, `burst`).
+    - Deadlines: work still queued at its deadline fails with
+      DeadlineExceeded instead of starting late; interactive work gets
+      `interactive_timeout` seconds unless the caller passes a deadline.
+    Priorities default to the innermost `priority_scope`.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 16,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        latency_target: float = 10.0,
+        decrease_factor: float = 0.5,
+        cooldown: float = 1.0,
+        rate: float = 0.0,
+        burst: Optional[float] = None,
+        interactive_timeout: Optional[float] = None,
+    ):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self.interactive_timeout = interactive_timeout
+        self._bucket = TokenBucket(rate, burst or rate) if rate > 0 else None
+        self._queue: List[Tuple[int, int, asyncio.Future]] = []
+        self._order = itertools.count()
+        self._in_flight = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._last_decrease = 0.0
+        self.started: Dict[int, int] = {priority: 0 for priority in PRIORITY_NAMES}
+        self.expired = 0
+        self.throttled = 0
+        self.slow = 0
+        self.failed = 0
+
+    # -------------------------
+    # Priorities
+    # -------------------------
+    @staticmethod
+    def current_priority() -> int:
+        return _current_priority.get()
+
+    @staticmethod
+    @contextmanager
+    def priority_scope(priority: int) -> Iterator[None]:
+        """LLM calls made inside the block (and tasks it spawns) use `priority`"""
+        token = _current_priority.set(priority)
+        try:
+            yield
+        finally:
+            _current_priority.reset(token)
+
+    # -------------------------
+    # Submission
+    # -------------------------
+    async def submit(
+        self,
+        call: Callable[[], Awaitable[T]],
+        priority: Optional[int] = None,
+        deadline: Optional[float] = None,
+    ) -> T:
+        """Run `call()` once admitted; `deadline` is a time.monotonic() value"""
+        if priority is None:
+            priority = _current_priority.get()
+        if deadline is None and priority == INTERACTIVE and self.interactive_timeout:
+            deadline = time.monotonic() + self.interactive_timeout
+        await self._admit(priority, deadline)
+        started = time.monotonic()
+        try:
+            result = await call()
+        except BaseException as e:
+            self._on_failure(e)
+            raise
+        else:
+            self._on_success(time.monotonic() - started)
+            return result
+        finally:
+            self._release()
+
+    async def _admit(self, priority: int, deadline: Optional[float]) -> None:
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._order), waiter))
+        self._pump()
+        try:
+            if deadline is None:
+                await waiter
+            else:
+                await asyncio.wait_for(waiter, max(0.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            self.expired += 1
+            raise DeadlineExceeded(
+                f"{PRIORITY_NAMES.get(priority, priority)} LLM call not started before its deadline"
+            ) from None
+        except BaseException:
+            if waiter.done() and not waiter.cancelled():
+                self._release()  # admitted, but the caller went away
+            raise
+        self.started[priority] = self.started.get(priority, 0) + 1
+
+    def _pump(self) -> None:
+        """Admit queued work while slots (and rate tokens) are available"""
+        while self._queue and self._in_flight < max(self.min_limit, int(self.limit)):
+            waiter = self._queue[0][2]
+            if waiter.done():  # cancelled or past its deadline
+                heapq.heappop(self._queue)
+                continue
+            if self._bucket is not None:
+                wait = self._bucket.take()
+                if wait > 0:
+                    self._wake_after(wait)
+                    return
+            heapq.heappop(self._queue)
+            self._in_flight += 1
+            waiter.set_result(None)
+
+    def _wake_after(self, delay: float) -> None:
+        if self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(delay, self._on_timer)
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._pump()
+
+    def _release(self) -> None:
+        self._in_flight -= 1
+        self._pump()
+
+    # -------------------------
+    # AIMD
+    # -------------------------
+    def _on_success(self, latency: float) -> None:
+        if latency > self.latency_target:
+            self.slow += 1
+            self._decrease()
+        else:
+            self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+
+    def _on_failure(self, error: BaseException) -> None:
+        if is_rate_limited(error):
+            self.throttled += 1
+            self._decrease()
+        elif not isinstance(error, asyncio.CancelledError):
+            self.failed += 1
+
+    def _decrease(self) -> None:
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return  # one cut per congestion event, not per failed call
+        self._last_decrease = now
+        self.limit = max(float(self.min_limit), self.limit * self.decrease_factor)
+
+    def stats(self) -> Dict[str, float]:
+        queued = {name: 0 for name in PRIORITY_NAMES.values()}
+        for priority, _, waiter in self._queue:
+            if not waiter.done():
+                queued[PRIORITY_NAMES.get(priority, str(priority))] += 1
+        return {
+            "limit": round(self.limit, 2),
+            "in_flight": self._in_flight,
+            **{f"queued_{name}": count for name, count in queued.items()},
+            **{f"started_{PRIORITY_NAMES[p]}": n for p, n in self.started.items() if p in PRIORITY_NAMES},
+            "expired": self.expired,
+            "throttled": self.throttled,
+            "slow": self.slow,
+            "failed": self.failed,
+        }
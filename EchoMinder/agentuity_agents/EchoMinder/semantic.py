@@ -0,0 +1,212 @@
+import os
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # semantic recall is optional (pip install "echominder[semantic]")
+    np = None
+
+from agentuity_agents.EchoMinder.memory_index import tokenize
+
+# =========================
+# 🧭 Semantic Recall (embeddings + top-k matrix search)
+# =========================
+
+
+def numpy_available() -> bool:
+    return np is not None
+
+
+class HashingEmbedder:
+    """
+    Offline embedder using the hashing trick.
+    Word unigrams, bigrams and character trigrams are hashed into a fixed number
+    of signed buckets, then L2-normalized so a dot product is a cosine similarity.
+    Any object exposing `name`, `dim` and `embed(texts) -> float32 matrix`
+    can be used instead (e.g. a TF-IDF or sentence-transformer wrapper).
+    """
+
+    name = "hash"
+
+    def __init__(self, dim: int = 512, stop_words: Iterable[str] = ()):
+        self.dim = dim
+        self.stop_words = frozenset(stop_words)
+
+    def _features(self, text: str) -> List[Tuple[str, float]]:
+        tokens = [t for t in tokenize(text) if len(t) > 1 and t not in self.stop_words]
+        features = [(t, 1.0) for t in tokens]
+        features += [(f"{a} {b}", 0.5) for a, b in zip(tokens, tokens[1:])]
+        for token in tokens:
+            if len(token) > 3:
+                features += [(f"#{token[i:i + 3]}", 0.25) for i in range(len(token) - 2)]
+        return features
+
+    def embed(self, texts: List[str]) -> "np.ndarray":
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature, weight in self._features(text):
+                h = zlib.crc32(feature.encode("utf-8"))
+                out[row, h % self.dim] += weight if h & 0x80000000 else -weight
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return out / norms
+
+
+class VectorStore:
+    """
+    Contiguous float32 matrix of memory embeddings, one row per stored memory.
+
+    With a `path`, rows are appended to a raw float32 file and the matrix is
+    memory-mapped from it, so vectors are computed once and survive restarts.
+    Without a path, rows live in an in-memory buffer that doubles as it grows.
+    Removed rows are masked out and compacted away once they outnumber live ones.
+    """
+
+    def __init__(self, embedder, path: Optional[str] = None, capacity: int = 256):
+        if np is None:
+            raise RuntimeError("Semantic recall requires numpy")
+        self.embedder = embedder
+        self.dim = embedder.dim
+        self.path = path
+        self._count = 0
+        self._ids = np.empty(capacity, dtype=np.int64)
+        self._live = np.zeros(capacity, dtype=bool)
+        self._rows: Dict[int, int] = {}  # doc id -> row
+        self._dead = 0
+        self._buffer = None if path else np.empty((capacity, self.dim), dtype=np.float32)
+        self._mapped = None
+        self._mapped_rows = 0
+        self._file = None
+
+    # -------------------------
+    # Bookkeeping
+    # -------------------------
+    def __len__(self) -> int:
+        return self._count - self._dead
+
+    def _reserve(self, rows: int) -> None:
+        capacity = len(self._ids)
+        if rows <= capacity:
+            return
+        while capacity < rows:
+            capacity *= 2
+        self._ids = np.resize(self._ids, capacity)
+        live = np.zeros(capacity, dtype=bool)
+        live[:self._count] = self._live[:self._count]
+        self._live = live
+        if self._buffer is not None:
+            buffer = np.empty((capacity, self.dim), dtype=np.float32)
+            buffer[:self._count] = self._buffer[:self._count]
+            self._buffer = buffer
+
+    def _open_file(self, mode: str) -> None:
+        if self._file is not None:
+            self._file.close()
+        self._mapped = None
+        self._mapped_rows = 0
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._file = open(self.path, mode)
+
+    def _matrix(self) -> "np.ndarray":
+        if self._buffer is not None:
+            return self._buffer[:self._count]
+        if self._mapped_rows != self._count:
+            self._file.flush()
+            self._mapped = (
+                np.memmap(self.path, dtype=np.float32, mode="r", shape=(self._count, self.dim))
+                if self._count else None
+            )
+            self._mapped_rows = self._count
+        if self._mapped is None:
+            return np.empty((0, self.dim), dtype=np.float32)
+        return self._mapped
+
+    def _append_rows(self, doc_ids: List[int], vectors: "np.ndarray") -> None:
+        start = self._count
+        end = start + len(doc_ids)
+        self._reserve(end)
+        self._ids[start:end] = doc_ids
+        self._live[start:end] = True
+        if self._buffer is not None:
+            self._buffer[start:end] = vectors
+        else:
+            self._file.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+        for offset, doc_id in enumerate(doc_ids):
+            self._rows[doc_id] = start + offset
+        self._count = end
+
+    # -------------------------
+    # Mutations (driven by MemoryLayer)
+    # -------------------------
+    def sync(self, docs: Dict[int, str]) -> None:
+        """Adopt the vectors already on disk if they match `docs`, else embed everything"""
+        doc_ids = list(docs)
+        self._count = 0
+        self._dead = 0
+        self._rows.clear()
+        if self.path:
+            row_bytes = 4 * self.dim
+            size = os.path.getsize(self.path) if os.path.exists(self.path) else -1
+            if size == len(doc_ids) * row_bytes:
+                self._open_file("ab")
+                self._reserve(len(doc_ids))
+                self._ids[:len(doc_ids)] = doc_ids
+                self._live[:len(doc_ids)] = True
+                self._rows = {doc_id: row for row, doc_id in enumerate(doc_ids)}
+                self._count = len(doc_ids)
+                return
+            self._open_file("wb")
+        if doc_ids:
+            self._append_rows(doc_ids, self.embedder.embed(list(docs.values())))
+
+    def add(self, doc_id: int, text: str) -> None:
+        self._append_rows([doc_id], self.embedder.embed([text]))
+
+    def discard(self, doc_id: int) -> None:
+        row = self._rows.pop(doc_id, None)
+        if row is None:
+            return
+        self._live[row] = False
+        self._dead += 1
+        if self._dead > len(self._rows):
+            self._compact()
+
+    def clear(self) -> None:
+        self._count = 0
+        self._dead = 0
+        self._rows.clear()
+        if self.path:
+            self._open_file("wb")
+
+    def _compact(self) -> None:
+        keep = np.flatnonzero(self._live[:self._count])
+        ids = self._ids[keep].copy()
+        vectors = np.array(self._matrix()[keep], dtype=np.float32)
+        self.clear()
+        self._append_rows(ids.tolist(), vectors)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._mapped = None
+
+    # -------------------------
+    # Query
+    # -------------------------
+    def search(self, query_vector: "np.ndarray", k: int, min_score: float = 0.0) -> List[Tuple[int, float]]:
+        """Return up to k (doc id, cosine score) pairs, best first"""
+        if k <= 0 or len(self) == 0:
+            return []
+        scores = self._matrix() @ query_vector
+        if self._dead:
+            scores = np.where(self._live[:self._count], scores, -np.inf)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            (int(self._ids[row]), float(scores[row]))
+            for row in top
+            if scores[row] > min_score
+        ]
@@ -0,0 +1,533 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from agentuity_agents.EchoMinder.journal import LongTermJournal
+from agentuity_agents.EchoMinder.memory_index import MemoryLayer
+
+# =========================
+# 🗄️ Memory Storage Backends
+# =========================
+
+class MemoryStore:
+    """
+    Persistence behind the three in-process memory layers.
+
+    The agent applies every mutation to its MemoryLayer objects first and then
+    mirrors it here. Backends that can rank keyword matches themselves set
+    `supports_search` and implement `search`; otherwise recall uses the
+    in-process inverted index.
+    """
+
+    supports_search = False
+
+    def load(self, layer: str) -> List[str]:
+        return []
+
+    def load_levels(self, layer: str) -> List[int]:
+        """Compaction levels aligned with the last `load(layer)`; empty means all 0"""
+        return []
+
+    def load_created(self, layer: str) -> List[float]:
+        """Creation times aligned with the last `load(layer)`; empty when the backend has none"""
+        return []
+
+    def bind(self, layer: str, doc_ids: List[int]) -> None:
+        """Doc ids the layer gave the memories of the last `load(layer)`, in the same order"""
+        pass
+
+    def append(self, layer: str, memory: str, level: int = 0, doc_id: Optional[int] = None) -> None:
+        pass
+
+    def replace(
+        self,
+        layer: str,
+        removed_ids: List[int],
+        removed: List[str],
+        summary: str,
+        level: int,
+        doc_id: Optional[int] = None,
+    ) -> None:
+        """Atomically replace `removed` memories (doc ids and texts) by one higher-level `summary`"""
+        pass
+
+    def remove(self, layer: str, doc_ids: List[int]) -> None:
+        """Delete exactly these memories (entries written meanwhile by other workers stay)"""
+        pass
+
+    def write_batch(self, appends: Dict[str, List[Tuple[int, str]]], removed: Dict[str, List[int]]) -> None:
+        """
+        Append many (doc id, memory) pairs per layer and remove `removed` doc
+        ids, as one commit where the backend supports it (bulk imports)
+        """
+        for layer, entries in appends.items():
+            for doc_id, memory in entries:
+                self.append(layer, memory, doc_id=doc_id)
+        for layer, doc_ids in removed.items():
+            self.remove(layer, doc_ids)
+
+    def clear(self, layer: str) -> None:
+        pass
+
+    def save(self) -> None:
+        """Make everything written so far durable and compact"""
+        pass
+
+    def save_later(self) -> Optional[Callable[[], Optional[str]]]:
+        """
+        Like `save`, but only capture the state on the caller's thread and
+        return a function that writes it (safe to run on another thread).
+        That function returns the fingerprint of what it wrote, or None if
+        the store changed meanwhile. None instead of a function: the store
+        can't take a snapshot right now; try again later
+        """
+        self.save()
+        fingerprint = self.fingerprint()
+        return lambda: fingerprint
+
+    def sync(self, layers: Dict[str, MemoryLayer]) -> bool:
+        """Pull changes made by other processes into `layers`; True if anything changed"""
+        return False
+
+    def fingerprint(self) -> Optional[str]:
+        """
+        Cheap identity of the persisted state, matched against warm-start
+        snapshots; None when the backend can't provide one
+        """
+        return None
+
+    def warm_state(self) -> Dict[str, Any]:
+        """Backend bookkeeping to restore along with a warm-start snapshot"""
+        return {}
+
+    def restore_warm_state(self, state: Dict[str, Any], layers: Dict[str, MemoryLayer]) -> None:
+        """Adopt a matching warm-start snapshot instead of running `load`"""
+        pass
+
+    def search(self, keywords: Iterable[str], limit: int) -> List[str]:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class JournalStore(MemoryStore):
+    """
+    Long-term memory in a JSON snapshot + JSONL journal. Short- and mid-term
+    live in-process and are written back to a small session file on save
+    (e.g. when the namespace is evicted from memory).
+    """
+
+    def __init__(self, journal: LongTermJournal, layers: Dict[str, MemoryLayer]):
+        self.journal = journal
+        self._layers = layers  # full layers, read when compacting / writing back
+        base, _ = os.path.splitext(journal.snapshot_path)
+        self.session_path = f"{base}.session.json"
+
+    def load(self, layer: str) -> List[str]:
+        if layer == "long":
+            return self.journal.load()
+        if not os.path.exists(self.session_path):
+            return []
+        with open(self.session_path, "r", encoding="utf-8") as f:
+            return json.load(f).get(layer, [])
+
+    def load_levels(self, layer: str) -> List[int]:
+        return self.journal.levels if layer == "long" else []
+
+    def _long_term_snapshot(self):
+        long_term = self._layers["long"]
+        return long_term.copy(), long_term.levels()
+
+    def append(self, layer: str, memory: str, level: int = 0, doc_id: Optional[int] = None) -> None:
+        if layer == "long":
+            self.journal.append(memory, self._long_term_snapshot, level)
+
+    def replace(
+        self,
+        layer: str,
+        removed_ids: List[int],
+        removed: List[str],
+        summary: str,
+        level: int,
+        doc_id: Optional[int] = None,
+    ) -> None:
+        if layer == "long":
+            self.journal.append_compaction(removed, summary, level, self._long_term_snapshot)
+
+    def write_batch(self, appends: Dict[str, List[Tuple[int, str]]], removed: Dict[str, List[int]]) -> None:
+        # Long-term entries go to the journal with one flush; short- and mid-term are written back on save
+        self.journal.append_many([memory for _, memory in appends.get("long", ())], self._long_term_snapshot)
+
+    def save(self) -> None:
+        self.journal.compact(self._long_term_snapshot())
+        self._write_session({layer: self._layers[layer].copy() for layer in ("short", "mid")})
+
+    def save_later(self) -> Optional[Callable[[], Optional[str]]]:
+        seq = self.journal.compact_later(self._long_term_snapshot())
+        if seq is None:
+            return None
+        session = {layer: self._layers[layer].copy() for layer in ("short", "mid")}
+
+        def write() -> Optional[str]:
+            self.journal.wait_for_compaction()
+            self._write_session(session)
+            return self.journal.unchanged_since(seq, self.fingerprint)
+
+        return write
+
+    def _write_session(self, session: Dict[str, List[str]]) -> None:
+        tmp_path = f"{self.session_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(session, f, ensure_ascii=False)
+        os.replace(tmp_path, self.session_path)
+
+    def fingerprint(self) -> Optional[str]:
+        # Size and mtime of every file `load` reads: any write since the warm snapshot changes one
+        stats = []
+        for path in (self.journal.snapshot_path, self.journal.rotated_path, self.journal.journal_path, self.session_path):
+            try:
+                stat = os.stat(path)
+                stats.append([stat.st_size, stat.st_mtime_ns])
+            except FileNotFoundError:
+                stats.append(None)
+        return json.dumps(stats)
+
+    def warm_state(self) -> Dict[str, Any]:
+        return self.journal.warm_state()
+
+    def restore_warm_state(self, state: Dict[str, Any], layers: Dict[str, MemoryLayer]) -> None:
+        self.journal.restore_warm_state(state, layers["long"].levels())
+
+    def close(self) -> None:
+        self.journal.close()
+
+
+class SharedConnection:
+    """One SQLite connection to a database file, used by every namespace's store in the process"""
+
+    def __init__(self, path: str, busy_timeout: float):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=busy_timeout, isolation_level=None, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.users = 0
+
+
+# Open shared connections by absolute database path; closed when their last store closes
+_connections: Dict[str, SharedConnection] = {}
+_connections_lock = threading.Lock()
+
+
+def _acquire_connection(
+    path: str, busy_timeout: float, prepare: Callable[[sqlite3.Connection], None]
+) -> SharedConnection:
+    key = os.path.abspath(path)
+    with _connections_lock:
+        shared = _connections.get(key)
+        if shared is None:
+            os.makedirs(os.path.dirname(key), exist_ok=True)
+            shared = SharedConnection(key, busy_timeout)
+            try:
+                prepare(shared.conn)
+            except Exception:
+                shared.conn.close()
+                raise
+            _connections[key] = shared
+        shared.users += 1
+        return shared
+
+
+def _release_connection(shared: SharedConnection) -> None:
+    with _connections_lock:
+        shared.users -= 1
+        if shared.users > 0:
+            return
+        _connections.pop(shared.path, None)
+    with shared.lock:
+        shared.conn.close()
+
+
+class SQLiteStore(MemoryStore):
+    """
+    All three layers in one SQLite database (WAL mode), shareable by several
+    server worker processes. An external-content FTS5 table mirrors the memory
+    text so keyword recall with the "index" ranking is matched and BM25-ranked
+    inside SQLite.
+    Every namespace (user/session) gets its own rows in the same database,
+    and all of a process's namespaces share one connection to it.
+    The row id of every loaded or written memory is kept by doc id, so
+    removals delete exactly those rows and never ones another worker added.
+    """
+
+    supports_search = True
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS memories (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            namespace TEXT NOT NULL DEFAULT 'default',
+            layer TEXT NOT NULL,
+            level INTEGER NOT NULL DEFAULT 0,
+            text TEXT NOT NULL,
+            created_at REAL NOT NULL
+        );
+        CREATE VIRTUAL TABLE IF NOT EXISTS memories_fts USING fts5(
+            text, content='memories', content_rowid='id', prefix='2 3'
+        );
+        CREATE TRIGGER IF NOT EXISTS memories_ai AFTER INSERT ON memories BEGIN
+            INSERT INTO memories_fts(rowid, text) VALUES (new.id, new.text);
+        END;
+        CREATE TRIGGER IF NOT EXISTS memories_ad AFTER DELETE ON memories BEGIN
+            INSERT INTO memories_fts(memories_fts, rowid, text) VALUES ('delete', old.id, old.text);
+        END;
+    """
+
+    def __init__(self, path: str, namespace: str = "default", busy_timeout: float = 5.0):
+        self.path = path
+        self.namespace = namespace
+        self._shared = _acquire_connection(path, busy_timeout, self._prepare)
+        self._conn = self._shared.conn
+        self._lock = self._shared.lock  # one transaction at a time on the shared connection
+        with self._lock:
+            self._data_version = self._version()
+        self._last_long_id = 0
+        self._levels: List[int] = []
+        self._created: List[float] = []
+        self._loaded_rows: List[int] = []
+        self._rows: Dict[str, Dict[int, int]] = {layer: {} for layer in ("short", "mid", "long")}  # doc id -> row id
+
+    @classmethod
+    def _prepare(cls, conn: sqlite3.Connection) -> None:
+        """Set up a newly opened database connection (once per process and file)"""
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(cls.SCHEMA)
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(memories)")}
+        if "namespace" not in columns:  # databases created before namespaces existed
+            conn.execute("ALTER TABLE memories ADD COLUMN namespace TEXT NOT NULL DEFAULT 'default'")
+        if "level" not in columns:  # ... and before long-term compaction levels
+            conn.execute("ALTER TABLE memories ADD COLUMN level INTEGER NOT NULL DEFAULT 0")
+        conn.execute("DROP INDEX IF EXISTS memories_layer_id")
+        conn.execute("CREATE INDEX IF NOT EXISTS memories_ns_layer_id ON memories(namespace, layer, id)")
+
+    def _version(self) -> int:
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _layer_rows(self, layer: str, after_id: int = 0):
+        return self._conn.execute(
+            "SELECT id, text, level, created_at FROM memories WHERE namespace = ? AND layer = ? AND id > ? ORDER BY id",
+            (self.namespace, layer, after_id),
+        ).fetchall()
+
+    def load(self, layer: str) -> List[str]:
+        with self._lock:
+            rows = self._layer_rows(layer)
+        self._loaded_rows = [row_id for row_id, _, _, _ in rows]
+        self._levels = [level for _, _, level, _ in rows]
+        self._created = [created or 0.0 for _, _, _, created in rows]
+        if layer == "long" and rows:
+            self._last_long_id = rows[-1][0]
+        return [text for _, text, _, _ in rows]
+
+    def load_levels(self, layer: str) -> List[int]:
+        return self._levels
+
+    def load_created(self, layer: str) -> List[float]:
+        return self._created
+
+    def bind(self, layer: str, doc_ids: List[int]) -> None:
+        self._rows[layer] = dict(zip(doc_ids, self._loaded_rows))
+
+    def _insert(self, layer: str, memory: str, level: int) -> int:
+        return self._conn.execute(
+            "INSERT INTO memories(namespace, layer, level, text, created_at) VALUES (?, ?, ?, ?, ?)",
+            (self.namespace, layer, level, memory, time.time()),
+        ).lastrowid
+
+    def append(self, layer: str, memory: str, level: int = 0, doc_id: Optional[int] = None) -> None:
+        with self._lock:
+            row_id = self._insert(layer, memory, level)
+        if doc_id is not None:
+            self._rows[layer][doc_id] = row_id
+        if layer == "long":
+            self._last_long_id = row_id
+
+    def _delete(self, layer: str, doc_ids: Iterable[int]) -> None:
+        rows = self._rows[layer]
+        row_ids = [rows.pop(doc_id) for doc_id in doc_ids if doc_id in rows]
+        self._conn.executemany("DELETE FROM memories WHERE id = ?", ((row_id,) for row_id in row_ids))
+
+    def replace(
+        self,
+        layer: str,
+        removed_ids: List[int],
+        removed: List[str],
+        summary: str,
+        level: int,
+        doc_id: Optional[int] = None,
+    ) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._delete(layer, removed_ids)
+                row_id = self._insert(layer, summary, level)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        if doc_id is not None:
+            self._rows[layer][doc_id] = row_id
+        if layer == "long":
+            self._last_long_id = row_id
+
+    def remove(self, layer: str, doc_ids: List[int]) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._delete(layer, doc_ids)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def write_batch(self, appends: Dict[str, List[Tuple[int, str]]], removed: Dict[str, List[int]]) -> None:
+        """All inserts and deletes in one transaction (one WAL commit instead of one per row)"""
+        inserted: List[Tuple[str, int, int]] = []
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for layer, entries in appends.items():
+                    for doc_id, memory in entries:
+                        inserted.append((layer, doc_id, self._insert(layer, memory, 0)))
+                for layer, doc_ids in removed.items():
+                    self._delete(layer, doc_ids)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        for layer, doc_id, row_id in inserted:
+            self._rows[layer][doc_id] = row_id
+            if layer == "long":
+                self._last_long_id = row_id
+
+    def clear(self, layer: str) -> None:
+        """Delete the layer's rows this store loaded or wrote"""
+        self.remove(layer, list(self._rows[layer]))
+
+    def save(self) -> None:
+        with self._lock:
+            self._conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+
+    def sync(self, layers: Dict[str, MemoryLayer]) -> bool:
+        """
+        `PRAGMA data_version` only changes when another connection commits, so
+        the common single-process case costs one pragma per call. Short- and
+        mid-term are tiny and reloaded whole; long-term is append-only and
+        pulled incrementally by id (reloaded whole if rows were removed).
+        """
+        with self._lock:
+            version = self._version()
+            if version == self._data_version:
+                return False
+            self._data_version = version
+            for layer in ("short", "mid"):
+                rows = self._layer_rows(layer)
+                row_ids = [row_id for row_id, _, _, _ in rows]
+                if row_ids == list(self._rows[layer].values()):
+                    # Usually another process committed to another namespace; keeping the layer keeps the
+                    # doc ids an in-flight merge will drop
+                    continue
+                layers[layer].replace(
+                    [text for _, text, _, _ in rows], [level for _, _, level, _ in rows],
+                    [created or 0.0 for _, _, _, created in rows],
+                )
+                self._rows[layer] = dict(zip((doc_id for doc_id, _ in layers[layer].items()), row_ids))
+            count = self._conn.execute(
+                "SELECT COUNT(*) FROM memories WHERE namespace = ? AND layer = 'long'",
+                (self.namespace,),
+            ).fetchone()[0]
+            new_rows = self._layer_rows("long", self._last_long_id)
+            if count != len(layers["long"]) + len(new_rows):
+                new_rows = self._layer_rows("long")
+                layers["long"].clear()
+                self._rows["long"] = {}
+        for row_id, text, level, _ in new_rows:
+            self._rows["long"][layers["long"].append(text, level)] = row_id
+        if new_rows:
+            self._last_long_id = new_rows[-1][0]
+        return True
+
+    def fingerprint(self) -> Optional[str]:
+        # Rows are only ever inserted with new ids or deleted, so any change moves count, max or sum
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*), MAX(id), SUM(id) FROM memories WHERE namespace = ?", (self.namespace,)
+            ).fetchone()
+        return f"sqlite:{row[0]}:{row[1]}:{row[2]}"
+
+    def warm_state(self) -> Dict[str, Any]:
+        return {
+            "last_long_id": self._last_long_id,
+            "row_ids": {layer: list(rows.values()) for layer, rows in self._rows.items()},
+        }
+
+    def restore_warm_state(self, state: Dict[str, Any], layers: Dict[str, MemoryLayer]) -> None:
+        row_ids = state["row_ids"]  # snapshots without row ids fall back to a cold load
+        for layer, rows in row_ids.items():
+            doc_ids = layers[layer].doc_ids()
+            if len(doc_ids) != len(rows):
+                raise ValueError(f"warm snapshot has {len(rows)} {layer}-term row ids for {len(doc_ids)} memories")
+            self._rows[layer] = dict(zip(doc_ids, rows))
+        self._last_long_id = state.get("last_long_id", 0)
+
+    @staticmethod
+    def _match_expression(keywords: Iterable[str]) -> str:
+        """OR of quoted prefix terms, mirroring the in-process index's prefix match"""
+        terms = []
+        for keyword in keywords:
+            keyword = keyword.strip()
+            if keyword:
+                terms.append('"' + keyword.replace('"', '""') + '"*')
+        return " OR ".join(sorted(terms))
+
+    def search(self, keywords: Iterable[str], limit: int) -> List[str]:
+        expression = self._match_expression(keywords)
+        if not expression or limit <= 0:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT text, MIN(score) AS best FROM ("
+                "  SELECT m.text AS text, memories_fts.rank AS score"
+                "  FROM memories_fts JOIN memories m ON m.id = memories_fts.rowid"
+                "  WHERE memories_fts MATCH ? AND m.namespace = ?"
+                ") GROUP BY text ORDER BY best LIMIT ?",
+                (expression, self.namespace, limit),
+            ).fetchall()
+        return [text for text, _ in rows]
+
+    def close(self) -> None:
+        if self._shared is not None:
+            _release_connection(self._shared)
+            self._shared = None
+
+
+def create_store(
+    backend: str,
+    long_term_path: str,
+    layers: Dict[str, MemoryLayer],
+    namespace: str = "default",
+    sqlite_path: str = "",
+    **journal_options,
+) -> MemoryStore:
+    """
+    Build the configured backend ("journal" or "sqlite") for one namespace.
+    The journal backend uses `long_term_path` as its snapshot file; the SQLite
+    backend keeps every namespace in the shared database at `sqlite_path`.
+    """
+    if backend == "sqlite":
+        return SQLiteStore(sqlite_path, namespace)
+    if backend != "journal":
+        print(f"[EchoMinderNew] Unknown storage backend {backend!r}, using journal")
+    return JournalStore(LongTermJournal(long_term_path, **journal_options), layers)
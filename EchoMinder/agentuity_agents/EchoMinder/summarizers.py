@@ -0,0 +1,200 @@
+import re
+from typing import Dict, List, Tuple
+
+from agentuity_agents.EchoMinder.memory_index import tokenize
+from agentuity_agents.EchoMinder.metrics import metrics
+
+# =========================
+# 📝 Pluggable Summarizers (local extractive tier + LLM tier)
+# =========================
+SENTENCE_PATTERN = re.compile(r"[^.!?\n]+[.!?]*")
+GREETINGS = frozenset({
+    "hi", "hello", "hey", "yo", "thanks", "thank", "thx", "ok", "okay", "k", "yes", "yeah", "yep",
+    "no", "nope", "sure", "bye", "goodbye", "cool", "great", "nice", "lol", "good", "morning",
+    "evening", "night", "you", "there", "please", "awesome",
+})
+STOP_WORDS = frozenset({
+    "a", "an", "the", "and", "or", "but", "of", "to", "in", "on", "at", "for", "with", "is", "are",
+    "was", "were", "be", "it", "this", "that", "so", "just", "very", "can", "could", "would", "do",
+    "does", "did", "you", "your", "what", "how", "why", "when", "about", "some", "any", "me", "i",
+})
+# First-person statements that usually carry a fact worth remembering
+FACT_PATTERN = re.compile(
+    r"\b(i am|i'm|i was|my|mine|i have|i've|i (?:really |also |usually |always |never )?"
+    r"(?:like|love|hate|prefer|enjoy|want|need|use|work|live|study|speak|own|plan|am))\b",
+    re.IGNORECASE,
+)
+ADVERBS = r"(?:really|also|just|never|always|still|usually|often|mostly|only|now)"
+FIXED_VERBS = {"do": "does", "have": "has", "don't": "doesn't", "go": "goes"}
+UNCHANGED_VERBS = frozenset({
+    "was", "will", "would", "can", "could", "should", "must", "might", "may", "did", "didn't",
+    "can't", "won't", "wouldn't", "shouldn't", "had", "used",
+})
+
+
+def third_person(verb: str) -> str:
+    """Conjugate a base-form verb for "the user" (like → likes, study → studies)"""
+    lowered = verb.lower()
+    if lowered in FIXED_VERBS:
+        return FIXED_VERBS[lowered]
+    if lowered in UNCHANGED_VERBS:
+        return verb
+    if lowered.endswith(("s", "sh", "ch", "x", "z", "o")):
+        return verb + "es"
+    if len(lowered) > 1 and lowered.endswith("y") and lowered[-2] not in "aeiou":
+        return verb[:-1] + "ies"
+    return verb + "s"
+
+
+def to_third_person(text: str) -> str:
+    """Rewrite first-person statements about the user as third-person facts"""
+    text = re.sub(r"\b(?:I am|I'm|im)\b", "the user is", text, flags=re.IGNORECASE)
+    text = re.sub(r"\b(?:I've|I have)\b", "the user has", text, flags=re.IGNORECASE)
+    text = re.sub(
+        rf"\b[Ii]\s+({ADVERBS}\s+)?([A-Za-z']+)\b",
+        lambda m: f"the user {m.group(1) or ''}{third_person(m.group(2))}",
+        text,
+    )
+    text = re.sub(r"\bmy\b", "the user's", text, flags=re.IGNORECASE)
+    text = re.sub(r"\b(?:me|myself)\b", "the user", text, flags=re.IGNORECASE)
+    text = re.sub(r"\bmine\b", "the user's", text, flags=re.IGNORECASE)
+    return text
+
+
+def is_small_talk(text: str) -> bool:
+    """Greetings / acknowledgements with nothing worth remembering"""
+    words = tokenize(text)
+    return not words or all(word in GREETINGS for word in words)
+
+
+class Summarizer:
+    """Turns one message into a short memory; subclass and override `summarize`"""
+
+    name = "summarizer"
+
+    async def summarize(self, text: str, is_user_message: bool = True) -> str:
+        raise NotImplementedError
+
+
+class ExtractiveSummarizer(Summarizer):
+    """
+    Local, dependency-free summarizer. Sentences are scored by first-person
+    fact cues, content-word density and position (questions and small talk
+    score low). The best ones are kept in their original order within
+    `max_chars`, and user statements are rewritten in the third person
+    ("I love Python" → "The user loves Python").
+    """
+
+    name = "extractive"
+
+    def __init__(self, max_chars: int = 200):
+        self.max_chars = max_chars
+
+    def _score(self, sentence: str, position: int) -> float:
+        words = tokenize(sentence)
+        if not words or all(word in GREETINGS for word in words):
+            return -1.0
+        content = [word for word in words if len(word) > 2 and word not in STOP_WORDS]
+        score = len(content) / len(words) + min(len(content), 8) / 8
+        if FACT_PATTERN.search(sentence):
+            score += 2.0
+        if sentence.rstrip().endswith("?"):
+            score -= 1.0
+        if position == 0:
+            score += 0.25
+        return score
+
+    def extract(self, text: str, is_user_message: bool = True) -> str:
+        text = " ".join(text.split())
+        if not text:
+            return ""
+        if is_small_talk(text):
+            return f"{'User' if is_user_message else 'Assistant'} said: {text}"
+        sentences = [s.strip() for s in SENTENCE_PATTERN.findall(text) if s.strip()]
+        ranked: List[Tuple[float, int]] = sorted(
+            ((self._score(sentence, i), i) for i, sentence in enumerate(sentences)),
+            key=lambda item: (-item[0], item[1]),
+        )
+        chosen: List[int] = []
+        length = 0
+        for score, i in ranked:
+            if score < 0 and chosen:
+                break
+            if chosen and length + len(sentences[i]) + 1 > self.max_chars:
+                continue
+            chosen.append(i)
+            length += len(sentences[i]) + 1
+        kept = [sentences[i] for i in sorted(chosen)]
+        if is_user_message:
+            kept = [to_third_person(sentence) for sentence in kept]
+        summary = " ".join(sentence[:1].upper() + sentence[1:] for sentence in kept)
+        if len(summary) > self.max_chars:
+            summary = summary[:self.max_chars].rsplit(" ", 1)[0] + "…"
+        if all(sentence.endswith("?") for sentence in kept):
+            summary = f"{'User' if is_user_message else 'Assistant'} asked: {summary}"
+        return summary
+
+    async def summarize(self, text: str, is_user_message: bool = True) -> str:
+        return self.extract(text, is_user_message)
+
+
+class SummaryRouter:
+    """
+    Decides per message whether the local tier is good enough. The default
+    "llm" mode sends everything to the LLM. In the opt-in "auto" mode, small
+    talk and messages of at most `max_local_words` words (already about as
+    short as a summary) stay local. "local" never calls the LLM.
+    """
+
+    def __init__(self, mode: str = "llm", max_local_words: int = 16):
+        self.mode = mode
+        self.max_local_words = max_local_words
+
+    def choose(self, text: str, is_user_message: bool = True) -> str:
+        if self.mode in ("local", "llm"):
+            return self.mode
+        if is_small_talk(text):
+            return "local"
+        if len(text.split()) <= self.max_local_words:
+            return "local"
+        return "llm"
+
+
+class TieredSummarizer(Summarizer):
+    """
+    Routes each message to the `local` or `remote` summarizer. If the remote
+    tier fails (upstream down, circuit open, rate limited), the local tier
+    answers instead, so a summary is always produced.
+    """
+
+    name = "tiered"
+
+    def __init__(self, local: Summarizer, remote: Summarizer, router: SummaryRouter):
+        self.local = local
+        self.remote = remote
+        self.router = router
+        self.local_calls = 0
+        self.remote_calls = 0
+        self.fallbacks = 0
+
+    async def summarize(self, text: str, is_user_message: bool = True) -> str:
+        if self.router.choose(text, is_user_message) == "local":
+            self.local_calls += 1
+            metrics.inc("local_summaries")
+            return await self.local.summarize(text, is_user_message)
+        self.remote_calls += 1
+        try:
+            return await self.remote.summarize(text, is_user_message)
+        except Exception as e:
+            self.fallbacks += 1
+            metrics.inc("summary_fallbacks")
+            return await self.local.summarize(text, is_user_message)
+
+    def stats(self) -> Dict[str, float]:
+        total = self.local_calls + self.remote_calls
+        return {
+            "local": self.local_calls,
+            "remote": self.remote_calls,
+            "fallbacks": self.fallbacks,
+            "local_rate": self.local_calls / total if total else 0.0,
+        }
@@ -0,0 +1,161 @@
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+# =========================
+# 🗃️ Content-Addressed Summary Cache
+# =========================
+
+
+class SummaryCache:
+    """
+    Memoizes LLM summaries keyed by a hash of (model, system prompt, role, text).
+
+    Tier 1 is an in-process LRU; tier 2 (optional) is a small SQLite file so
+    cached summaries survive restarts and are shared between workers. Both tiers
+    expire entries after `ttl` seconds and evict the oldest beyond their size
+    limit. Concurrent misses for the same key share a single upstream call.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 2048,
+        ttl: float = 7 * 24 * 3600,
+        disk_path: Optional[str] = None,
+        disk_max_entries: int = 100_000,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.disk_max_entries = disk_max_entries
+        self._memory: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.coalesced = 0  # misses that joined an in-flight call instead of making one
+        self.evictions = 0
+        self._disk = None
+        self._disk_lock = threading.Lock()
+        self._disk_puts = 0
+        if disk_path:
+            os.makedirs(os.path.dirname(os.path.abspath(disk_path)), exist_ok=True)
+            self._disk = sqlite3.connect(disk_path, isolation_level=None, check_same_thread=False)
+            self._disk.execute("PRAGMA journal_mode=WAL")
+            self._disk.execute(
+                "CREATE TABLE IF NOT EXISTS summaries ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._disk.execute("CREATE INDEX IF NOT EXISTS summaries_created ON summaries(created_at)")
+
+    @staticmethod
+    def key(model: str, system_prompt: str, role: str, text: str) -> str:
+        digest = hashlib.sha256()
+        for part in (model, system_prompt, role, text):
+            encoded = part.encode("utf-8")
+            digest.update(len(encoded).to_bytes(8, "big"))
+            digest.update(encoded)
+        return digest.hexdigest()
+
+    # -------------------------
+    # Lookup / store
+    # -------------------------
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        entry = self._memory.get(key)
+        if entry is not None:
+            created_at, value = entry
+            if now - created_at <= self.ttl:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._memory[key]
+        if self._disk is not None:
+            with self._disk_lock:
+                row = self._disk.execute(
+                    "SELECT value, created_at FROM summaries WHERE key = ?", (key,)
+                ).fetchone()
+            if row is not None and now - row[1] <= self.ttl:
+                self._remember(key, row[0], row[1])
+                self.hits += 1
+                self.disk_hits += 1
+                return row[0]
+        self.misses += 1
+        return None
+
+    def _remember(self, key: str, value: str, created_at: float) -> None:
+        self._memory[key] = (created_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def put(self, key: str, value: str) -> None:
+        now = time.time()
+        self._remember(key, value, now)
+        if self._disk is None:
+            return
+        with self._disk_lock:
+            self._disk.execute(
+                "INSERT OR REPLACE INTO summaries(key, value, created_at) VALUES (?, ?, ?)",
+                (key, value, now),
+            )
+            self._disk_puts += 1
+            if self._disk_puts % 256 == 0:
+                self._trim_disk(now)
+
+    def _trim_disk(self, now: float) -> None:
+        self._disk.execute("DELETE FROM summaries WHERE created_at < ?", (now - self.ttl,))
+        self._disk.execute(
+            "DELETE FROM summaries WHERE key IN ("
+            "SELECT key FROM summaries ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+            (self.disk_max_entries,),
+        )
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[str]]) -> str:
+        """
+        Return the cached value or run `compute` once, even for concurrent callers.
+        The call runs in its own task, so a caller that is cancelled (the first
+        one included) stops waiting without cancelling it for the others.
+        """
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            return await asyncio.shield(pending)
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        task = asyncio.get_running_loop().create_task(compute())
+        self._inflight[key] = task
+        task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Future) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if task.cancelled():
+            return
+        if task.exception() is None:  # also marks a failure retrieved when nobody was waiting
+            self.put(key, task.result())
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self._memory),
+        }
+
+    def clear(self) -> None:
+        self._memory.clear()
+        if self._disk is not None:
+            with self._disk_lock:
+                self._disk.execute("DELETE FROM summaries")
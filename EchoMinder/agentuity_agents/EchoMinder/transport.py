@@ -0,0 +1,241 @@
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterable, Optional
+
+import httpx
+
+# =========================
+# 🌐 Resilient Pooled HTTP Transport
+# =========================
+# Usable by any httpx.AsyncClient, including AsyncOpenAI(http_client=create_http_client())
+# Kept as an identical copy of EchoMind_backup/agentuity_agents/EchoMind/transport.py:
+# each project is bundled and deployed on its own from its directory, so neither can import
+# the other. EchoMinder/tests/test_transport.py fails as soon as the two copies drift apart.
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Only these requests are hedged: sending them twice has the same effect as sending them once.
+# A POST (e.g. a chat completion) is hedged only when the caller set an Idempotency-Key header,
+# otherwise a hedge would run, and bill, the same completion twice.
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+
+
+class CircuitOpenError(httpx.TransportError):
+    """Raised without contacting the upstream while the circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """
+    Fails fast after `failure_threshold` consecutive upstream failures.
+
+    closed → open: requests are rejected for `reset_timeout` seconds.
+    open → half-open: one probe request is let through; its success closes
+    the circuit again, its failure re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._probing or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self._probing = False
+
+
+class ResilientTransport(httpx.AsyncBaseTransport):
+    """
+    Wraps a pooled keep-alive transport with:
+    - bounded concurrency (at most `max_concurrency` upstream requests in flight)
+    - retries of network errors and 429/5xx with full-jitter exponential backoff
+      (honoring Retry-After)
+    - a circuit breaker that fails fast while the upstream keeps failing
+    - optional hedging: if no response arrived after `hedge_after` seconds a
+      second identical request is sent and the first response wins. Hedges are
+      only sent while a concurrency slot is free and stay within `hedge_budget`
+      (fraction of requests), so they cut tail latency without piling onto an
+      already saturated upstream. Only idempotent requests are hedged (see
+      `hedgeable`); other requests are sent once per attempt
+    """
+
+    def __init__(
+        self,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        max_concurrency: int = 16,
+        retries: int = 2,
+        backoff_base: float = 0.25,
+        backoff_max: float = 4.0,
+        hedge_after: Optional[float] = None,
+        hedge_budget: float = 0.1,
+        breaker: Optional[CircuitBreaker] = None,
+        retry_statuses: Iterable[int] = RETRY_STATUSES,
+    ):
+        self._transport = transport or httpx.AsyncHTTPTransport()
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge_after = hedge_after
+        self.hedge_budget = hedge_budget
+        self.breaker = breaker or CircuitBreaker()
+        self.retry_statuses = frozenset(retry_statuses)
+        self.requests = 0
+        self.attempts = 0
+        self.retried = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.rejected = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        await request.aread()  # buffer the body so it can be re-sent
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                self.rejected += 1
+                raise CircuitOpenError(f"Circuit open for {request.url.host}", request=request)
+            last = attempt >= self.retries
+            try:
+                response = await self._send_hedged(request)
+            except httpx.TransportError:
+                self.breaker.record_failure()
+                if last:
+                    raise
+                delay = self._backoff(attempt)
+            else:
+                if response.status_code >= 500:
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+                if last or response.status_code not in self.retry_statuses:
+                    return response
+                delay = self._backoff(attempt, response.headers.get("retry-after"))
+                await response.aclose()
+            self.retried += 1
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        if retry_after:
+            try:
+                return min(self.backoff_max, max(0.0, float(retry_after)))
+            except ValueError:
+                try:
+                    wait = parsedate_to_datetime(retry_after).timestamp() - time.time()
+                    return min(self.backoff_max, max(0.0, wait))
+                except (TypeError, ValueError):
+                    pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    async def _send(self, request: httpx.Request) -> httpx.Response:
+        async with self._slots:
+            self.attempts += 1
+            return await self._transport.handle_async_request(request)
+
+    @staticmethod
+    def hedgeable(request: httpx.Request) -> bool:
+        """Whether a duplicate of `request` is harmless to send"""
+        return request.method in IDEMPOTENT_METHODS or IDEMPOTENCY_HEADER in request.headers
+
+    async def _send_hedged(self, request: httpx.Request) -> httpx.Response:
+        if self.hedge_after is None or not self.hedgeable(request):
+            return await self._send(request)
+        primary = asyncio.ensure_future(self._send(request))
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=self.hedge_after)
+        except asyncio.CancelledError:
+            primary.add_done_callback(_close_response)
+            primary.cancel()
+            raise
+        if done or self._slots.locked() or self.hedged >= self.hedge_budget * self.requests:
+            return await primary
+        self.hedged += 1
+        hedge = asyncio.ensure_future(self._send(request))
+        pending = {primary, hedge}
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        error = task.exception()
+                        continue
+                    if task is hedge:
+                        self.hedge_wins += 1
+                    for loser in pending:
+                        loser.add_done_callback(_close_response)
+                        loser.cancel()
+                    for other in done - {task}:
+                        _close_response(other)
+                    return task.result()
+            raise error
+        except asyncio.CancelledError:
+            for task in pending:
+                task.add_done_callback(_close_response)
+                task.cancel()
+            raise
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "requests": self.requests,
+            "attempts": self.attempts,
+            "retried": self.retried,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "rejected": self.rejected,
+            "breaker": self.breaker.state,
+        }
+
+
+def _close_response(task: "asyncio.Future") -> None:
+    """Release the connection of a hedge loser that still produced a response"""
+    if task.cancelled() or task.exception() is not None:
+        return
+    asyncio.ensure_future(task.result().aclose())
+
+
+def create_http_client(
+    max_connections: int = 32,
+    max_keepalive: int = 16,
+    timeout: float = 20.0,
+    **transport_options,
+) -> httpx.AsyncClient:
+    """Shared keep-alive client; `transport_options` go to ResilientTransport"""
+    transport_options.setdefault("max_concurrency", max_connections)
+    pool = httpx.AsyncHTTPTransport(
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive),
+    )
+    return httpx.AsyncClient(
+        transport=ResilientTransport(pool, **transport_options),
+        timeout=httpx.Timeout(timeout, connect=5.0),
+    )
@@ -0,0 +1,229 @@
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Sequence
+from itertools import accumulate, chain
+from typing import Any, Dict, List, Optional
+
+from agentuity_agents.EchoMinder.dedup import HASH_SCHEME
+from agentuity_agents.EchoMinder.memory_index import MemoryLayer
+
+# =========================
+# 🔥 Warm-Start Snapshot (binary, memory-mapped)
+# =========================
+# Layout: MAGIC | u16 format version | u32 header length | JSON header | sections
+# The header maps each layer to (offset, length) sections holding its compaction
+# levels (int32), creation times (float64), recall counts (uint32) and last recall
+# times (float64), text end offsets (uint64, in characters), the UTF-8 text blob,
+# its keyword index (newline-separated sorted vocabulary, uint64 end offsets into
+# int64 postings of layer positions) and, when the layer has a near-duplicate
+# index, its LSH band keys (int64, `bands` per memory).
+# Restoring copies these sections into the layer's columns as they are: nothing
+# is re-tokenized, re-hashed or inserted one memory at a time.
+MAGIC = b"EMWARM\0\0"
+FORMAT_VERSION = 2
+PREFIX = struct.Struct("<8sHI")
+
+# Keyword arguments of MemoryLayer.restore for one layer
+LayerImage = Dict[str, Any]
+# Copies of everything a layer contributes to the snapshot, taken on the event loop so that
+# encoding and writing can run on another thread while the layer keeps changing
+LayerCapture = Dict[str, Any]
+
+
+class BandKeys(Sequence):
+    """Per-memory rows of a flat int64 array of LSH band keys (`bands` per memory)"""
+
+    def __init__(self, flat: "array[int]", bands: int):
+        self._flat = flat
+        self._bands = bands
+
+    def __len__(self) -> int:
+        return len(self._flat) // self._bands
+
+    def __getitem__(self, index: int) -> "array[int]":
+        start = index * self._bands
+        return self._flat[start:start + self._bands]
+
+
+def dedup_params(index) -> Dict[str, Any]:
+    """What band keys depend on: the MinHash setup and the interpreter's int hashing"""
+    return {
+        "num_perm": index.num_perm,
+        "bands": index.bands,
+        "rows": index.rows,
+        "hash": HASH_SCHEME,
+        "seed": index.seed,
+        "hash_width": sys.hash_info.width,
+        "python": list(sys.version_info[:2]),
+    }
+
+
+def capture_layer(layer) -> LayerCapture:
+    """Copy what `write_warm_snapshot` needs from a MemoryLayer (O(N) list copies, no encoding)"""
+    hits, accessed = layer.access_stats()
+    capture: LayerCapture = {
+        "memories": layer.copy(),
+        "levels": layer.levels(),
+        "created": layer.created(),
+        "hits": hits,
+        "accessed": accessed,
+        "nbytes": layer.nbytes,
+        "doc_ids": layer.doc_ids(),
+        "postings": layer.postings_table(),  # None: index deferred, a warm start defers it again
+        "dedup": None,
+    }
+    keys = layer.duplicates.key_table() if layer.duplicates is not None else None
+    if keys is not None:  # without keys (still being computed) a warm start queues the memories again
+        capture.update({"dedup": layer.duplicates, "keys": keys})
+    return capture
+
+
+def write_warm_snapshot(
+    path: str,
+    fingerprint: str,
+    store_state: Dict[str, Any],
+    layers: Dict[str, LayerCapture],
+) -> None:
+    """Atomically write every captured layer (see `capture_layer`) and its derived keys to `path`"""
+    header: Dict[str, Any] = {"fingerprint": fingerprint, "store": store_state, "layers": {}}
+    sections: List[bytes] = []
+    offset = 0
+
+    def add_section(data: bytes) -> List[int]:
+        nonlocal offset
+        sections.append(data)
+        offset += len(data)
+        return [offset - len(data), len(data)]
+
+    for name, layer in layers.items():
+        memories = layer["memories"]
+        meta: Dict[str, Any] = {
+            "count": len(memories),
+            "nbytes": layer["nbytes"],
+            "levels": add_section(array("i", layer["levels"]).tobytes()),
+            "created": add_section(array("d", layer["created"]).tobytes()),
+            "hits": add_section(array("I", layer["hits"]).tobytes()),
+            "accessed": add_section(array("d", layer["accessed"]).tobytes()),
+            "ends": add_section(array("Q", accumulate(map(len, memories))).tobytes()),
+            "text": add_section("".join(memories).encode("utf-8")),
+            "index": None,
+            "dedup": None,
+        }
+        if layer["postings"] is not None:
+            vocab, ends, positions = MemoryLayer.export_postings(layer["postings"], layer["doc_ids"])
+            meta["index"] = {
+                "vocab": add_section("\n".join(vocab).encode("utf-8")),
+                "ends": add_section(ends.tobytes()),
+                "postings": add_section(positions.tobytes()),
+            }
+        index = layer["dedup"]
+        if index is not None:
+            keys = index.export_keys(layer["doc_ids"], layer["keys"])
+            meta["dedup"] = dedup_params(index)
+            meta["keys"] = add_section(array("q", [k for row in keys for k in row]).tobytes())
+        header["layers"][name] = meta
+
+    header_bytes = json.dumps(header).encode("utf-8")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(PREFIX.pack(MAGIC, FORMAT_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        for data in sections:
+            f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class WarmSnapshot:
+    """
+    A memory-mapped warm-start file. Only the small JSON header is parsed on
+    open; layer sections are decoded on demand by `layer(name)`.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, header_length = PREFIX.unpack_from(self._map, 0)
+            if magic != MAGIC or version != FORMAT_VERSION:
+                raise ValueError(f"unsupported warm snapshot format in {path}")
+            start = PREFIX.size
+            self.header: Dict[str, Any] = json.loads(self._map[start:start + header_length])
+            self._base = start + header_length
+        except Exception:
+            self._map.close()
+            raise
+
+    @property
+    def fingerprint(self) -> str:
+        return self.header.get("fingerprint", "")
+
+    @property
+    def store_state(self) -> Dict[str, Any]:
+        return self.header.get("store", {})
+
+    def _section(self, span: List[int]) -> bytes:
+        start = self._base + span[0]
+        return self._map[start:start + span[1]]
+
+    def _array(self, typecode: str, span: List[int]) -> "array":
+        column = array(typecode)
+        column.frombytes(self._section(span))
+        return column
+
+    def layer(self, name: str, index=None) -> Optional[LayerImage]:
+        """
+        Keyword arguments of MemoryLayer.restore for one layer (band keys only
+        if they were written for an index configured like `index`); None if it is missing
+        """
+        meta = self.header.get("layers", {}).get(name)
+        if meta is None:
+            return None
+        text = self._section(meta["text"]).decode("utf-8")
+        ends = self._array("Q", meta["ends"]).tolist()
+        image: LayerImage = {
+            "memories": [text[start:end] for start, end in zip(chain((0,), ends), ends)],
+            "levels": self._array("i", meta["levels"]),
+            "created": self._array("d", meta["created"]),
+            "hits": self._array("I", meta["hits"]),
+            "accessed": self._array("d", meta["accessed"]),
+            "duplicate_keys": None,
+            "postings": None,
+            "nbytes": meta["nbytes"],
+        }
+        if meta.get("index") is not None:
+            spans = meta["index"]
+            vocab_text = self._section(spans["vocab"]).decode("utf-8")
+            image["postings"] = (
+                vocab_text.split("\n") if vocab_text else [],
+                self._array("Q", spans["ends"]),
+                self._array("q", spans["postings"]),
+            )
+        if index is not None and meta.get("dedup") == dedup_params(index):
+            image["duplicate_keys"] = BandKeys(self._array("q", meta["keys"]), index.bands)
+        return image
+
+    def close(self) -> None:
+        self._map.close()
+
+
+def open_warm_snapshot(path: str, fingerprint: Optional[str]) -> Optional[WarmSnapshot]:
+    """The snapshot at `path` if it exists and matches the store's current fingerprint"""
+    if not fingerprint or not os.path.exists(path):
+        return None
+    try:
+        snapshot = WarmSnapshot(path)
+    except Exception as e:
+        print(f"[EchoMinderNew] Ignoring unreadable warm snapshot {path}: {e}")
+        return None
+    if snapshot.fingerprint != fingerprint:
+        snapshot.close()
+        return None
+    return snapshot
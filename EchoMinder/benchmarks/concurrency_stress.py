@@ -0,0 +1,242 @@
+"""
+Concurrency stress test for the EchoMinder agent.
+
+Fires hundreds of concurrent requests (auto / remember / recall, plus bulk
+imports) at a few namespaces against the local mock LLM (see
+benchmarks/mock_llm.py), then checks that no update was lost or applied
+twice:
+
+- every user summary or remembered fact that entered mid-term memory was
+  merged into long-term memory exactly once, or is still in mid-term;
+- long-term memory holds exactly the remembered facts plus one memory per
+  merge;
+- no namespace is left with a full mid-term batch (no merge trigger is lost);
+- reloading every namespace from its store gives back the same layers.
+
+Recall latency is reported next to merge latency: reads never wait for a
+merge in progress. Exits with status 1 when an invariant is violated.
+
+Run from the EchoMinder directory:
+    python -m benchmarks.concurrency_stress --requests 800 --users 8
+    python -m benchmarks.concurrency_stress --backend sqlite --write-behind
+"""
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from collections import Counter
+from typing import Any, Dict, List, Tuple
+
+from benchmarks.load_test import BenchContext, BenchRequest, BenchResponse, percentile
+from benchmarks.mock_llm import MockLLMServer
+
+# =========================
+# 💬 Unique Synthetic Turns
+# =========================
+WORDS = [
+    "amber", "basalt", "cobalt", "dune", "ember", "fjord", "garnet", "harbor", "indigo", "juniper",
+    "kelp", "lagoon", "meadow", "nectar", "onyx", "prairie", "quartz", "reef", "sierra", "tundra",
+]
+
+
+def unique_message(rng: random.Random, i: int) -> str:
+    """A short message whose summary is distinct from every other one (no dedup, no cache hits)"""
+    return f"I keep {rng.choice(WORDS)} {rng.choice(WORDS)} notes tagged x{i:05d}"
+
+
+# =========================
+# 🔍 Recording Wrappers
+# =========================
+class Recorder:
+    """What entered mid-term memory and what was merged out of it"""
+
+    def __init__(self):
+        self.added: Counter = Counter()
+        self.merged: Counter = Counter()
+        self.merges = 0
+        self.merge_latencies: List[float] = []
+
+    def install(self, agent) -> None:
+        generate_summary, merge_summaries = agent.generate_summary, agent.merge_summaries
+
+        async def recorded_summary(text: str, is_user_message: bool = True) -> str:
+            summary = await generate_summary(text, is_user_message)
+            if is_user_message:
+                self.added[summary] += 1  # user summaries go to mid-term (inline and bulk)
+            return summary
+
+        async def recorded_merge(summaries: List[str]) -> str:
+            batch = list(summaries)
+            started = time.perf_counter()
+            merged = await merge_summaries(batch)
+            self.merge_latencies.append(time.perf_counter() - started)
+            if merged:
+                self.merged.update(batch)
+                self.merges += 1
+            return merged
+
+        agent.generate_summary = recorded_summary
+        agent.merge_summaries = recorded_merge
+
+
+# =========================
+# 🔥 Stress Phase
+# =========================
+async def send(agent, payload: Dict[str, Any]) -> Tuple[str, float, bool]:
+    started = time.perf_counter()
+    result = await agent.run(BenchRequest(payload), BenchResponse(), BenchContext())
+    ok = isinstance(result, dict) and result.get("mode") != "error"
+    return payload["mode"], time.perf_counter() - started, ok
+
+
+async def stress(args: argparse.Namespace, base_url: str) -> Dict[str, Any]:
+    from openai import AsyncOpenAI
+    from agentuity_agents.EchoMinder import agent
+
+    agent.client = AsyncOpenAI(base_url=base_url, api_key="mock", max_retries=0)
+    recorder = Recorder()
+    recorder.install(agent)
+    rng = random.Random(args.seed)
+    users = [f"stress-u{i}" for i in range(args.users)]
+    facts: Counter = Counter()
+
+    calls = []
+    for i in range(args.requests):
+        user_id = users[i % len(users)]
+        roll = rng.random()
+        if roll < args.recall_share:
+            payload = {"mode": "recall", "user_id": user_id, "user_message": f"what about {rng.choice(WORDS)} notes?"}
+        elif roll < args.recall_share + args.remember_share:
+            fact = unique_message(rng, i)
+            facts[fact] += 1
+            recorder.added[fact] += 1  # remember mode stores the fact verbatim in every layer
+            payload = {"mode": "remember", "user_id": user_id, "user_message": f"remember that {fact}"}
+        else:
+            payload = {
+                "mode": "auto", "user_id": user_id,
+                "user_message": unique_message(rng, i), "chatbot_reply": "Noted.",
+            }
+        calls.append(send(agent, payload))
+
+    async def bulk(user_id: str, offset: int) -> None:
+        turns = [(unique_message(rng, offset + t), "Noted.") for t in range(args.bulk_turns)]
+        await agent.bulk_ingest(agent.namespaces.get(user_id), turns)
+
+    started = time.perf_counter()
+    bulks = [bulk(user_id, args.requests + n * args.bulk_turns) for n, user_id in enumerate(users)] if args.bulk_turns else []
+    outcomes = await asyncio.gather(*calls, *bulks)
+    await agent.drain_ingest()
+    elapsed = time.perf_counter() - started
+
+    # -------------------------
+    # Invariants
+    # -------------------------
+    violations: List[str] = []
+    errors = sum(1 for outcome in outcomes[:len(calls)] if not outcome[2])
+    if errors:
+        violations.append(f"{errors} requests failed")
+
+    remaining: Counter = Counter()
+    long_total = 0
+    for user_id in users:
+        namespace = agent.namespaces.get(user_id)
+        remaining.update(namespace.mid_term.copy())
+        long_total += len(namespace.long_term)
+        if len(namespace.mid_term) >= agent.MID_LIMIT:
+            violations.append(f"{user_id}: {len(namespace.mid_term)} mid-term memories left unmerged (a merge trigger was dropped)")
+    accounted = recorder.merged + remaining
+    lost = recorder.added - accounted
+    duplicated = accounted - recorder.added
+    if lost:
+        violations.append(f"{sum(lost.values())} mid-term memories lost, e.g. {next(iter(lost))!r}")
+    if duplicated:
+        violations.append(f"{sum(duplicated.values())} mid-term memories merged twice or unknown, e.g. {next(iter(duplicated))!r}")
+    expected_long = sum(facts.values()) + recorder.merges
+    if long_total != expected_long:
+        violations.append(f"long-term holds {long_total} memories, expected {expected_long}")
+
+    # Persisted state must match what is resident
+    before = {user_id: {name: layer.copy() for name, layer in agent.namespaces.get(user_id).layers.items()} for user_id in users}
+    for user_id in users:
+        agent.namespaces.evict(user_id)
+    for user_id in users:
+        reloaded = agent.namespaces.get(user_id)
+        for name in ("mid", "long"):
+            if reloaded.layers[name].copy() != before[user_id][name]:
+                violations.append(f"{user_id}: reloaded {name}-term memory differs from the resident one")
+
+    recall_latencies = sorted(latency for mode, latency, _ in outcomes[:len(calls)] if mode == "recall")
+    write_latencies = sorted(latency for mode, latency, _ in outcomes[:len(calls)] if mode != "recall")
+    merge_latencies = sorted(recorder.merge_latencies)
+    await agent.consolidator.stop()
+    agent.namespaces.close_all()
+    await agent.client.close()
+    return {
+        "backend": agent.STORAGE_BACKEND,
+        "write_behind": agent.WRITE_BEHIND,
+        "requests": len(calls),
+        "bulk_turns": args.bulk_turns * len(bulks),
+        "elapsed_s": round(elapsed, 3),
+        "mid_term_added": sum(recorder.added.values()),
+        "merged": sum(recorder.merged.values()),
+        "merges": recorder.merges,
+        "still_mid_term": sum(remaining.values()),
+        "recall_p50_ms": round(1000 * percentile(recall_latencies, 50), 3),
+        "recall_p99_ms": round(1000 * percentile(recall_latencies, 99), 3),
+        "write_p50_ms": round(1000 * percentile(write_latencies, 50), 3),
+        "merge_p50_ms": round(1000 * percentile(merge_latencies, 50), 3),
+        "violations": violations,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Concurrency stress test for the EchoMinder agent")
+    parser.add_argument("--requests", type=int, default=600, help="requests fired at once")
+    parser.add_argument("--users", type=int, default=6, help="namespaces the requests are spread over")
+    parser.add_argument("--recall-share", type=float, default=0.2)
+    parser.add_argument("--remember-share", type=float, default=0.3)
+    parser.add_argument("--bulk-turns", type=int, default=40, help="turns bulk-imported per namespace meanwhile (0 = none)")
+    parser.add_argument("--backend", choices=["journal", "sqlite"], default=None)
+    parser.add_argument("--write-behind", action="store_true")
+    parser.add_argument("--latency-ms", type=float, default=30.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # The agent reads its configuration at import time. Summaries stay local and
+    # near-duplicate suppression is off, so every mid-term entry can be traced.
+    data_dir = tempfile.mkdtemp(prefix="echominder-stress-")
+    os.environ["ECHOMINDER_DATA_DIR"] = data_dir
+    os.environ.setdefault("OPENAI_API_KEY", "mock")
+    os.environ["ECHOMINDER_SUMMARIZER"] = "local"
+    os.environ["ECHOMINDER_DEDUP_THRESHOLD"] = "0"
+    os.environ["ECHOMINDER_CONSOLIDATION"] = "inline"
+    if args.backend:
+        os.environ["ECHOMINDER_STORAGE"] = args.backend
+    if args.write_behind:
+        os.environ["ECHOMINDER_WRITE_BEHIND"] = "1"
+
+    server = MockLLMServer(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, seed=args.seed)
+    base_url = server.start_in_thread()
+    try:
+        report = asyncio.run(stress(args, base_url))
+    finally:
+        server.stop_thread()
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    for key, value in report.items():
+        if key != "violations":
+            print(f"{key:>16}: {value}")
+    if report["violations"]:
+        for violation in report["violations"]:
+            print(f"VIOLATION: {violation}")
+        sys.exit(1)
+    print("OK: no lost or duplicated updates")
+
+
+if __name__ == "__main__":
+    main()
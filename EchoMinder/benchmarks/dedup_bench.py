@@ -0,0 +1,139 @@
+"""
+Write-path benchmark for near-duplicate suppression.
+
+Appends a stream of templated summaries ("The user's favorite food is
+sushi", ...) to one long-term layer through `MemoryNamespace.add_long_term`,
+with restatements of earlier memories mixed in, once with dedup off and once
+per threshold. Templated memories crowd the same LSH buckets, which is the
+worst case for candidate counts. The in-process store is used so only the
+dedup and index work is timed.
+
+Reports total time, mean / p99 per write, candidates and exact comparisons
+per lookup, and how many planted restatements were suppressed (caught) or
+stored again (missed), plus memories suppressed that were not restatements.
+
+Run from the EchoMinder directory:
+    python -m benchmarks.dedup_bench --sizes 10000,100000 --thresholds 0,0.8
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from typing import Any, Dict, List, Tuple
+
+from agentuity_agents.EchoMinder.namespaces import MemoryNamespace
+from benchmarks.load_test import percentile
+
+# =========================
+# 💬 Templated Summaries
+# =========================
+CATEGORIES = [
+    "food", "color", "city", "band", "sport", "book", "movie", "language", "editor", "drink",
+    "season", "game", "artist", "car", "flower", "holiday", "snack", "podcast", "framework", "animal",
+]
+VERBS = ["plays", "visits", "practices", "studies", "cooks", "reviews", "paints", "repairs"]
+PLACES = ["library", "park", "office", "studio", "garage", "harbor", "market", "gym"]
+DAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+
+def word(rng: random.Random) -> str:
+    return "".join(rng.choice("bcdfghjklmnpqrstvwxz") + rng.choice("aeiou") for _ in range(3))
+
+
+def generate_stream(size: int, restate_rate: float, seed: int) -> List[Tuple[str, bool]]:
+    """(memory, is a restatement of an earlier one) in write order"""
+    rng = random.Random(seed)
+    stream: List[Tuple[str, bool]] = []
+    facts: List[List[str]] = []
+    while len(stream) < size:
+        if facts and rng.random() < restate_rate:
+            # Same fact, one detail worded differently (Jaccard 9/11 ~ 0.82)
+            tokens = list(rng.choice(facts))
+            tokens[rng.randrange(2, len(tokens))] = word(rng)
+            stream.append((" ".join(tokens), True))
+        elif rng.random() < 0.5:
+            stream.append((f"The user's favorite {rng.choice(CATEGORIES)} is {word(rng)}", False))
+        else:
+            tokens = [
+                "user", rng.choice(VERBS), word(rng), word(rng), word(rng),
+                "every", rng.choice(DAYS), "at", rng.choice(PLACES), word(rng),
+            ]
+            facts.append(tokens)
+            stream.append((" ".join(tokens), False))
+    return stream
+
+
+def run(stream: List[Tuple[str, bool]], threshold: float) -> Dict[str, Any]:
+    namespace = MemoryNamespace("bench", short_limit=10)
+    if threshold > 0:
+        namespace.enable_dedup(threshold)
+    layer = namespace.long_term
+    latencies: List[float] = []
+    caught = missed = false_hits = 0
+    started = time.perf_counter()
+    for memory, restated in stream:
+        before = len(layer)
+        t0 = time.perf_counter()
+        namespace.add_long_term(memory)
+        latencies.append(time.perf_counter() - t0)
+        suppressed = len(layer) == before
+        if restated:
+            caught += suppressed
+            missed += not suppressed
+        else:
+            false_hits += suppressed
+    elapsed = time.perf_counter() - started
+    stats = layer.duplicates.stats() if layer.duplicates is not None else {}
+    lookups = stats.get("lookups") or 1
+    latencies.sort()
+    return {
+        "size": len(stream),
+        "threshold": threshold,
+        "elapsed_s": round(elapsed, 3),
+        "mean_us": round(1e6 * elapsed / len(stream), 2),
+        "p99_us": round(1e6 * percentile(latencies, 99), 2),
+        "candidates_per_lookup": round(stats.get("candidates", 0) / lookups, 2),
+        "compared_per_lookup": round(stats.get("compared", 0) / lookups, 2),
+        "restatements_caught": caught,
+        "restatements_missed": missed,
+        "other_suppressed": false_hits,
+        "stored": len(layer),
+    }
+
+
+COLUMNS = [
+    ("size", 8), ("threshold", 9), ("elapsed_s", 9), ("mean_us", 9), ("p99_us", 9),
+    ("candidates_per_lookup", 21), ("compared_per_lookup", 19), ("restatements_caught", 19),
+    ("restatements_missed", 19), ("other_suppressed", 16),
+]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Write-path benchmark for near-duplicate suppression")
+    parser.add_argument("--sizes", default="10000,100000", help="memories written per run")
+    parser.add_argument("--thresholds", default="0,0.8", help="dedup thresholds (0 = off)")
+    parser.add_argument("--restate-rate", type=float, default=0.05, help="share of writes restating an earlier fact")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", default="", help="write results as JSON to this path ('-' for stdout)")
+    args = parser.parse_args()
+
+    print(" ".join(name.rjust(width) for name, width in COLUMNS))
+    results = []
+    for size in [int(s) for s in args.sizes.split(",") if s.strip()]:
+        stream = generate_stream(size, args.restate_rate, args.seed)
+        for threshold in [float(t) for t in args.thresholds.split(",") if t.strip()]:
+            row = run(stream, threshold)
+            results.append(row)
+            print(" ".join(str(row.get(name, "")).rjust(width) for name, width in COLUMNS), flush=True)
+
+    if args.json == "-":
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    elif args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
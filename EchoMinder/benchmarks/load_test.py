@@ -0,0 +1,326 @@
+"""
+End-to-end load benchmark for the EchoMinder agent.
+
+Points the agent's module-level `client` at a local mock LLM (see
+benchmarks/mock_llm.py) and drives `run` with concurrent synthetic
+conversations, one phase per mode and store size. Reports throughput and
+p50/p95/p99 latency, so retrieval and persistence regressions show up
+without paying for live API calls.
+
+Run from the EchoMinder directory:
+    python -m benchmarks.load_test --store-sizes 0,1000,10000 --concurrency 32
+    python -m benchmarks.load_test --replay ../requests.jsonl --json results.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+from benchmarks.mock_llm import MockLLMServer
+
+# =========================
+# 💬 Synthetic Conversations
+# =========================
+LANGUAGES = ["Python", "Rust", "Go", "TypeScript", "Kotlin", "Haskell", "C++", "Elixir"]
+HOBBIES = ["hiking", "chess", "photography", "baking", "climbing", "piano", "cycling", "gardening"]
+CITIES = ["Berlin", "Tokyo", "Austin", "Lisbon", "Toronto", "Seoul", "Nairobi", "Oslo"]
+TEMPLATES = [
+    "My favorite programming language is {language} and I use it at work.",
+    "I live in {city} and I enjoy {hobby} on weekends.",
+    "Can you recommend a {language} library for building web APIs?",
+    "I'm planning a trip to {city}, what should I pack for {hobby}?",
+    "Remind me what I told you about {hobby} and {language}.",
+    "I switched from {language} to {other} for my side project.",
+]
+REPLIES = [
+    "Sure! Here are a few options you might like.",
+    "Thanks for sharing, I'll keep that in mind.",
+    "Based on what you told me earlier, here is a suggestion.",
+]
+
+
+def synthetic_messages(count: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    return [
+        rng.choice(TEMPLATES).format(
+            language=rng.choice(LANGUAGES),
+            other=rng.choice(LANGUAGES),
+            hobby=rng.choice(HOBBIES),
+            city=rng.choice(CITIES),
+        )
+        for _ in range(count)
+    ]
+
+
+def replay_messages(path: str) -> List[str]:
+    """User messages from a JSONL file (user_message / message / body / text fields, or bare strings)"""
+    messages = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            if isinstance(item, dict):
+                item = next((item[k] for k in ("user_message", "message", "body", "text") if item.get(k)), "")
+            if isinstance(item, str) and item.strip():
+                messages.append(item.strip())
+    return messages
+
+
+# -------------------------
+# Minimal request / response objects for calling `run` directly
+# -------------------------
+class BenchData:
+    contentType = "application/json"
+
+    def __init__(self, payload: Dict[str, Any]):
+        self._payload = payload
+
+    async def json(self) -> Dict[str, Any]:
+        return self._payload
+
+    async def text(self) -> str:
+        return json.dumps(self._payload)
+
+
+class BenchRequest:
+    def __init__(self, payload: Dict[str, Any]):
+        self.data = BenchData(payload)
+
+
+class BenchResponse:
+    def json(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        return data
+
+    def text(self, data: str) -> str:
+        return data
+
+
+class BenchContext:
+    logger = logging.getLogger("echominder.benchmark")
+
+
+# =========================
+# 📈 Load Phases
+# =========================
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(q / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+def build_payload(mode: str, user_id: str, message: str, reply: str) -> Dict[str, Any]:
+    payload = {"mode": mode, "user_id": user_id, "user_message": message}
+    if mode == "auto":
+        payload["chatbot_reply"] = reply
+    return payload
+
+
+async def seed_store(agent, user_id: str, size: int, messages: List[str]) -> None:
+    """Pre-fill a namespace's long-term memory with `size` memories"""
+    namespace = agent.namespaces.get(user_id)
+    for i in range(size):
+        namespace.add_long_term(f"{messages[i % len(messages)]} (note {i})")
+    namespace.save()
+
+
+async def run_phase(
+    agent,
+    mode: str,
+    users: List[str],
+    conversations: int,
+    turns: int,
+    concurrency: int,
+    messages: List[str],
+    seed: int,
+    reuse_messages: bool = False,
+) -> Dict[str, Any]:
+    """Run `conversations` sequential conversations, `concurrency` at a time"""
+    rng = random.Random(seed)
+    latencies: List[float] = []
+    errors = 0
+    queue: asyncio.Queue = asyncio.Queue()
+    for c in range(conversations):
+        queue.put_nowait(c)
+
+    async def worker() -> None:
+        nonlocal errors
+        while True:
+            try:
+                c = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            user_id = users[c % len(users)]
+            for turn in range(turns):
+                message = rng.choice(messages)
+                if not reuse_messages:
+                    message = f"{message} [{user_id} c{c} t{turn}]"  # defeat the summary cache
+                payload = build_payload(mode, user_id, message, rng.choice(REPLIES))
+                started = time.perf_counter()
+                result = await agent.run(BenchRequest(payload), BenchResponse(), BenchContext())
+                latencies.append(time.perf_counter() - started)
+                if not isinstance(result, dict) or result.get("mode") == "error":
+                    errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(max(1, concurrency))])
+    elapsed = time.perf_counter() - started
+    drain_started = time.perf_counter()
+    await agent.drain_ingest()
+    drain = time.perf_counter() - drain_started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 4),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(1000 * sum(latencies) / len(latencies), 3) if latencies else 0.0,
+        "p50_ms": round(1000 * percentile(latencies, 50), 3),
+        "p95_ms": round(1000 * percentile(latencies, 95), 3),
+        "p99_ms": round(1000 * percentile(latencies, 99), 3),
+        "drain_s": round(drain, 4),
+    }
+
+
+async def benchmark(args: argparse.Namespace, base_url: str, server: Optional[MockLLMServer]) -> List[Dict[str, Any]]:
+    from openai import AsyncOpenAI
+    from agentuity_agents.EchoMinder import agent
+
+    if args.resilient_http:
+        from agentuity_agents.EchoMinder.transport import create_http_client
+        http_client = create_http_client(hedge_after=args.hedge_after or None)
+        agent.client = AsyncOpenAI(base_url=base_url, api_key="mock", max_retries=0, http_client=http_client)
+    else:
+        agent.client = AsyncOpenAI(base_url=base_url, api_key="mock", max_retries=args.max_retries)
+    messages = replay_messages(args.replay) if args.replay else synthetic_messages(512, args.seed)
+    if not messages:
+        raise SystemExit(f"No messages found in {args.replay}")
+
+    results = []
+    try:
+        for size in args.store_sizes:
+            users = [f"bench-{size}-u{i}" for i in range(args.users)]
+            for user_id in users:
+                await seed_store(agent, user_id, size, messages)
+            for mode in args.modes:
+                before = server.stats() if server else {}
+                phase = await run_phase(
+                    agent, mode, users, args.conversations, args.turns,
+                    args.concurrency, messages, args.seed, args.reuse_messages,
+                )
+                after = server.stats() if server else {}
+                phase.update({
+                    "mode": mode,
+                    "store_size": size,
+                    "backend": agent.STORAGE_BACKEND,
+                    "write_behind": agent.WRITE_BEHIND,
+                    "concurrency": args.concurrency,
+                    "llm_calls": after.get("requests", 0) - before.get("requests", 0),
+                    "llm_errors": after.get("errors", 0) - before.get("errors", 0),
+                })
+                results.append(phase)
+                print_row(phase)
+            for user_id in users:
+                agent.namespaces.evict(user_id)
+    finally:
+        await agent.drain_ingest()
+        await agent.consolidator.stop()
+        agent.namespaces.close_all()
+        await agent.client.close()
+    return results
+
+
+# -------------------------
+# Reporting
+# -------------------------
+COLUMNS = [
+    ("mode", 8), ("store_size", 10), ("requests", 8), ("errors", 6), ("throughput_rps", 14),
+    ("p50_ms", 10), ("p95_ms", 10), ("p99_ms", 10), ("llm_calls", 9), ("drain_s", 8),
+]
+
+
+def print_header() -> None:
+    print(" ".join(name.rjust(width) for name, width in COLUMNS))
+
+
+def print_row(row: Dict[str, Any]) -> None:
+    print(" ".join(str(row.get(name, "")).rjust(width) for name, width in COLUMNS), flush=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="End-to-end load benchmark for the EchoMinder agent")
+    parser.add_argument("--modes", default="auto,remember,recall", help="comma-separated modes to run")
+    parser.add_argument("--store-sizes", default="0,1000,10000", help="long-term memories seeded per user")
+    parser.add_argument("--users", type=int, default=4, help="namespaces the conversations are spread over")
+    parser.add_argument("--conversations", type=int, default=64)
+    parser.add_argument("--turns", type=int, default=4, help="sequential requests per conversation")
+    parser.add_argument("--concurrency", type=int, default=16, help="conversations in flight")
+    parser.add_argument("--replay", default="", help="JSONL file of user messages to replay")
+    parser.add_argument("--reuse-messages", action="store_true", help="let repeated messages hit the summary cache")
+    parser.add_argument("--backend", choices=["journal", "sqlite"], default=None)
+    parser.add_argument("--write-behind", action="store_true")
+    parser.add_argument("--summarizer", choices=["auto", "local", "llm"], default=None, help="summary tier routing")
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--jitter-ms", type=float, default=50.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--max-retries", type=int, default=0, help="OpenAI client retries on errors")
+    parser.add_argument("--resilient-http", action="store_true", help="use the pooled retrying transport")
+    parser.add_argument("--hedge-after", type=float, default=0.0, help="hedge delay in seconds (with --resilient-http; only idempotent requests are hedged)")
+    parser.add_argument("--base-url", default="", help="use an already running mock instead of starting one")
+    parser.add_argument("--data-dir", default="", help="memory files location (default: a temp dir)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", default="", help="write results as JSON to this path ('-' for stdout)")
+    args = parser.parse_args()
+    args.modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    args.store_sizes = [int(s) for s in args.store_sizes.split(",") if s.strip()]
+
+    # The agent reads its configuration at import time
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix="echominder-bench-")
+    os.environ["ECHOMINDER_DATA_DIR"] = data_dir
+    os.environ.setdefault("OPENAI_API_KEY", "mock")
+    if args.backend:
+        os.environ["ECHOMINDER_STORAGE"] = args.backend
+    if args.write_behind:
+        os.environ["ECHOMINDER_WRITE_BEHIND"] = "1"
+    if args.summarizer:
+        os.environ["ECHOMINDER_SUMMARIZER"] = args.summarizer
+
+    server = None
+    base_url = args.base_url
+    if not base_url:
+        server = MockLLMServer(
+            latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+            error_rate=args.error_rate, seed=args.seed,
+        )
+        base_url = server.start_in_thread()
+
+    print_header()
+    try:
+        results = asyncio.run(benchmark(args, base_url, server))
+    finally:
+        if server is not None:
+            server.stop_thread()
+        if not args.data_dir:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    if args.json == "-":
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    elif args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
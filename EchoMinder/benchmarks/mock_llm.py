@@ -0,0 +1,235 @@
+"""
+Local OpenAI-compatible stand-in for benchmarks.
+
+Serves POST /v1/chat/completions over plain HTTP/1.1 (keep-alive) with a
+configurable latency, jitter and error rate, so the agent can be load tested
+without live API calls. Replies are deterministic functions of the request:
+plain calls get a one-line "summary" of the last message, and JSON-mode calls
+(batched summaries) get a {"summaries": [...]} object.
+
+Run standalone with:  python -m benchmarks.mock_llm --port 8765 --latency-ms 200
+"""
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+from typing import Any, Dict, Optional, Set, Tuple
+
+# =========================
+# 🧪 Mock Chat Completions
+# =========================
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def summarize(text: str) -> str:
+    text = " ".join(text.split())
+    return f"The user mentioned: {text[:120]}"
+
+
+def build_completion(body: Dict[str, Any]) -> Dict[str, Any]:
+    """Deterministic chat.completion response for a request body"""
+    messages = body.get("messages") or []
+    last = str(messages[-1].get("content", "")) if messages else ""
+    if (body.get("response_format") or {}).get("type") == "json_object":
+        try:
+            items = json.loads(last)
+            content = json.dumps({
+                "summaries": [
+                    {"id": item["id"], "summary": summarize(str(item.get("text", "")))}
+                    for item in items
+                ]
+            })
+        except (ValueError, TypeError, KeyError):
+            content = "{}"
+    else:
+        content = summarize(last)
+    prompt_tokens = sum(estimate_tokens(str(m.get("content", ""))) for m in messages)
+    completion_tokens = estimate_tokens(content)
+    return {
+        "id": f"chatcmpl-mock-{random.getrandbits(32):08x}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "mock"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop",
+        }],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+class MockLLMServer:
+    """
+    Minimal asyncio HTTP server answering chat completions after
+    `latency_ms` ± `jitter_ms` (gaussian); a fraction `error_rate` of the
+    requests fail with HTTP 500. Counters are kept for benchmark reports.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_ms: float = 200.0,
+        jitter_ms: float = 50.0,
+        error_rate: float = 0.0,
+        seed: Optional[int] = None,
+    ):
+        self.host = host
+        self.port = port
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._connections: Set[asyncio.StreamWriter] = set()
+        self.requests = 0
+        self.errors = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1"
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+        }
+
+    # -------------------------
+    # Lifecycle
+    # -------------------------
+    async def start(self) -> str:
+        """Start serving on the running loop; returns the OpenAI base URL"""
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.base_url
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            for writer in list(self._connections):  # idle keep-alive connections
+                writer.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def start_in_thread(self) -> str:
+        """Serve from a dedicated thread and event loop (keeps the agent's loop clean)"""
+        started = threading.Event()
+
+        def serve() -> None:
+            self._loop = asyncio.new_event_loop()
+            self._loop.run_until_complete(self.start())
+            started.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self.stop())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=serve, name="mock-llm", daemon=True)
+        self._thread.start()
+        started.wait()
+        return self.base_url
+
+    def stop_thread(self) -> None:
+        if self._thread is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._thread = None
+
+    # -------------------------
+    # HTTP handling
+    # -------------------------
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        method, path, _ = request_line.decode("latin-1").split(" ", 2)
+        headers: Dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get("content-length", "0"))
+        body = await reader.readexactly(length) if length else b""
+        return method, path, headers, body
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._connections.add(writer)
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                status, payload = await self._respond(method, path, body)
+                data = json.dumps(payload).encode("utf-8")
+                writer.write(
+                    f"HTTP/1.1 {status}\r\n"
+                    "Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    "Connection: keep-alive\r\n\r\n".encode("latin-1") + data
+                )
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+
+    async def _respond(self, method: str, path: str, body: bytes) -> Tuple[str, Dict[str, Any]]:
+        if method != "POST" or not path.rstrip("/").endswith("/chat/completions"):
+            return "404 Not Found", {"error": {"message": f"{method} {path} not supported", "type": "invalid_request_error"}}
+        self.requests += 1
+        delay = max(0.0, self._random.gauss(self.latency_ms, self.jitter_ms)) / 1000
+        await asyncio.sleep(delay)
+        if self._random.random() < self.error_rate:
+            self.errors += 1
+            return "500 Internal Server Error", {"error": {"message": "mock upstream error", "type": "server_error"}}
+        completion = build_completion(json.loads(body or b"{}"))
+        self.prompt_tokens += completion["usage"]["prompt_tokens"]
+        self.completion_tokens += completion["usage"]["completion_tokens"]
+        return "200 OK", completion
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="OpenAI-compatible mock LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--jitter-ms", type=float, default=50.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = MockLLMServer(args.host, args.port, args.latency_ms, args.jitter_ms, args.error_rate)
+
+    async def serve() -> None:
+        print(f"Mock LLM listening on {await server.start()}")
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        print(f"Served {server.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+"""
+Retrieval quality-and-speed benchmark for EchoMinder.
+
+Generates a synthetic long-term store of N memories (filler plus "planted"
+facts, each with near-miss distractors that share its wording), then asks one
+paraphrased question per planted fact through each retrieval backend:
+
+    scan      the original linear keyword scan (substring match, first hits)
+    index     inverted index, first matches in layer order (ECHOMINDER_RETRIEVAL_RANKING=index)
+    ranked    inverted index + relevance/recency/importance ranking (the default)
+    fts       SQLite FTS5 / BM25 inside the storage backend
+    semantic  hashing-embedder cosine similarity (needs numpy)
+
+For each store size and backend it reports build time, latency percentiles,
+throughput, peak RSS and recall@1 / recall@k / MRR of the planted fact. Every
+phase runs in a fresh process so peak RSS is per phase.
+
+Run from the EchoMinder directory:
+    python -m benchmarks.retrieval_bench --sizes 1000,10000,100000 --json retrieval.json
+    python -m benchmarks.retrieval_bench --sizes 1000000 --backends ranked,fts --queries 100
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Any, Dict, List, Optional, Tuple
+
+from benchmarks.load_test import percentile
+
+BACKENDS = ["scan", "index", "ranked", "fts", "semantic"]
+
+# =========================
+# 🧪 Synthetic Corpus
+# =========================
+TOPICS = [
+    "cooking", "football", "jazz", "gardening", "chess", "astronomy", "woodworking", "yoga",
+    "photography", "sailing", "knitting", "poetry", "robotics", "birdwatching", "pottery", "surfing",
+]
+PLACES = ["Berlin", "Tokyo", "Austin", "Lisbon", "Toronto", "Seoul", "Nairobi", "Oslo", "Lima", "Hanoi"]
+RELATIONS = ["sister", "brother", "cousin", "neighbor", "colleague", "friend", "uncle", "aunt"]
+PETS = ["dog", "cat", "parrot", "rabbit", "turtle", "hamster"]
+FILLER = [
+    "The user talked about {topic} and mentioned {place}.",
+    "The user asked for tips on {topic} before a trip to {place}.",
+    "The user said their {relation} enjoys {topic}.",
+    "The user is thinking about a {pet} and likes {topic}.",
+    "The user compared {topic} clubs in {place}.",
+]
+# (planted fact, paraphrased question, near-miss distractor); {name} makes each fact unique
+PLANTED = [
+    (
+        "The user's {relation} {name} recently moved to {place}.",
+        "Where does my {relation} {name} live now?",
+        "The user's {relation} {other} recently moved to {place2}.",
+    ),
+    (
+        "The user adopted a {pet} and named it {name}.",
+        "What do I call my {pet} {name}?",
+        "The user adopted a {pet} and named it {other}.",
+    ),
+    (
+        "The user's favorite {topic} instructor is {name} from {place}.",
+        "Who is my preferred teacher {name} for {topic}?",
+        "The user's favorite {topic} instructor is {other} from {place2}.",
+    ),
+    (
+        "The user is saving money for a {topic} course taught by {name}.",
+        "Which class with {name} am I saving for?",
+        "The user is saving money for a {topic} course taught by {other}.",
+    ),
+]
+SYLLABLES = ["ka", "lo", "mi", "ra", "ven", "dor", "tis", "zu", "bel", "quin", "sha", "mor", "ul", "ex", "pra"]
+
+
+def pseudo_name(rng: random.Random, used: set) -> str:
+    """A made-up proper noun that occurs nowhere else in the corpus"""
+    while True:
+        name = "".join(rng.choice(SYLLABLES) for _ in range(3)).capitalize()
+        if name not in used:
+            used.add(name)
+            return name
+
+
+def generate_corpus(
+    size: int, planted: int, distractors: int, seed: int = 0, days: float = 90.0
+) -> Tuple[List[str], List[float], List[Tuple[str, str]]]:
+    """
+    `size` memories (oldest first) with creation times spread over `days`,
+    and one (question, planted memory) pair per planted fact
+    """
+    rng = random.Random(seed)
+    used: set = set()
+    planted = min(planted, max(1, size // (distractors + 2)))
+    facts, queries = [], []
+    for i in range(planted):
+        fact, question, distractor = PLANTED[i % len(PLANTED)]
+        slots = {
+            "name": pseudo_name(rng, used), "relation": rng.choice(RELATIONS), "pet": rng.choice(PETS),
+            "topic": rng.choice(TOPICS), "place": rng.choice(PLACES), "place2": rng.choice(PLACES),
+        }
+        memory = fact.format(**slots)
+        facts.append(memory)
+        queries.append((question.format(**slots), memory))
+        for _ in range(distractors):
+            facts.append(distractor.format(other=pseudo_name(rng, used), **slots))
+    memories = [
+        rng.choice(FILLER).format(
+            topic=rng.choice(TOPICS), place=rng.choice(PLACES),
+            relation=rng.choice(RELATIONS), pet=rng.choice(PETS),
+        )
+        for _ in range(size - len(facts))
+    ]
+    for memory in facts:
+        memories.insert(rng.randrange(len(memories) + 1), memory)
+    now = time.time()
+    created = sorted(now - rng.uniform(0, days * 86400) for _ in memories)
+    return memories, created, queries
+
+
+# =========================
+# 🔍 Backends
+# =========================
+def keyword_scan(agent, memories: List[str], query: str, limit: int) -> List[str]:
+    """The original retrieval: substring match of the expanded keywords, first `limit` hits"""
+    query_lower = query.lower()
+    query_words = [w for w in query_lower.split() if len(w) > 1 and w not in agent.STOP_WORDS]
+    expanded_keywords = set(query_words)
+    for word in query_words:
+        expanded_keywords.update(agent.KEYWORD_MAPPING.get(word, ()))
+    relevant = []
+    for memory in memories:
+        memory_lower = memory.lower()
+        if expanded_keywords and any(word in memory_lower for word in expanded_keywords):
+            relevant.append(memory)
+            if len(relevant) >= limit:
+                break
+    return relevant or memories[-limit:]
+
+
+def build_namespace(agent, backend: str, memories: List[str], created: List[float], data_dir: str):
+    """A namespace whose long-term layer holds the corpus, wired for `backend`"""
+    from agentuity_agents.EchoMinder.namespaces import MemoryNamespace
+    from agentuity_agents.EchoMinder.storage import SQLiteStore
+
+    namespace = MemoryNamespace(f"bench-{backend}", agent.SHORT_LIMIT)
+    namespace.long_term.replace(memories, (), created)
+    if backend == "fts":
+        namespace.store = SQLiteStore(os.path.join(data_dir, "bench.sqlite3"), namespace.name)
+        namespace.store.write_batch({"long": list(namespace.long_term.items())}, {})
+    if backend == "semantic":
+        from agentuity_agents.EchoMinder import semantic
+        if not semantic.numpy_available():
+            raise RuntimeError("numpy is not installed")
+        agent.attach_semantic(namespace, semantic.HashingEmbedder())
+    return namespace
+
+
+def run_phase(options: Dict[str, Any]) -> Dict[str, Any]:
+    """Build one backend over one corpus and run every query (in its own process)"""
+    data_dir = tempfile.mkdtemp(prefix="echominder-retrieval-")
+    os.environ["ECHOMINDER_DATA_DIR"] = data_dir
+    os.environ.setdefault("OPENAI_API_KEY", "mock")
+    os.environ["ECHOMINDER_WARM_START"] = "0"
+    backend = options["backend"]
+    try:
+        from agentuity_agents.EchoMinder import agent
+
+        agent.RETRIEVAL_RANKING = "ranked" if backend == "ranked" else "index"
+        memories, created, queries = generate_corpus(
+            options["size"], options["planted"], options["distractors"], options["seed"]
+        )
+        queries = queries[:options["queries"]]
+        k = options["k"]
+
+        started = time.perf_counter()
+        namespace = None if backend == "scan" else build_namespace(agent, backend, memories, created, data_dir)
+        build = time.perf_counter() - started
+
+        async def retrieve(query: str) -> List[str]:
+            if namespace is None:
+                return keyword_scan(agent, memories, query, k)
+            return await agent.retrieve_relevant_memories(query, k, namespace)
+
+        async def run_queries() -> Tuple[List[float], List[int]]:
+            latencies, ranks = [], []
+            for _ in range(options["warmup"]):
+                for question, _ in queries[:10]:
+                    await retrieve(question)
+            for question, expected in queries:
+                t = time.perf_counter()
+                results = await retrieve(question)
+                latencies.append(time.perf_counter() - t)
+                ranks.append(results.index(expected) + 1 if expected in results else 0)
+            return latencies, ranks
+
+        started = time.perf_counter()
+        latencies, ranks = asyncio.run(run_queries())
+        elapsed = time.perf_counter() - started
+        if namespace is not None:
+            namespace.close()
+        agent.namespaces.close_all()  # before the data directory goes away (not at exit)
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    latencies.sort()
+    found = [rank for rank in ranks if rank]
+    return {
+        "backend": backend,
+        "size": options["size"],
+        "queries": len(ranks),
+        "k": k,
+        "build_s": round(build, 4),
+        "p50_ms": round(1000 * percentile(latencies, 50), 3),
+        "p95_ms": round(1000 * percentile(latencies, 95), 3),
+        "p99_ms": round(1000 * percentile(latencies, 99), 3),
+        "throughput_qps": round(len(ranks) / elapsed, 2) if elapsed else 0.0,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "recall_at_1": round(sum(1 for rank in found if rank == 1) / len(ranks), 4) if ranks else 0.0,
+        f"recall_at_{k}": round(len(found) / len(ranks), 4) if ranks else 0.0,
+        "mrr": round(sum(1 / rank for rank in found) / len(ranks), 4) if ranks else 0.0,
+    }
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024  # bytes on macOS, KiB on Linux
+
+
+# -------------------------
+# Reporting
+# -------------------------
+COLUMNS = [
+    ("backend", 9), ("size", 8), ("build_s", 9), ("p50_ms", 9), ("p95_ms", 9), ("p99_ms", 9),
+    ("throughput_qps", 14), ("peak_rss_mb", 11), ("recall_at_1", 11), ("recall_at_k", 11), ("mrr", 7),
+]
+
+
+def print_header() -> None:
+    print(" ".join(name.rjust(width) for name, width in COLUMNS))
+
+
+def print_row(row: Dict[str, Any]) -> None:
+    values = dict(row, recall_at_k=row.get(f"recall_at_{row.get('k')}", ""))
+    print(" ".join(str(values.get(name, "")).rjust(width) for name, width in COLUMNS), flush=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Retrieval quality-and-speed benchmark for EchoMinder")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="comma-separated store sizes (up to 1000000)")
+    parser.add_argument("--backends", default=",".join(BACKENDS), help=f"comma-separated subset of {','.join(BACKENDS)}")
+    parser.add_argument("--queries", type=int, default=200, help="questions per phase (one per planted fact)")
+    parser.add_argument("--distractors", type=int, default=3, help="near-miss memories per planted fact")
+    parser.add_argument("--k", type=int, default=5, help="memories retrieved per question")
+    parser.add_argument("--warmup", type=int, default=1, help="warm-up rounds of 10 questions")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--in-process", action="store_true", help="run phases in this process (peak RSS is then cumulative)")
+    parser.add_argument("--json", default="", help="write results as JSON to this path ('-' for stdout)")
+    args = parser.parse_args()
+
+    phases = [
+        {
+            "size": int(size), "backend": backend.strip(), "queries": args.queries, "planted": args.queries,
+            "distractors": args.distractors, "k": args.k, "warmup": args.warmup, "seed": args.seed,
+        }
+        for size in args.sizes.split(",") if size.strip()
+        for backend in args.backends.split(",") if backend.strip()
+    ]
+    unknown = {phase["backend"] for phase in phases} - set(BACKENDS)
+    if unknown:
+        raise SystemExit(f"Unknown backends: {', '.join(sorted(unknown))}")
+
+    print_header()
+    results = []
+    for phase in phases:
+        try:
+            if args.in_process:
+                row = run_phase(phase)
+            else:
+                # A fresh interpreter per phase, so ru_maxrss is this phase's peak
+                with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+                    row = pool.submit(run_phase, phase).result()
+        except Exception as e:
+            print(f"[EchoMinderNew] {phase['backend']} at {phase['size']} skipped: {e}", file=sys.stderr)
+            continue
+        results.append(row)
+        print_row(row)
+
+    if args.json == "-":
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    elif args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Import a conversation history into EchoMinder memory.
+
+The input is a JSON array or JSON Lines file of turns, each an object with
+"user_message" and/or "chatbot_reply" (a bare string counts as a user message).
+It is streamed, so large exports don't have to fit in memory.
+
+Usage:  python bulk_import.py history.jsonl --user-id alice --concurrency 16
+        cat history.json | python bulk_import.py -
+"""
+import argparse
+import asyncio
+import json
+import sys
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk-import conversation turns into EchoMinder memory")
+    parser.add_argument("path", help="JSON array or JSON Lines file of turns ('-' for stdin)")
+    parser.add_argument("--user-id", default=None, help="namespace to import into (default namespace if omitted)")
+    parser.add_argument("--concurrency", type=int, default=None, help="summaries in flight at once")
+    args = parser.parse_args()
+
+    from agentuity_agents.EchoMinder import agent
+    from agentuity_agents.EchoMinder.bulk import iter_json_records, iter_turns
+
+    def report(progress) -> None:
+        print(
+            f"{progress['turns']} turns, {progress['summaries']} summaries, "
+            f"{progress['merges']} merges, {progress['turns_per_s']} turns/s",
+            file=sys.stderr,
+        )
+
+    async def run_import(stream) -> dict:
+        namespace = agent.namespaces.acquire(args.user_id or agent.DEFAULT_NAMESPACE)
+        try:
+            return await agent.bulk_ingest(
+                namespace,
+                iter_turns(iter_json_records(stream)),
+                concurrency=args.concurrency or agent.BULK_CONCURRENCY,
+                progress=report,
+            )
+        finally:
+            agent.namespaces.release(namespace.name)
+
+    stream = sys.stdin if args.path == "-" else open(args.path, "r", encoding="utf-8")
+    try:
+        stats = asyncio.run(run_import(stream))
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+        agent.namespaces.close_all()
+    print(json.dumps(stats))
+
+
+if __name__ == "__main__":
+    main()
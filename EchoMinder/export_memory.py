@@ -0,0 +1,52 @@
+"""
+Export EchoMinder memory as NDJSON (one entry per line), e.g. for backups.
+
+Entries are streamed page by page, so exports of any size run in constant
+memory. Each line has "layer", "id", "text", "level", "created", "recalls"
+and "last_recalled".
+
+Usage:  python export_memory.py --user-id alice > alice.ndjson
+        python export_memory.py --layers long --since 2026-01-01 --keywords python -o python.ndjson
+"""
+import argparse
+import asyncio
+import json
+import sys
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export EchoMinder memory as NDJSON")
+    parser.add_argument("--user-id", default=None, help="namespace to export (default namespace if omitted)")
+    parser.add_argument("--layers", default="", help="comma-separated subset of long,mid,short")
+    parser.add_argument("--since", default=None, help="only memories created at/after this (unix seconds or ISO 8601)")
+    parser.add_argument("--until", default=None, help="only memories created before this")
+    parser.add_argument("--keywords", default="", help="only memories with a word starting with one of these")
+    parser.add_argument("-o", "--output", default="-", help="output file ('-' for stdout)")
+    args = parser.parse_args()
+
+    from agentuity_agents.EchoMinder import agent
+    from agentuity_agents.EchoMinder.recall import RecallFilter
+
+    recall_filter = RecallFilter.from_request({
+        "layers": args.layers, "since": args.since, "until": args.until, "keywords": args.keywords,
+    })
+
+    async def run_export(out) -> int:
+        count = 0
+        async for entry in agent.export_entries(args.user_id or agent.DEFAULT_NAMESPACE, recall_filter):
+            out.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            count += 1
+        return count
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        count = asyncio.run(run_export(out))
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        agent.namespaces.close_all()
+    print(f"{count} entries exported", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+import os
+import shutil
+import sys
+import tempfile
+
+# The agent reads its configuration at import time: point it at a throwaway data directory
+DATA_DIR = tempfile.mkdtemp(prefix="echominder-tests-")
+os.environ["ECHOMINDER_DATA_DIR"] = DATA_DIR
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+
+def pytest_sessionfinish(session, exitstatus):
+    agent = sys.modules.get("agentuity_agents.EchoMinder.agent")
+    if agent is not None:
+        agent.namespaces.close_all()
+    shutil.rmtree(DATA_DIR, ignore_errors=True)
@@ -0,0 +1,97 @@
+from agentuity_agents.EchoMinder.dedup import NearDuplicateIndex, lsh_params
+from agentuity_agents.EchoMinder.memory_index import MemoryLayer
+from agentuity_agents.EchoMinder.namespaces import MemoryNamespace
+from agentuity_agents.EchoMinder.warm_start import WarmSnapshot, capture_layer, write_warm_snapshot
+
+FACT = "the user likes hiking in the mountains with their dog every weekend"
+
+
+def test_finds_near_duplicates_but_not_unrelated_memories():
+    layer = MemoryLayer([FACT, "the user works as a nurse in a night shift"])
+    layer.attach_duplicates(NearDuplicateIndex(0.8))
+    layer.duplicates.catch_up()
+    fact_id = next(doc_id for doc_id, memory in layer.items() if memory == FACT)
+    assert layer.find_near_duplicate(FACT + " too") == fact_id
+    assert layer.find_near_duplicate("the user plays the violin in an orchestra") is None
+
+
+def test_removed_memories_are_no_longer_found():
+    layer = MemoryLayer([FACT])
+    layer.attach_duplicates(NearDuplicateIndex(0.8))
+    layer.remove_ids([doc_id for doc_id, _ in layer.items()])
+    assert layer.find_near_duplicate(FACT) is None
+
+
+def test_namespace_refreshes_a_near_duplicate_instead_of_storing_it():
+    namespace = MemoryNamespace("dedup", short_limit=10)
+    namespace.enable_dedup(0.8)
+    namespace.add_long_term(FACT)
+    namespace.add_long_term("the user works as a nurse in a night shift")
+    namespace.add_long_term(FACT + " too")
+    assert namespace.long_term.copy() == ["the user works as a nurse in a night shift", FACT + " too"]
+    assert namespace.dedup_stats()["duplicates"] == 1
+
+
+def test_band_keys_can_be_exported_and_adopted():
+    layer = MemoryLayer([FACT, "the user works as a nurse in a night shift"])
+    layer.attach_duplicates(NearDuplicateIndex(0.8))
+    assert layer.duplicates.key_table() is None  # still queued without keys
+    layer.duplicates.catch_up()
+    keys = layer.duplicates.export_keys(doc_id for doc_id, _ in layer.items())
+
+    restored = MemoryLayer()
+    restored.attach_duplicates(NearDuplicateIndex(0.8))
+    restored.restore(layer.copy(), duplicate_keys=keys)
+    assert restored.duplicates.key_table() is not None  # queued keys can be saved again right away
+    restored.duplicates.catch_up()
+    assert restored.find_near_duplicate(FACT + " too") is not None
+
+
+def test_warm_snapshots_carry_the_band_keys(tmp_path):
+    layer = MemoryLayer([FACT, "the user works as a nurse in a night shift"])
+    layer.attach_duplicates(NearDuplicateIndex(0.8))
+    layer.duplicates.catch_up()
+    path = str(tmp_path / "layer.warm")
+    write_warm_snapshot(path, "fingerprint", {}, {"long": capture_layer(layer)})
+
+    snapshot = WarmSnapshot(path)
+    restored = MemoryLayer()
+    restored.attach_duplicates(NearDuplicateIndex(0.8))
+    restored.restore(**snapshot.layer("long", restored.duplicates))
+    snapshot.close()
+    assert restored.duplicates.key_table() == layer.duplicates.key_table()
+    restored.duplicates.catch_up()
+    assert restored.find_near_duplicate(FACT + " too") is not None
+
+
+def test_loading_a_layer_queues_the_minhash_work():
+    layer = MemoryLayer()
+    layer.attach_duplicates(NearDuplicateIndex(0.8))
+    layer.replace([f"memory number {i} of a long history" for i in range(100)] + [FACT])
+    assert layer.duplicates.pending == 101
+    assert layer.find_near_duplicate(FACT + " too") is None  # not indexed yet
+    layer.append("the user works as a nurse in a night shift")  # new memories are indexed at once
+    assert layer.find_near_duplicate("the user works as a nurse in a night shift too") is not None
+    layer.remove_ids([doc_id for doc_id, memory in layer.items() if memory.startswith("memory number 1")])
+    while layer.duplicates.catch_up(10):
+        pass
+    assert layer.find_near_duplicate(FACT + " too") is not None
+    assert layer.duplicates.stats()["indexed"] == len(layer)
+
+
+def test_namespace_indexes_queued_memories_in_steps():
+    namespace = MemoryNamespace("dedup", short_limit=10)
+    namespace.enable_dedup(0.8)
+    namespace.long_term.replace([f"memory number {i} of a long history" for i in range(10)] + [FACT])
+    assert namespace.index_duplicates(4) == 7
+    while namespace.index_duplicates(4):
+        pass
+    namespace.add_long_term(FACT + " too")
+    assert namespace.long_term.copy()[-1] == FACT + " too"
+    assert len(namespace.long_term) == 11
+
+
+def test_band_parameters_follow_the_threshold():
+    bands, rows = lsh_params(0.8, 64)
+    assert bands * rows <= 64
+    assert lsh_params(0.5, 64)[1] < rows  # a lower threshold needs fewer rows per band
@@ -0,0 +1,118 @@
+import json
+
+from agentuity_agents.EchoMinder.journal import LongTermJournal
+
+
+def open_journal(tmp_path, **options) -> LongTermJournal:
+    options.setdefault("fsync_interval", 0)
+    return LongTermJournal(str(tmp_path / "long_term.json"), **options)
+
+
+def write_all(journal: LongTermJournal, memories):
+    """Journal `memories` one by one, like JournalStore does"""
+    store = []
+    for memory in memories:
+        store.append(memory)
+        journal.append(memory, lambda: (list(store), [0] * len(store)))
+    return store
+
+
+def test_replays_appends_after_reopen(tmp_path):
+    journal = open_journal(tmp_path)
+    journal.load()
+    write_all(journal, ["likes tea", "lives in Oslo", "owns a cat"])
+    journal.close()
+
+    reopened = open_journal(tmp_path)
+    assert reopened.load() == ["likes tea", "lives in Oslo", "owns a cat"]
+    reopened.close()
+
+
+def test_replays_compaction_records(tmp_path):
+    journal = open_journal(tmp_path)
+    journal.load()
+    store = write_all(journal, ["a1", "a2", "a3"])
+    journal.append_compaction(["a1", "a2"], "a1 and a2", 1, lambda: (store, [0] * len(store)))
+    journal.close()
+
+    reopened = open_journal(tmp_path)
+    assert reopened.load() == ["a3", "a1 and a2"]
+    assert reopened.levels == [0, 1]
+    reopened.close()
+
+
+def test_drops_a_torn_tail(tmp_path):
+    journal = open_journal(tmp_path)
+    journal.load()
+    write_all(journal, ["kept"])
+    journal.close()
+    with open(journal.journal_path, "a", encoding="utf-8") as f:
+        f.write('{"op": "add", "text": "half wr')  # crash mid-write
+
+    reopened = open_journal(tmp_path)
+    assert reopened.load() == ["kept"]
+    write_all(reopened, ["after the crash"])
+    reopened.close()
+    assert open_journal(tmp_path).load() == ["kept", "after the crash"]
+
+
+def test_compaction_folds_the_journal_into_the_snapshot(tmp_path):
+    journal = open_journal(tmp_path, compact_every=4)
+    journal.load()
+    memories = [f"memory {i}" for i in range(10)]
+    write_all(journal, memories)
+    journal.wait_for_compaction()
+    journal.close()
+
+    with open(journal.snapshot_path, encoding="utf-8") as f:
+        snapshot = json.load(f)
+    assert snapshot["seq"] >= 4
+    assert open_journal(tmp_path).load() == memories
+
+
+def test_replay_skips_lines_covered_by_the_snapshot(tmp_path):
+    journal = open_journal(tmp_path)
+    with open(journal.snapshot_path, "w", encoding="utf-8") as f:
+        json.dump({"seq": 2, "memories": ["one", "two"]}, f)
+    # A compaction that died after writing the snapshot but before dropping the rotated journal
+    with open(journal.rotated_path, "w", encoding="utf-8") as f:
+        for seq, text in enumerate(["one", "two", "three"], 1):
+            f.write(json.dumps({"op": "add", "text": text, "seq": seq}) + "\n")
+    assert journal.load() == ["one", "two", "three"]
+    journal.close()
+
+
+def test_synchronous_compact_leaves_only_the_snapshot(tmp_path):
+    journal = open_journal(tmp_path)
+    journal.load()
+    store = write_all(journal, ["x", "y"])
+    journal.compact((store, [0, 0]))
+    journal.close()
+
+    with open(journal.journal_path, encoding="utf-8") as f:
+        assert f.read() == ""
+    assert open_journal(tmp_path).load() == ["x", "y"]
+
+
+def test_a_batch_is_journaled_without_rewriting_the_snapshot(tmp_path):
+    journal = open_journal(tmp_path)
+    journal.load()
+    write_all(journal, ["before"])
+    journal.append_many(["bulk 1", "bulk 2"], lambda: (["before", "bulk 1", "bulk 2"], [0, 0, 0]))
+    journal.close()
+    assert not (tmp_path / "long_term.json").exists()
+    assert open_journal(tmp_path).load() == ["before", "bulk 1", "bulk 2"]
+
+
+def test_compact_later_reports_writes_made_meanwhile(tmp_path):
+    journal = open_journal(tmp_path)
+    journal.load()
+    store = write_all(journal, ["a", "b"])
+    seq = journal.compact_later((list(store), [0, 0]))
+    assert journal.compact_later((list(store), [0, 0])) in (None, seq)  # at most one compaction at a time
+    journal.wait_for_compaction()
+    assert journal.unchanged_since(seq, lambda: "unchanged") == "unchanged"
+    write_all(journal, ["c"])
+    assert journal.unchanged_since(seq, lambda: "unchanged") is None
+    journal.close()
+    assert open_journal(tmp_path).load() == ["a", "b", "c"]
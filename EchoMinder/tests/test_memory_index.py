@@ -0,0 +1,99 @@
+import random
+
+from agentuity_agents.EchoMinder.memory_index import MAX_PREFIX_EXPANSIONS, MemoryLayer
+from agentuity_agents.EchoMinder.namespaces import MemoryNamespace
+from agentuity_agents.EchoMinder.recall import RecallFilter, recall_page
+
+
+def test_search_matches_word_prefixes_oldest_first():
+    layer = MemoryLayer(["Loves Python", "Writes pythonic code", "Plays chess"])
+    assert layer.search(["python"]) == ["Loves Python", "Writes pythonic code"]
+    assert layer.search(["chess", "loves"], limit=1) == ["Loves Python"]
+    assert layer.search(["rust"]) == []
+
+
+def test_removed_memories_leave_the_index():
+    layer = MemoryLayer(["tea in the morning", "tea at night", "coffee"])
+    first, second, _ = [doc_id for doc_id, _ in layer.items()]
+    layer.remove_ids([first])
+    assert layer.search(["tea"]) == ["tea at night"]
+    assert layer.get(first) is None
+    assert layer.get(second) == "tea at night"
+    layer.append("green tea")
+    assert layer.search(["tea"]) == ["tea at night", "green tea"]
+
+
+def test_relevance_prefers_exact_and_rare_words():
+    layer = MemoryLayer(["uses python daily", "pythonista at heart", "likes the user interface"] + ["user note"] * 20)
+    scores = layer.relevance(["python", "user"])
+    exact, prefix = [doc_id for doc_id, _ in layer.items()][:2]
+    assert scores[exact] > scores[prefix] > 0
+
+
+def test_capped_relevance_keeps_the_best_matches():
+    rng = random.Random(7)
+    words = [f"w{i}" for i in range(40)]
+    layer = MemoryLayer(" ".join(rng.sample(words, 5)) for _ in range(500))
+    layer.remove_ids(range(0, 500, 7))
+    keywords = ["w1", "w2", "w30"]
+    full = {doc_id: score for doc_id, score in layer.relevance(keywords).items() if layer.get(doc_id) is not None}
+    capped = layer.relevance(keywords, limit=10)
+    best = sorted(full.items(), key=lambda item: (-round(item[1], 9), -item[0]))[:10]
+    assert {doc_id for doc_id, _ in best} <= set(capped)
+    for doc_id, score in best:
+        assert abs(capped[doc_id] - score) < 1e-9
+
+
+def test_recall_pages_walk_every_layer_with_cursors():
+    namespace = MemoryNamespace("pages", short_limit=10)
+    for i in range(5):
+        namespace.add_long_term(f"long fact {i}")
+    for i in range(3):
+        namespace.add_mid_term(f"mid fact {i}")
+    for i in range(4):
+        namespace.add_short_term(f"short fact {i}")
+
+    seen, cursor = [], None
+    while True:
+        page = recall_page(namespace, RecallFilter(), page_size=4, cursor=cursor)
+        assert len(page["entries"]) <= 4
+        seen.extend((entry["layer"], entry["text"]) for entry in page["entries"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == (
+        [("long", f"long fact {i}") for i in range(5)]
+        + [("mid", f"mid fact {i}") for i in range(3)]
+        + [("short", f"short fact {i}") for i in range(4)]
+    )
+
+
+def test_recall_pages_are_stable_while_memories_change():
+    namespace = MemoryNamespace("stable", short_limit=10)
+    for i in range(6):
+        namespace.add_long_term(f"fact {i}")
+    recall_filter = RecallFilter(layers=["long"], keywords=["fact"])
+    first = recall_page(namespace, recall_filter, page_size=3)
+    namespace.long_term.remove_ids([first["entries"][0]["id"]])
+    namespace.add_long_term("fact 6")
+    second = recall_page(namespace, recall_filter, page_size=3, cursor=first["next_cursor"])
+    assert [entry["text"] for entry in second["entries"]] == ["fact 3", "fact 4", "fact 5"]
+    third = recall_page(namespace, recall_filter, page_size=3, cursor=second["next_cursor"])
+    assert [entry["text"] for entry in third["entries"]] == ["fact 6"]
+    assert third["next_cursor"] is None
+
+
+def test_common_keywords_only_score_the_selective_candidates():
+    layer = MemoryLayer(["the user likes python"] + [f"the user note {i}" for i in range(30)])
+    python_doc = next(doc_id for doc_id, memory in layer.items() if "python" in memory)
+    assert set(layer.relevance(["user", "python"])) == {python_doc}
+    assert len(layer.relevance(["user"])) == 31  # every keyword is common: all of them are candidates
+
+
+def test_ranked_prefix_expansion_is_bounded():
+    layer = MemoryLayer([f"w{i}" for i in range(200)] + ["python", "pythonic"])
+    assert len(layer.relevance(["w1"])) == 1  # short keywords only match whole words
+    assert len(layer.relevance(["w12"])) == 1 + 10  # w12 and w120..w129
+    assert len(layer.relevance(["pyth"])) == 2
+    many = MemoryLayer(f"abc{i}" for i in range(100))
+    assert len(many.relevance(["abc"])) == MAX_PREFIX_EXPANSIONS
@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+from agentuity_agents.EchoMinder import agent
+
+
+@pytest.fixture
+def namespace(request):
+    name = f"test-{request.node.name}"
+    namespace = agent.namespaces.acquire(name)
+    yield namespace
+    agent.namespaces.release(name)
+    agent.namespaces.evict(name)
+
+
+@pytest.fixture
+def slow_merge(monkeypatch):
+    """merge_summaries that waits for `gate` and records every batch"""
+    class SlowMerge:
+        def __init__(self):
+            self.gate = asyncio.Event()
+            self.batches = []
+
+        async def __call__(self, summaries):
+            self.batches.append(list(summaries))
+            await self.gate.wait()
+            return " | ".join(summaries)
+
+    merge = SlowMerge()
+    monkeypatch.setattr(agent, "merge_summaries", merge)
+    return merge
+
+
+def fill_mid_term(namespace, prefix: str):
+    for i in range(agent.MID_LIMIT):
+        namespace.add_mid_term(f"{prefix}{i} remembered detail {prefix}")  # no near-duplicates
+
+
+def test_merge_does_not_hold_the_write_lock_during_the_llm_call(namespace, slow_merge):
+    async def scenario():
+        fill_mid_term(namespace, "first")
+        merge = asyncio.create_task(agent.merge_if_full(namespace))
+        await asyncio.sleep(0.01)
+        assert len(slow_merge.batches) == 1
+        assert not namespace.write_lock.locked()
+        namespace.add_mid_term("stored while merging")
+        slow_merge.gate.set()
+        await merge
+
+    asyncio.run(scenario())
+    assert namespace.mid_term.copy() == ["stored while merging"]
+    assert len(namespace.long_term) == 1
+
+
+def test_a_full_batch_waiting_after_a_merge_is_merged(namespace, slow_merge):
+    async def scenario():
+        fill_mid_term(namespace, "first")
+        merge = asyncio.create_task(agent.merge_if_full(namespace))
+        await asyncio.sleep(0.01)
+        fill_mid_term(namespace, "second")  # no trigger of its own
+        slow_merge.gate.set()
+        await merge
+
+    asyncio.run(scenario())
+    assert len(namespace.mid_term) == 0
+    assert [len(batch) for batch in slow_merge.batches] == [agent.MID_LIMIT, agent.MID_LIMIT]
+    assert len(namespace.long_term) == 2
+
+
+def test_concurrent_triggers_merge_disjoint_batches(namespace, slow_merge):
+    async def scenario():
+        fill_mid_term(namespace, "first")
+        first = asyncio.create_task(agent.merge_if_full(namespace))
+        await asyncio.sleep(0.01)
+        fill_mid_term(namespace, "second")
+        second = asyncio.create_task(agent.merge_if_full(namespace))
+        await asyncio.sleep(0.01)
+        slow_merge.gate.set()
+        await asyncio.gather(first, second)
+
+    asyncio.run(scenario())
+    merged = [summary for batch in slow_merge.batches for summary in batch]
+    assert len(merged) == len(set(merged)) == 2 * agent.MID_LIMIT
+    assert len(namespace.mid_term) == 0
+    assert len(namespace.long_term) == 2
+
+
+def test_below_the_limit_nothing_is_merged(namespace, slow_merge):
+    namespace.add_mid_term("only one summary")
+    asyncio.run(agent.merge_if_full(namespace))
+    assert slow_merge.batches == []
+    assert namespace.mid_term.copy() == ["only one summary"]
@@ -0,0 +1,173 @@
+import os
+import threading
+
+import pytest
+
+from agentuity_agents.EchoMinder.memory_index import MemoryLayer
+from agentuity_agents.EchoMinder.namespaces import MemoryNamespace, NamespaceCache
+from agentuity_agents.EchoMinder.storage import create_store
+from agentuity_agents.EchoMinder.warm_start import open_warm_snapshot
+
+
+class RecordingNamespace(MemoryNamespace):
+    closed = []
+
+    def close(self) -> None:
+        super().close()
+        self.closed.append(self.name)
+
+
+def open_namespace(name: str) -> MemoryNamespace:
+    namespace = RecordingNamespace(name, short_limit=10)
+    namespace.add_long_term(f"{name} " + "x" * 400)
+    return namespace
+
+
+NAMESPACE_BYTES = open_namespace("probe").nbytes()
+
+
+def make_cache(budget_bytes: int, **options) -> NamespaceCache:
+    RecordingNamespace.closed = []
+    return NamespaceCache(open_namespace, budget_bytes, **options)
+
+
+def test_evicts_the_least_recently_used_over_budget():
+    cache = make_cache(budget_bytes=NAMESPACE_BYTES * 3 // 2)
+    for name in ("a", "b", "c"):
+        cache.acquire(name)
+        cache.release(name)
+    cache.wait_closed()
+    assert RecordingNamespace.closed == ["a", "b"]
+    assert [namespace.name for namespace in cache.resident()] == ["c"]
+    assert cache.evictions == 2
+
+
+def test_pinned_and_active_namespaces_stay_resident():
+    cache = make_cache(budget_bytes=1, pinned={"default"})
+    cache.get("default")
+    busy = cache.acquire("busy")
+    cache.acquire("other")
+    cache.release("other")
+    assert "default" in cache and "busy" in cache
+    assert "other" not in cache
+
+    cache.release("busy")
+    assert "busy" not in cache
+    cache.wait_closed()
+    assert busy.name in RecordingNamespace.closed
+
+
+def test_reopens_an_evicted_namespace():
+    cache = make_cache(budget_bytes=1)
+    first = cache.acquire("a")
+    cache.release("a")
+    second = cache.acquire("a")
+    assert second is not first
+    assert cache.loads == 2
+    cache.release("a")
+
+
+def test_eviction_writes_back_off_the_calling_thread(monkeypatch):
+    cache = make_cache(budget_bytes=1)
+    threads = []
+    monkeypatch.setattr(RecordingNamespace, "close", lambda self: threads.append(threading.current_thread()))
+    cache.acquire("a")
+    cache.release("a")
+    cache.wait_closed()
+    assert threads and threads[0] is not threading.current_thread()
+
+
+def test_close_all_closes_everything():
+    cache = make_cache(budget_bytes=10 ** 9, pinned={"a"})
+    for name in ("a", "b"):
+        cache.get(name)
+    cache.close_all()
+    assert sorted(RecordingNamespace.closed) == ["a", "b"]
+    assert cache.resident() == []
+
+
+def test_a_preloaded_namespace_is_opened_once_off_the_calling_thread():
+    threads = []
+
+    def opener(name: str) -> MemoryNamespace:
+        threads.append(threading.current_thread())
+        return open_namespace(name)
+
+    cache = NamespaceCache(opener, 10 ** 9)
+    cache.preload("a")
+    cache.preload("a")
+    namespace = cache.get("a")
+    assert cache.get("a") is namespace
+    assert len(threads) == 1 and threads[0] is not threading.current_thread()
+    assert cache.loads == 1
+
+
+def open_stored(tmp_path, name: str = "stored") -> MemoryNamespace:
+    namespace = MemoryNamespace(name, short_limit=10)
+    namespace.store = create_store("journal", str(tmp_path / f"{name}.json"), namespace.layers, fsync_interval=0)
+    namespace.warm_path = str(tmp_path / f"{name}.warm")
+    namespace.load()
+    return namespace
+
+
+def test_a_background_save_writes_a_matching_warm_snapshot(tmp_path):
+    namespace = open_stored(tmp_path)
+    namespace.add_long_term("likes tea")
+    namespace.add_mid_term("talked about tea")
+    write = namespace.save_later()
+    namespace.add_short_term("changed after the copy")  # not in this save
+    writer = threading.Thread(target=write)
+    writer.start()
+    writer.join()
+    assert namespace.dirty()
+    namespace.store.close()
+
+    reopened = open_stored(tmp_path)
+    assert open_warm_snapshot(reopened.warm_path, reopened.store.fingerprint()) is not None
+    assert reopened.long_term.copy() == ["likes tea"]
+    assert reopened.mid_term.copy() == ["talked about tea"]
+    assert reopened.short_term.copy() == []
+    reopened.store.close()
+
+
+def test_a_background_save_skips_a_stale_warm_snapshot(tmp_path):
+    namespace = open_stored(tmp_path)
+    namespace.add_long_term("first")
+    write = namespace.save_later()
+    namespace.add_long_term("second")  # journaled after the copy
+    write()
+    assert not os.path.exists(namespace.warm_path)
+    namespace.store.close()
+    assert open_stored(tmp_path).long_term.copy() == ["first", "second"]
+
+
+def test_evicts_beyond_the_resident_count_however_small():
+    cache = make_cache(budget_bytes=10 ** 9, max_resident=2)
+    for name in ("a", "b", "c", "d"):
+        cache.acquire(name)
+        cache.release(name)
+    cache.wait_closed()
+    assert [namespace.name for namespace in cache.resident()] == ["c", "d"]
+    assert RecordingNamespace.closed == ["a", "b"]
+
+
+def test_a_warm_start_adopts_the_saved_keyword_index(tmp_path, monkeypatch):
+    namespace = open_stored(tmp_path)
+    for i in range(6):
+        namespace.add_long_term(f"memory {i} about tea" if i % 2 else f"memory {i} about coffee")
+    namespace.compact_long_term([doc_id for doc_id, _ in namespace.long_term.items()][1:3], "summary of tea", 1)
+    namespace.long_term.touch([doc_id for doc_id, _ in namespace.long_term.items()][-1:])
+    expected = namespace.long_term.search(["tea"])
+    namespace.save()
+    namespace.store.close()
+
+    monkeypatch.setattr(MemoryLayer, "_rebuild", lambda self: pytest.fail("index rebuilt"))
+    reopened = open_stored(tmp_path)
+    assert reopened.warm_loaded
+    assert reopened.long_term.search(["tea"]) == expected
+    assert reopened.long_term.search(["cof"]) == ["memory 0 about coffee", "memory 4 about coffee"]
+    assert reopened.long_term.access_stats()[0][-1] == 1
+    assert reopened.long_term.nbytes == namespace.long_term.nbytes
+    reopened.add_long_term("more tea")
+    assert reopened.long_term.search(["tea"]) == expected + ["more tea"]
+    reopened.store.close()
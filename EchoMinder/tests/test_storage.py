@@ -0,0 +1,31 @@
+import threading
+
+from agentuity_agents.EchoMinder import journal
+from agentuity_agents.EchoMinder.journal import LongTermJournal
+from agentuity_agents.EchoMinder.storage import SQLiteStore
+
+
+def test_sqlite_stores_share_one_connection(tmp_path):
+    path = str(tmp_path / "memory.sqlite3")
+    alice, bob = SQLiteStore(path, "alice"), SQLiteStore(path, "bob")
+    assert alice._conn is bob._conn
+    alice.append("long", "alice likes tea")
+    bob.append("long", "bob likes coffee")
+    alice.close()
+    assert bob.load("long") == ["bob likes coffee"]  # still open for the other namespace
+    bob.close()
+
+    reopened = SQLiteStore(path, "alice")
+    assert reopened.load("long") == ["alice likes tea"]
+    reopened.close()
+
+
+def test_journals_share_one_flusher_thread(tmp_path):
+    journals = [LongTermJournal(str(tmp_path / f"user{i}.json"), fsync_interval=0.01) for i in range(20)]
+    for user_journal in journals:
+        user_journal.load()
+        user_journal.append("a memory", lambda: (["a memory"], [0]))
+    flushers = [thread for thread in threading.enumerate() if thread.name == "journal-flusher"]
+    assert len(flushers) == 1 and flushers[0] is journal._flusher
+    for user_journal in journals:
+        user_journal.close()
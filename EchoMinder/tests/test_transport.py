@@ -0,0 +1,58 @@
+import asyncio
+from pathlib import Path
+
+import httpx
+import pytest
+
+from agentuity_agents.EchoMinder.transport import IDEMPOTENCY_HEADER, ResilientTransport
+
+BACKUP_COPY = Path(__file__).resolve().parents[2] / "EchoMind_backup" / "agentuity_agents" / "EchoMind" / "transport.py"
+THIS_COPY = Path(__file__).resolve().parents[1] / "agentuity_agents" / "EchoMinder" / "transport.py"
+
+
+class SlowUpstream(httpx.AsyncBaseTransport):
+    """Answers every request after `delay` seconds and counts them"""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.calls = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return httpx.Response(200, request=request)
+
+
+def send(method: str, headers=None) -> SlowUpstream:
+    upstream = SlowUpstream(delay=0.05)
+    transport = ResilientTransport(upstream, hedge_after=0.01, hedge_budget=1.0)
+
+    async def scenario():
+        request = httpx.Request(method, "https://llm.example/v1/chat/completions", headers=headers, content=b"{}")
+        response = await transport.handle_async_request(request)
+        await response.aclose()
+
+    asyncio.run(scenario())
+    return upstream
+
+
+def test_slow_idempotent_requests_are_hedged():
+    assert send("GET").calls == 2
+
+
+def test_posts_are_not_hedged():
+    assert send("POST").calls == 1
+
+
+def test_posts_with_an_idempotency_key_are_hedged():
+    assert send("POST", headers={IDEMPOTENCY_HEADER: "turn-1"}).calls == 2
+
+
+@pytest.mark.skipif(not BACKUP_COPY.exists(), reason="EchoMind_backup is not checked out next to EchoMinder")
+def test_backup_copy_has_not_drifted():
+    """The two deployed copies may only differ in the line that names the other copy"""
+    ours = THIS_COPY.read_text(encoding="utf-8").splitlines()
+    theirs = BACKUP_COPY.read_text(encoding="utf-8").splitlines()
+    assert len(ours) == len(theirs)
+    differing = [i for i, (a, b) in enumerate(zip(ours, theirs)) if a != b]
+    assert all(ours[i].startswith("# Kept as an identical copy of") for i in differing)